@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+# txSpy, a set of tools to spy inside Twisted applications
+#
+# Copyright (C) 2009 Nicolas Trangez  <eikke eikke com>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, version 2.1
+# of the License.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA  02110-1301  USA
+
+'''Benchmark of heap object type counting
+
+Compares the original sort-and-group type counting strategy, using the
+original uncached type name lookup, against
+`txspy.objectbrowser.countTypes` on synthetic heaps of increasing size.
+
+Usage: python benchmarks/typecount.py [number of objects...]
+'''
+
+import sys
+import time
+import types
+import random
+import itertools
+
+from txspy.objectbrowser import countTypes
+
+__docformat__ = 'restructuredtext en'
+
+
+def uncachedTypeName(object_):
+    '''Get the full type name of an object the way `getTypeName` used to,
+    formatting it for every object'''
+    type_ = type(object_)
+
+    if type_ == types.InstanceType:
+        type_ = object_.__class__
+
+    return '%s.%s' % (type_.__module__, type_.__name__)
+
+
+def sortedCount(objects):
+    '''Count objects per type name the way `updateStats` used to'''
+    count = lambda iterable: reduce(lambda i, _: i + 1, iterable, 0)
+
+    sortedObjectTypes = sorted(itertools.imap(uncachedTypeName, objects))
+
+    return dict((typeName, count(group)) for typeName, group in
+                itertools.groupby(sortedObjectTypes))
+
+
+def makeHeap(size, numTypes=500, seed=0):
+    '''Generate a synthetic heap
+
+    The heap contains built-in objects, instances of new-style classes and
+    instances of old-style classes, with a skewed type distribution.
+
+    :Parameters:
+        size : number
+          Number of objects to generate
+        numTypes : number
+          Number of distinct custom classes to instantiate
+        seed : number
+          Random seed
+
+    :return: List of objects
+    :rtype: list
+    '''
+    random_ = random.Random(seed)
+
+    classes = [type('NewStyle%d' % i, (object, ), {}) \
+                   for i in xrange(numTypes / 2)]
+    classes.extend(types.ClassType('OldStyle%d' % i, (), {}) \
+                   for i in xrange(numTypes - len(classes)))
+
+    factories = [dict, list, tuple, lambda: 'string', lambda: 1.5, ]
+    factories.extend(classes)
+
+    # Pareto-distributed choice, a few types make up most of the heap
+    pick = lambda: factories[min(int(random_.paretovariate(1.2)) - 1,
+                                 len(factories) - 1)]
+
+    return [pick()() for _ in xrange(size)]
+
+
+def bench(fun, objects, repeat=3):
+    '''Return the best wall-clock time of calling `fun(objects)`'''
+    best = None
+
+    for _ in xrange(repeat):
+        start = time.time()
+        fun(objects)
+        duration = time.time() - start
+
+        if best is None or duration < best:
+            best = duration
+
+    return best
+
+
+def main(sizes):
+    print '%10s %12s %12s %8s' % ('objects', 'before (s)', 'after (s)',
+                                  'speedup')
+
+    for size in sizes:
+        objects = makeHeap(size)
+
+        assert sortedCount(objects) == countTypes(objects)
+
+        before = bench(sortedCount, objects)
+        after = bench(countTypes, objects)
+
+        print '%10d %12.4f %12.4f %7.1fx' % (size, before, after,
+                                             before / after)
+
+
+if __name__ == '__main__':
+    main(map(int, sys.argv[1:]) or [10000, 100000, 1000000])
@@ -28,8 +28,9 @@ setup(name='txSpy',
       description='A set of tools to spy inside Twisted applications', 
       author='Nicolas Trangez',
       author_email='eikke eikke com',
-      packages=['txspy', ],
+      packages=['txspy', 'txspy.test', ],
+      scripts=['bin/txspy-heapdiff', ],
       license='LGPL-2.1',
-      requires=['pygooglechart', 'twisted (>8.0)', ],
+      requires=['twisted (>8.0)', ],
       url='http://github.com/NicolasT/txSpy',
      )
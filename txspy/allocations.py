@@ -0,0 +1,332 @@
+# txSpy, a set of tools to spy inside Twisted applications
+#
+# Copyright (C) 2009 Nicolas Trangez  <eikke eikke com>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, version 2.1
+# of the License.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA  02110-1301  USA
+
+'''Allocation site attribution using `tracemalloc`
+
+`tracemalloc` records where every memory block was allocated. Looking up
+the allocation tracebacks of some instances of a type tells where the
+objects of that type come from, comparing consecutive snapshots tells which
+of these sites keep allocating.
+
+`tracemalloc` isn't part of the standard library before Python 3.4. On
+Python 2, it's provided by pytracemalloc, which requires a patched
+interpreter. Use `available` to check whether it can be used.
+
+This module doesn't depend on Twisted.
+
+:author: Nicolas Trangez
+:license: GNU Lesser General Public License version 2.1
+:copyright: |copy| 2009 Nicolas Trangez
+
+.. |copy| unicode:: 0xA9 .. copyright sign
+'''
+
+import time
+import operator
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import txspy
+
+__author__ = txspy.__author__
+__license__ = txspy.__license__
+__version__ = txspy.__version__
+
+__docformat__ = 'restructuredtext en'
+
+# Default number of frames stored per allocation traceback
+TRACE_DEPTH = 10
+# Default maximal memory (in bytes) tracemalloc may use for its own
+# bookkeeping and the snapshot kept, before tracing is stopped
+TRACE_MEMORY_LIMIT = 64 * 1024 * 1024
+# Default number of instances per type of which the traceback is looked up
+TRACE_INSTANCES = 100
+# Number of allocation sites kept per type
+TRACE_SITES = 10
+# Default fraction of the time between updates updates may take
+TRACE_OVERHEAD = 0.05
+# Maximal number of samples between updates, tracing is stopped if updates
+# still take too long
+TRACE_MAX_PERIOD = 64
+# Approximate memory (in bytes) a snapshot takes per trace
+SNAPSHOT_TRACE_SIZE = 120
+
+
+def available():
+    '''Check whether allocations can be traced
+
+    This requires the `tracemalloc` module, part of the standard library
+    since Python 3.4, or pytracemalloc on Python 2.
+    '''
+    return tracemalloc is not None
+
+
+class AllocationSite(object):
+    '''A place allocating objects of a given type'''
+
+    __slots__ = '_frames', '_count', '_sizeGrowth', '_countGrowth',
+
+    def __init__(self, frames, count, sizeGrowth, countGrowth):
+        '''
+        :Parameters:
+            frames : tuple
+              (file name, line number) tuples, most recent call first, or
+              empty if the objects were allocated before tracing started
+            count : number
+              Number of inspected instances allocated here
+            sizeGrowth : number
+              Growth (in bytes) of the memory allocated here and still in
+              use, since the previous snapshot
+            countGrowth : number
+              Growth of the number of memory blocks allocated here and still
+              in use, since the previous snapshot
+        '''
+        self._frames = frames
+        self._count = count
+        self._sizeGrowth = sizeGrowth
+        self._countGrowth = countGrowth
+
+    frames = property(operator.attrgetter('_frames'),
+                      doc='Allocation traceback, most recent call first')
+    count = property(operator.attrgetter('_count'),
+                     doc='Number of inspected instances allocated here')
+    sizeGrowth = property(operator.attrgetter('_sizeGrowth'),
+                          doc='Growth of the memory in use allocated here')
+    countGrowth = property(operator.attrgetter('_countGrowth'),
+                           doc='Growth of the number of blocks in use '
+                               'allocated here')
+
+
+class AllocationTracker(object):
+    '''Attribute the objects of some types to their allocation sites
+
+    Every `update` compares a new `tracemalloc` snapshot with the previous
+    one, so only the latest snapshot is kept, and looks up the allocation
+    tracebacks of some instances of the given types. Instances are picked by
+    the caller, e.g. while taking a sample, so updates don't walk the heap.
+
+    Taking and comparing snapshots costs time proportional to the number of
+    memory blocks traced. Updates are run every `period` samples, which is
+    doubled whenever an update takes more than `overhead` of the time since
+    the previous one, and halved again once updates got cheap. Tracing is
+    stopped for good if updates take too long even at `TRACE_MAX_PERIOD`,
+    or once `tracemalloc` and the snapshot kept use more memory than the
+    limit. Memory use is checked on every `tick`, so between updates too.
+    '''
+
+    __slots__ = '_depth', '_memoryLimit', '_numInstances', '_overhead', \
+                '_previous', '_snapshotMemory', '_sites', '_overLimit', \
+                '_overBudget', '_updateCost', '_period', '_countdown',
+
+    def __init__(self, depth=TRACE_DEPTH, memoryLimit=TRACE_MEMORY_LIMIT,
+                 numInstances=TRACE_INSTANCES, overhead=TRACE_OVERHEAD):
+        '''
+        :Parameters:
+            depth : number
+              Number of frames to store per allocation traceback
+            memoryLimit : number
+              Maximal memory (in bytes) `tracemalloc` and the snapshot kept
+              may use
+            numInstances : number
+              Number of instances per type to look up
+            overhead : number
+              Fraction of the time between updates updates may take
+        '''
+        assert available(), 'tracemalloc is not available'
+
+        self._depth = depth
+        self._memoryLimit = memoryLimit
+        self._numInstances = numInstances
+        self._overhead = overhead
+
+        self._previous = None
+        self._snapshotMemory = 0
+        # Mapping of type names to lists of `AllocationSite`
+        self._sites = dict()
+        self._overLimit = False
+        self._overBudget = False
+        self._updateCost = None
+        # Number of samples between updates, and until the next one
+        self._period = 1
+        self._countdown = 0
+
+    def start(self):
+        '''Start tracing allocations'''
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self._depth)
+
+    def stop(self):
+        '''Stop tracing allocations, forgetting all traces'''
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+        self._previous = None
+        self._snapshotMemory = 0
+
+    def tick(self):
+        '''Count a sample, stopping tracing if over the memory limit
+
+        :return: Whether an update is due for this sample
+        :rtype: bool
+        '''
+        if not self.tracing or not self._checkMemory(0):
+            return False
+
+        if self._countdown > 0:
+            self._countdown -= 1
+            return False
+
+        self._countdown = self._period - 1
+        return True
+
+    def update(self, instances, interval):
+        '''Take a snapshot and attribute some instances
+
+        :Parameters:
+            instances : dict
+              Mapping of type names to lists of instances to attribute,
+              replacing the types attributed before. The lists are emptied.
+            interval : number
+              Time (in seconds) between samples
+        '''
+        if not tracemalloc.is_tracing():
+            return
+
+        # The previous and the new snapshot are held while comparing
+        if not self._checkMemory(self._snapshotMemory):
+            return
+
+        start = time.time()
+
+        snapshot = tracemalloc.take_snapshot()
+
+        growth = dict()
+        if self._previous is not None:
+            for statistic in snapshot.compare_to(self._previous,
+                                                 'traceback'):
+                growth[statistic.traceback] = statistic.size_diff, \
+                                              statistic.count_diff
+
+        # Only the latest snapshot is needed for the next comparison
+        self._previous = snapshot
+        self._snapshotMemory = len(snapshot.traces) * SNAPSHOT_TRACE_SIZE
+
+        sites = dict()
+
+        for name, objects in instances.items():
+            tracebacks = dict()
+
+            for object_ in objects:
+                traceback = tracemalloc.get_object_traceback(object_)
+                tracebacks[traceback] = tracebacks.get(traceback, 0) + 1
+
+            del objects[:]
+
+            sites[name] = [
+                AllocationSite(
+                    tuple((frame.filename, frame.lineno)
+                          for frame in traceback or ()),
+                    count, *growth.get(traceback, (0, 0)))
+                for traceback, count in sorted(
+                    tracebacks.items(), key=operator.itemgetter(1),
+                    reverse=True)[:TRACE_SITES]]
+
+        self._sites = sites
+        self._updateCost = time.time() - start
+
+        self._adjustPeriod(interval)
+
+    def _checkMemory(self, extra):
+        '''Stop tracing if over the memory limit
+
+        :Parameters:
+            extra : number
+              Memory (in bytes) about to be used on top of `memory`
+
+        :return: Whether tracing may go on
+        :rtype: bool
+        '''
+        if self.memory + extra <= self._memoryLimit:
+            return True
+
+        self._overLimit = True
+        self._sites.clear()
+        self.stop()
+
+        return False
+
+    def _adjustPeriod(self, interval):
+        '''Adapt the number of samples between updates to their cost'''
+        budget = self._overhead * interval * self._period
+
+        if self._updateCost > budget:
+            if self._period >= TRACE_MAX_PERIOD:
+                self._overBudget = True
+                self._sites.clear()
+                self.stop()
+                return
+
+            self._period *= 2
+        elif self._updateCost < budget / 4 and self._period > 1:
+            self._period //= 2
+
+        self._countdown = self._period - 1
+
+    def sites(self, typeName_):
+        '''Get the allocation sites of a type
+
+        :Parameters:
+            `typeName\_` : str
+              Name of the type
+
+        :return: Allocation sites, most instances first, or `None` if the
+                 type wasn't attributed in the latest update
+        :rtype: list of `AllocationSite`
+        '''
+        return self._sites.get(typeName_, None)
+
+    depth = property(operator.attrgetter('_depth'),
+                     doc='Number of frames stored per allocation traceback')
+    memoryLimit = property(operator.attrgetter('_memoryLimit'),
+                           doc='Maximal memory tracemalloc and the snapshot '
+                               'kept may use')
+    numInstances = property(operator.attrgetter('_numInstances'),
+                            doc='Number of instances per type to look up')
+    overLimit = property(operator.attrgetter('_overLimit'),
+                         doc='Whether tracing was stopped because the memory '
+                             'limit was exceeded')
+    overBudget = property(operator.attrgetter('_overBudget'),
+                          doc='Whether tracing was stopped because updates '
+                              'took too long')
+    tracing = property(lambda self: tracemalloc.is_tracing(),
+                       doc='Whether allocations are being traced')
+    memory = property(lambda self: tracemalloc.get_tracemalloc_memory() + \
+                                   self._snapshotMemory,
+                      doc='Memory (in bytes) used by tracemalloc and the '
+                          'snapshot kept')
+    updateCost = property(operator.attrgetter('_updateCost'),
+                          doc='Time (in seconds) the latest update took')
+    period = property(operator.attrgetter('_period'),
+                      doc='Number of samples between updates')
+    attributedTypes = property(lambda self: sorted(self._sites),
+                               doc='Names of the types attributed in the '
+                                   'latest update')
@@ -0,0 +1,541 @@
+# txSpy, a set of tools to spy inside Twisted applications
+#
+# Copyright (C) 2009 Nicolas Trangez  <eikke eikke com>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, version 2.1
+# of the License.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA  02110-1301  USA
+
+'''Heap graph snapshots and retained size analysis
+
+A `HeapGraph` is a compact copy of the object graph: objects are numbered,
+and their types, shallow sizes and references are stored in arrays, so no
+reference to any object is kept. The dominator tree of the graph tells which
+objects keep which others alive, and thereby how much memory every object
+retains.
+
+This module doesn't depend on Twisted.
+
+:author: Nicolas Trangez
+:license: GNU Lesser General Public License version 2.1
+:copyright: |copy| 2009 Nicolas Trangez
+
+.. |copy| unicode:: 0xA9 .. copyright sign
+'''
+
+import gc
+import sys
+import heapq
+import array
+import types
+import operator
+
+import txspy
+
+__author__ = txspy.__author__
+__license__ = txspy.__license__
+__version__ = txspy.__version__
+
+__docformat__ = 'restructuredtext en'
+
+
+def typeName(object_):
+    '''Get the full type name of an object
+
+    Old-style instances are named by their class.
+
+    :Parameters:
+        `object\_` : object
+          Object of which to name the type
+
+    :return: Complete name of `object_`'s type
+    :rtype: str
+    '''
+    type_ = type(object_)
+
+    if type_ is types.InstanceType:
+        type_ = object_.__class__
+
+    return '%s.%s' % (type_.__module__, type_.__name__)
+
+
+class HeapGraph(object):
+    '''Compact snapshot of the object graph
+
+    Nodes are numbered from 0. The objects tracked by the garbage collector
+    come first, followed by the untracked objects they refer to (strings,
+    numbers,...). References are stored in compressed sparse row form: the
+    referents of node ``i`` are ``targets[offsets[i]:offsets[i + 1]]``.
+    '''
+
+    __slots__ = '_typeNames', '_types', '_sizes', '_ids', '_offsets', \
+                '_targets',
+
+    def __init__(self, typeNames, types_, sizes, ids, offsets, targets):
+        '''
+        :Parameters:
+            typeNames : list
+              Names of the types, indexed by type number
+            `types\_` : `array.array`
+              Type number of every node
+            sizes : `array.array`
+              Shallow size (in bytes) of every node
+            ids : `array.array`
+              Identity (address) of the object of every node
+            offsets : `array.array`
+              Offset of the referents of every node in `targets`, followed by
+              the length of `targets`
+            targets : `array.array`
+              Referents of all nodes
+        '''
+        assert len(types_) == len(sizes) == len(ids) == len(offsets) - 1
+
+        self._typeNames = typeNames
+        self._types = types_
+        self._sizes = sizes
+        self._ids = ids
+        self._offsets = offsets
+        self._targets = targets
+
+    @classmethod
+    def build(cls, objects=None, nameType=typeName):
+        '''Build a graph of a set of objects and everything they refer to
+
+        :Parameters:
+            objects : list
+              Objects to start from, defaults to all objects tracked by the
+              garbage collector
+            nameType : callable
+              Function returning the type name of an object
+
+        :return: Graph
+        :rtype: `HeapGraph`
+        '''
+        if objects is None:
+            objects = gc.get_objects()
+
+        getsizeof = sys.getsizeof
+        getReferents = gc.get_referents
+
+        typeNames = []
+        typeNumbers = dict()
+        types_ = array.array('l')
+        sizes = array.array('l')
+        ids = array.array('L')
+        offsets = array.array('l')
+        targets = array.array('l')
+
+        # Objects appended while building, in node order
+        nodes = list(objects)
+        index = dict()
+
+        # The bookkeeping of the build refers to all objects, leave it out
+        ignore = set(map(id, (objects, nodes, index, typeNames, typeNumbers,
+                              sys._getframe())))
+
+        for object_ in nodes:
+            index[id(object_)] = len(index)
+
+        object_ = None
+        i = 0
+        while i < len(nodes):
+            object_ = nodes[i]
+            i += 1
+
+            name = nameType(object_)
+            number = typeNumbers.get(name, None)
+            if number is None:
+                number = len(typeNames)
+                typeNames.append(name)
+                typeNumbers[name] = number
+
+            types_.append(number)
+            sizes.append(getsizeof(object_, 0))
+            ids.append(id(object_))
+            offsets.append(len(targets))
+
+            for referent in getReferents(object_):
+                key = id(referent)
+
+                if key in ignore:
+                    continue
+
+                target = index.get(key, None)
+                if target is None:
+                    target = len(nodes)
+                    index[key] = target
+                    nodes.append(referent)
+
+                targets.append(target)
+
+        offsets.append(len(targets))
+
+        del nodes, object_
+        index.clear()
+
+        return cls(typeNames, types_, sizes, ids, offsets, targets)
+
+    def referents(self, node):
+        '''Get the referents of a node
+
+        :Parameters:
+            node : number
+              Node number
+
+        :return: Numbers of the nodes `node` refers to
+        :rtype: `array.array`
+        '''
+        return self._targets[self._offsets[node]:self._offsets[node + 1]]
+
+    def typeName(self, node):
+        '''Get the type name of a node'''
+        return self._typeNames[self._types[node]]
+
+    def __len__(self):
+        '''Get the number of nodes'''
+        return len(self._types)
+
+    typeNames = property(operator.attrgetter('_typeNames'),
+                         doc='Names of the types, indexed by type number')
+    types = property(operator.attrgetter('_types'),
+                     doc='Type number of every node')
+    sizes = property(operator.attrgetter('_sizes'),
+                     doc='Shallow size (in bytes) of every node')
+    ids = property(operator.attrgetter('_ids'),
+                   doc='Identity of the object of every node')
+    offsets = property(operator.attrgetter('_offsets'),
+                       doc='Offsets of the referents of every node')
+    targets = property(operator.attrgetter('_targets'),
+                       doc='Referents of all nodes')
+
+
+class DominatorTree(object):
+    '''Dominator tree of a `HeapGraph`, with retained sizes
+
+    A node dominates another one if every path from the roots to the latter
+    passes through it, so freeing the former frees the latter as well. The
+    retained size of a node is its shallow size plus the shallow sizes of
+    all nodes it dominates.
+
+    The graph doesn't say what the interpreter refers to, so nodes nobody
+    refers to are taken as roots, as are nodes in unreachable cycles. All
+    roots hang off a virtual root node, numbered ``len(graph)``.
+
+    Dominators are calculated using the iterative algorithm of Cooper,
+    Harvey and Kennedy, which only needs arrays indexed by node number and
+    converges in a few passes on typical heaps.
+    '''
+
+    __slots__ = '_graph', '_dominators', '_retained',
+
+    def __init__(self, graph):
+        '''
+        :Parameters:
+            graph : `HeapGraph`
+              Graph to analyze
+        '''
+        self._graph = graph
+
+        roots, order = self._walk(graph)
+        self._dominators = self._dominate(graph, roots, order)
+        self._retained = self._retain(graph, order)
+
+    @staticmethod
+    def _walk(graph):
+        '''Walk the graph depth-first from the roots
+
+        :return: Nodes picked as roots, and all nodes in post-order, ending
+                 with the virtual root
+        :rtype: tuple of `array.array`
+        '''
+        n = len(graph)
+        offsets, targets = graph.offsets, graph.targets
+
+        referred = array.array('b', [0]) * n
+        for target in targets:
+            referred[target] = 1
+
+        visited = array.array('b', [0]) * n
+        roots = array.array('l')
+        order = array.array('l')
+
+        # Stack of nodes and the position of the next referent to visit
+        stack = []
+        positions = []
+
+        for candidates in (i for i in xrange(n) if not referred[i]), \
+                          xrange(n):
+            for root in candidates:
+                if visited[root]:
+                    continue
+
+                roots.append(root)
+                visited[root] = 1
+                stack.append(root)
+                positions.append(offsets[root])
+
+                while stack:
+                    node = stack[-1]
+                    position = positions[-1]
+
+                    if position < offsets[node + 1]:
+                        positions[-1] = position + 1
+                        target = targets[position]
+
+                        if not visited[target]:
+                            visited[target] = 1
+                            stack.append(target)
+                            positions.append(offsets[target])
+                    else:
+                        stack.pop()
+                        positions.pop()
+                        order.append(node)
+
+        order.append(n)
+
+        return roots, order
+
+    @staticmethod
+    def _dominate(graph, roots, order):
+        '''Calculate the immediate dominator of every node
+
+        :return: Immediate dominator of every node, and of the virtual root
+                 itself
+        :rtype: `array.array`
+        '''
+        n = len(graph)
+        offsets, targets = graph.offsets, graph.targets
+
+        # Predecessors in compressed sparse row form, including the edges
+        # from the virtual root
+        counts = array.array('l', [0]) * (n + 2)
+        for target in targets:
+            counts[target + 2] += 1
+        for root in roots:
+            counts[root + 2] += 1
+        for i in xrange(2, n + 2):
+            counts[i] += counts[i - 1]
+
+        predecessors = array.array('l', [0]) * (len(targets) + len(roots))
+        for node in xrange(n):
+            for position in xrange(offsets[node], offsets[node + 1]):
+                target = targets[position] + 1
+                predecessors[counts[target]] = node
+                counts[target] += 1
+        for root in roots:
+            predecessors[counts[root + 1]] = n
+            counts[root + 1] += 1
+        # counts[i] is now the start of the predecessors of node i
+
+        rank = array.array('l', [0]) * (n + 1)
+        for i, node in enumerate(order):
+            rank[node] = i
+
+        dominators = array.array('l', [-1]) * (n + 1)
+        dominators[n] = n
+
+        changed = True
+        while changed:
+            changed = False
+
+            # Reverse post-order, skipping the virtual root
+            for i in xrange(n - 1, -1, -1):
+                node = order[i]
+                dominator = -1
+
+                for position in xrange(counts[node], counts[node + 1]):
+                    predecessor = predecessors[position]
+
+                    if dominators[predecessor] == -1:
+                        continue
+
+                    if dominator == -1:
+                        dominator = predecessor
+                        continue
+
+                    # Intersect the dominator chains
+                    a, b = predecessor, dominator
+                    while a != b:
+                        while rank[a] < rank[b]:
+                            a = dominators[a]
+                        while rank[b] < rank[a]:
+                            b = dominators[b]
+                    dominator = a
+
+                if dominators[node] != dominator:
+                    dominators[node] = dominator
+                    changed = True
+
+        return dominators
+
+    def _retain(self, graph, order):
+        '''Calculate the retained size of every node
+
+        :return: Retained size of every node, and of the virtual root
+        :rtype: `array.array`
+        '''
+        n = len(graph)
+        dominators = self._dominators
+
+        retained = array.array('l', graph.sizes)
+        retained.append(0)
+
+        # Dominators come after the nodes they dominate in post-order
+        for i in xrange(n):
+            node = order[i]
+            retained[dominators[node]] += retained[node]
+
+        return retained
+
+    def byType(self):
+        '''Aggregate retained sizes by type
+
+        The retained size of a type is the sum of the retained sizes of its
+        nodes which aren't dominated by another node of the same type, so no
+        memory is counted twice.
+
+        :return: (type name, number of nodes, shallow size, retained size)
+                 tuples, by type number
+        :rtype: list
+        '''
+        graph = self._graph
+        n = len(graph)
+        types_, sizes = graph.types, graph.sizes
+        dominators, retained = self._dominators, self._retained
+        numTypes = len(graph.typeNames)
+
+        counts = array.array('l', [0]) * numTypes
+        shallow = array.array('l', [0]) * numTypes
+        for node in xrange(n):
+            counts[types_[node]] += 1
+            shallow[types_[node]] += sizes[node]
+
+        # Children of every node in the dominator tree, in compressed sparse
+        # row form
+        starts = array.array('l', [0]) * (n + 3)
+        for node in xrange(n):
+            starts[dominators[node] + 2] += 1
+        for i in xrange(2, n + 3):
+            starts[i] += starts[i - 1]
+        children = array.array('l', [0]) * n
+        for node in xrange(n):
+            parent = dominators[node] + 1
+            children[starts[parent]] = node
+            starts[parent] += 1
+
+        # Walk the dominator tree, counting the nodes of every type on the
+        # path from the root
+        active = array.array('l', [0]) * numTypes
+        total = array.array('l', [0]) * numTypes
+
+        stack = [n]
+        positions = [starts[n]]
+        while stack:
+            node = stack[-1]
+            position = positions[-1]
+
+            if position < starts[node + 1]:
+                positions[-1] = position + 1
+                child = children[position]
+                type_ = types_[child]
+
+                if not active[type_]:
+                    total[type_] += retained[child]
+                active[type_] += 1
+
+                stack.append(child)
+                positions.append(starts[child])
+            else:
+                stack.pop()
+                positions.pop()
+
+                if node != n:
+                    active[types_[node]] -= 1
+
+        return [(name, counts[i], shallow[i], total[i])
+                for i, name in enumerate(graph.typeNames)]
+
+    def largest(self, limit):
+        '''Get the nodes retaining the most memory
+
+        :Parameters:
+            limit : number
+              Maximal number of nodes to return
+
+        :return: Node numbers, largest retained size first
+        :rtype: list
+        '''
+        retained = self._retained
+
+        return heapq.nlargest(limit, xrange(len(self._graph)),
+                              key=retained.__getitem__)
+
+    def dominator(self, node):
+        '''Get the immediate dominator of a node
+
+        :return: Node number, or `None` for roots
+        :rtype: number
+        '''
+        dominator = self._dominators[node]
+
+        return None if dominator == len(self._graph) else dominator
+
+    def retainedSize(self, node):
+        '''Get the retained size (in bytes) of a node'''
+        return self._retained[node]
+
+    graph = property(operator.attrgetter('_graph'), doc='Analyzed graph')
+    totalSize = property(lambda self: self._retained[len(self._graph)],
+                         doc='Total shallow size (in bytes) of all nodes')
+
+
+def analyze(objects=None, nameType=typeName, numTypes=50, numObjects=50):
+    '''Build a heap graph and summarize which types and objects retain most
+
+    The summary only holds plain lists, numbers and strings, so it can be
+    serialized as is.
+
+    :Parameters:
+        objects : list
+          Objects to start from, defaults to all objects tracked by the
+          garbage collector
+        nameType : callable
+          Function returning the type name of an object
+        numTypes : number
+          Number of types to list
+        numObjects : number
+          Number of objects to list
+
+    :return: Mapping holding the number of ``nodes`` and ``edges`` in the
+             graph, its ``totalSize``, the ``types`` retaining most as (type
+             name, number of objects, shallow size, retained size) lists, and
+             the ``objects`` retaining most as (type name, identity, shallow
+             size, retained size) lists
+    :rtype: dict
+    '''
+    graph = HeapGraph.build(objects, nameType)
+    tree = DominatorTree(graph)
+
+    types_ = heapq.nlargest(numTypes, tree.byType(),
+                            key=operator.itemgetter(3))
+
+    return {
+        'nodes': len(graph),
+        'edges': len(graph.targets),
+        'totalSize': tree.totalSize,
+        'types': [list(row) for row in types_],
+        'objects': [[graph.typeName(node), graph.ids[node],
+                     graph.sizes[node], tree.retainedSize(node)]
+                    for node in tree.largest(numObjects)],
+    }
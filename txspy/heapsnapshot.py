@@ -0,0 +1,469 @@
+# txSpy, a set of tools to spy inside Twisted applications
+#
+# Copyright (C) 2009 Nicolas Trangez  <eikke eikke com>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, version 2.1
+# of the License.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA  02110-1301  USA
+
+'''Compact on-disk heap snapshots
+
+A snapshot lists every object tracked by the garbage collector with its
+type, shallow size and the identities of the objects it refers to. It's
+written while walking the heap, without building it in memory first, and
+read through `mmap`, so snapshots of large heaps can be analyzed on another
+machine.
+
+File layout, all numbers little-endian:
+
+- header (`HEADER`): magic, format version, number of types, timestamp,
+  number of objects, number of references, and the offsets of the sections
+- objects: one `NODE` record (identity, shallow size, index of the first
+  reference, type number, number of references) per object, in ascending
+  identity order
+- references: identities of the referred objects, `EDGE` each
+- types: per type number, the length of the UTF-8 encoded name (`LENGTH`)
+  followed by the name
+
+This module doesn't depend on Twisted. Run it as a script to compare two
+snapshots::
+
+    python -m txspy.heapsnapshot before.snapshot after.snapshot
+
+:author: Nicolas Trangez
+:license: GNU Lesser General Public License version 2.1
+:copyright: |copy| 2009 Nicolas Trangez
+
+.. |copy| unicode:: 0xA9 .. copyright sign
+'''
+
+import gc
+import sys
+import mmap
+import time
+import array
+import struct
+import operator
+import tempfile
+
+import txspy
+from txspy.heapgraph import typeName
+
+__author__ = txspy.__author__
+__license__ = txspy.__license__
+__version__ = txspy.__version__
+
+__docformat__ = 'restructuredtext en'
+
+MAGIC = 'TXSPYHS\0'
+VERSION = 2
+
+HEADER = struct.Struct('<8sIIdQQQQQ')
+NODE = struct.Struct('<QQQII')
+EDGE = struct.Struct('<Q')
+LENGTH = struct.Struct('<I')
+
+# Number of records buffered before writing them out
+WRITE_CHUNK_SIZE = 4096
+# Number of bytes copied at once when merging the references
+COPY_SIZE = 1024 * 1024
+
+
+class SnapshotError(Exception):
+    '''Raised when a file isn't a valid snapshot'''
+
+
+def writeSnapshot(file_, objects=None, nameType=typeName):
+    '''Write a snapshot of a set of objects
+
+    Objects are sorted by identity first, so snapshots can be compared
+    with a single merging pass. References are buffered in a temporary file
+    while the objects are written, and appended afterwards. Apart from the
+    list of objects and the write buffers, only the type table is held in
+    memory.
+
+    :Parameters:
+        `file\_` : file
+          Seekable file, opened for writing in binary mode
+        objects : iterable
+          Objects to write, defaults to all objects tracked by the garbage
+          collector
+        nameType : callable
+          Function returning the type name of an object
+
+    :return: Number of objects and references written
+    :rtype: tuple
+    '''
+    if objects is None:
+        objects = gc.get_objects()
+        objects.sort(key=id)
+    else:
+        objects = sorted(objects, key=id)
+
+    getsizeof = sys.getsizeof
+    getReferents = gc.get_referents
+    packNode = NODE.pack
+
+    typeNumbers = dict()
+    typeNames = []
+    numNodes = numEdges = 0
+
+    start = file_.tell()
+    file_.write('\0' * HEADER.size)
+    nodeOffset = file_.tell() - start
+
+    edges = tempfile.TemporaryFile()
+    nodeBuffer = []
+    edgeBuffer = array.array('L')
+
+    object_ = None
+
+    try:
+        for object_ in objects:
+            name = nameType(object_)
+            number = typeNumbers.get(name, None)
+            if number is None:
+                number = len(typeNames)
+                typeNames.append(name)
+                typeNumbers[name] = number
+
+            first = numEdges
+            for referent in getReferents(object_):
+                edgeBuffer.append(id(referent))
+                numEdges += 1
+
+            nodeBuffer.append(packNode(id(object_), getsizeof(object_, 0),
+                                       first, number, numEdges - first))
+            numNodes += 1
+
+            if len(nodeBuffer) >= WRITE_CHUNK_SIZE:
+                file_.write(''.join(nodeBuffer))
+                del nodeBuffer[:]
+            if len(edgeBuffer) >= WRITE_CHUNK_SIZE:
+                edges.write(packEdges(edgeBuffer))
+                del edgeBuffer[:]
+
+        del object_
+        file_.write(''.join(nodeBuffer))
+        edges.write(packEdges(edgeBuffer))
+
+        edgeOffset = file_.tell() - start
+        edges.seek(0)
+        while True:
+            data = edges.read(COPY_SIZE)
+            if not data:
+                break
+            file_.write(data)
+    finally:
+        edges.close()
+
+    typeOffset = file_.tell() - start
+    for name in typeNames:
+        if not isinstance(name, unicode):
+            # Not necessarily UTF-8 encoded
+            name = name.decode('utf-8', 'replace')
+        name = name.encode('utf-8')
+        file_.write(LENGTH.pack(len(name)) + name)
+
+    end = file_.tell()
+    file_.seek(start)
+    file_.write(HEADER.pack(MAGIC, VERSION, len(typeNames), time.time(),
+                            numNodes, numEdges, nodeOffset, edgeOffset,
+                            typeOffset))
+    file_.seek(end)
+
+    return numNodes, numEdges
+
+
+def packEdges(identities):
+    '''Pack object identities as `EDGE` records
+
+    :Parameters:
+        identities : `array.array`
+          Identities, of type code ``'L'``
+
+    :return: Records
+    :rtype: str
+    '''
+    if EDGE.size == identities.itemsize and sys.byteorder == 'little':
+        return identities.tostring()
+
+    return ''.join(map(EDGE.pack, identities))
+
+
+class Snapshot(object):
+    '''A heap snapshot, read through `mmap`
+
+    Objects are numbered in ascending identity order. Nothing but the type
+    table is read up front.
+    '''
+
+    __slots__ = '_file', '_map', '_typeNames', '_timestamp', '_numNodes', \
+                '_numEdges', '_nodeOffset', '_edgeOffset',
+
+    def __init__(self, path):
+        '''
+        :Parameters:
+            path : str
+              Path of the snapshot file
+
+        :raise SnapshotError: Not a valid snapshot
+        '''
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        except (mmap.error, ValueError), exc:
+            self._file.close()
+            raise SnapshotError('Can\'t map %s: %s' % (path, exc))
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise SnapshotError('%s is too short' % path)
+
+        magic, version, numTypes, self._timestamp, self._numNodes, \
+            self._numEdges, self._nodeOffset, self._edgeOffset, \
+            typeOffset = HEADER.unpack_from(self._map, 0)
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise SnapshotError('%s isn\'t a version %d snapshot' % \
+                                    (path, VERSION))
+
+        size = len(self._map)
+        if self._nodeOffset + self._numNodes * NODE.size > size or \
+           self._edgeOffset + self._numEdges * EDGE.size > size or \
+           typeOffset > size:
+            self.close()
+            raise SnapshotError('%s is truncated' % path)
+
+        self._typeNames = []
+        offset = typeOffset
+        for _ in xrange(numTypes):
+            length = None
+            if offset + LENGTH.size <= size:
+                length, = LENGTH.unpack_from(self._map, offset)
+                offset += LENGTH.size
+            if length is None or offset + length > size:
+                self.close()
+                raise SnapshotError('%s is truncated' % path)
+
+            self._typeNames.append(
+                self._map[offset:offset + length].decode('utf-8', 'replace'))
+            offset += length
+
+    def close(self):
+        '''Unmap and close the file'''
+        self._map.close()
+        self._file.close()
+
+    def node(self, index):
+        '''Read an object record
+
+        :Parameters:
+            index : number
+              Object number
+
+        :return: Identity, shallow size, index of the first reference, type
+                 number and number of references of the object
+        :rtype: tuple
+        '''
+        return NODE.unpack_from(self._map,
+                                self._nodeOffset + index * NODE.size)
+
+    def iterNodes(self):
+        '''Iterate over all object records, see `node`'''
+        unpack = NODE.unpack_from
+        map_ = self._map
+        offset = self._nodeOffset
+
+        for _ in xrange(self._numNodes):
+            yield unpack(map_, offset)
+            offset += NODE.size
+
+    def referents(self, index):
+        '''Get the identities of the objects an object refers to
+
+        :Parameters:
+            index : number
+              Object number
+
+        :return: Identities
+        :rtype: tuple
+        '''
+        _, _, first, _, count = self.node(index)
+        offset = self._edgeOffset + first * EDGE.size
+
+        return struct.unpack_from('<%dQ' % count, self._map, offset)
+
+    def typeTotals(self):
+        '''Count the objects and add up their sizes per type
+
+        :return: Mapping of type names to (number of objects, shallow size)
+                 tuples
+        :rtype: dict
+        '''
+        counts = [0] * len(self._typeNames)
+        sizes = [0] * len(self._typeNames)
+
+        for _, size, _, type_, _ in self.iterNodes():
+            counts[type_] += 1
+            sizes[type_] += size
+
+        return dict(zip(self._typeNames, zip(counts, sizes)))
+
+    def __len__(self):
+        '''Get the number of objects'''
+        return self._numNodes
+
+    typeNames = property(operator.attrgetter('_typeNames'),
+                         doc='Type names, by type number')
+    timestamp = property(operator.attrgetter('_timestamp'),
+                         doc='Time at which the snapshot was written')
+    numEdges = property(operator.attrgetter('_numEdges'),
+                        doc='Number of references')
+
+
+def diffSnapshots(before, after, limit=None):
+    '''Compare two snapshots
+
+    Objects of `after` are new if no object with the same identity and type
+    exists in `before`. These survived at least until `after` was written.
+
+    Both snapshots are walked once, in identity order, side by side. Apart
+    from per-type totals, only the listed new objects are held in memory.
+
+    :Parameters:
+        before : `Snapshot`
+          Older snapshot
+        after : `Snapshot`
+          Newer snapshot
+        limit : number
+          Number of new objects to list per type, all if `None`
+
+    :return: (type name, count delta, size delta, number of new objects,
+             size of new objects, identities of new objects) tuples, with
+             the largest size delta first
+    :rtype: list
+    '''
+    old = before.typeTotals()
+    new = after.typeTotals()
+
+    oldNodes = before.iterNodes()
+    oldTypes = before.typeNames
+    newTypes = after.typeNames
+
+    # Identity and type name of the current object of before, only objects
+    # with a larger identity remain
+    oldId, oldType = -1, None
+
+    survivors = dict()
+    for id_, size, _, type_, _ in after.iterNodes():
+        name = newTypes[type_]
+
+        while oldId < id_:
+            try:
+                oldId, _, _, oldTypeNumber, _ = oldNodes.next()
+            except StopIteration:
+                # Beyond any identity
+                oldId, oldType = 1 << 64, None
+                break
+            oldType = oldTypes[oldTypeNumber]
+
+        if oldId == id_ and oldType == name:
+            continue
+
+        count, total, examples = survivors.get(name, (0, 0, []))
+        if limit is None or len(examples) < limit:
+            examples.append(id_)
+        survivors[name] = count + 1, total + size, examples
+
+    result = []
+    for name in set(old) | set(new):
+        oldCount, oldSize = old.get(name, (0, 0))
+        newCount, newSize = new.get(name, (0, 0))
+        count, total, examples = survivors.get(name, (0, 0, []))
+
+        result.append((name, newCount - oldCount, newSize - oldSize, count,
+                       total, examples))
+
+    result.sort(key=lambda row: (-abs(row[2]), row[0]))
+
+    return result
+
+
+def main(argv=None):
+    '''Compare two snapshots given on the command line
+
+    :Parameters:
+        argv : list
+          Command line arguments, defaults to `sys.argv`
+
+    :return: Exit status
+    :rtype: number
+    '''
+    import optparse
+
+    parser = optparse.OptionParser(
+        usage='%prog [options] BEFORE AFTER',
+        description='Report per-type object count and size changes between '
+                    'two heap snapshots, and objects new in AFTER.')
+    parser.add_option('-n', '--types', type='int', default=30,
+                      help='number of types to report (default: %default)')
+    parser.add_option('-e', '--examples', type='int', default=3,
+                      help='number of new objects to list per type '
+                           '(default: %default)')
+
+    options, args = parser.parse_args((argv or sys.argv)[1:])
+    if len(args) != 2:
+        parser.error('two snapshots are required')
+
+    try:
+        before = Snapshot(args[0])
+    except (IOError, SnapshotError), exc:
+        sys.stderr.write('%s\n' % exc)
+        return 1
+
+    try:
+        after = Snapshot(args[1])
+    except (IOError, SnapshotError), exc:
+        before.close()
+        sys.stderr.write('%s\n' % exc)
+        return 1
+
+    rows = diffSnapshots(before, after, options.examples)
+
+    print '%d -> %d objects, %.0fs apart' % (len(before), len(after),
+                                              after.timestamp -
+                                              before.timestamp)
+    print
+    print '%12s %14s %10s %14s  %s' % ('count', 'size', 'new', 'new size',
+                                       'type')
+
+    for name, count, size, survivors, total, examples in \
+            rows[:options.types]:
+        print '%+12d %+14d %10d %14d  %s' % (count, size, survivors, total,
+                                             name.encode('utf-8'))
+        if examples:
+            print '%54s  new: %s' % ('', ', '.join('0x%x' % id_
+                                                   for id_ in examples))
+
+    before.close()
+    after.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
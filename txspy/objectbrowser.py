@@ -35,24 +35,45 @@ implementation.
 .. |copy| unicode:: 0xA9 .. copyright sign
 '''
 
+import re
+import os
 import gc
+import sys
 import cgi
+import math
 import time
+import heapq
+import random
+import urllib
+import array
+import bisect
 import types
+import zlib
 import base64
+import hashlib
+import weakref
 import operator
+import tempfile
 import itertools
 import collections
 
+from zope.interface import implements
+
 from twisted.application import service
-from twisted.internet import task
-from twisted.python import log
-from twisted.web import resource
+from twisted.internet import defer, task
+from twisted.python import failure, log
+from twisted.internet.interfaces import IPushProducer
+from twisted.web import http, resource, server
 from twisted.web.error import NoResource
 
-import pygooglechart
+try:
+    import json
+except ImportError:
+    # Python < 2.6
+    import simplejson as json
 
 import txspy
+from txspy import allocations, heapgraph, heapsnapshot, worker
 
 __author__ = txspy.__author__
 __license__ = txspy.__license__
@@ -60,6 +81,64 @@ __version__ = txspy.__version__
 
 __docformat__ = 'restructuredtext en'
 
+# Number of objects tallied per cooperative sampling iteration
+SAMPLE_CHUNK_SIZE = 1000
+# Weight of the latest sample in the moving average of sample costs
+SAMPLE_COST_SMOOTHING = 0.3
+# Kinds of series histories provide per type: raw counts, or bucket
+# minima, averages and maxima
+SERIES_COUNTS = 'counts'
+SERIES_RANGE = 'range'
+# Line colors of charts, by kind of series
+CHART_COLORS = {
+    SERIES_COUNTS: ('#4d89f9', ),
+    SERIES_RANGE: ('#a0c0f0', '#4d89f9', '#1a4fae'),
+}
+# Chart sizes (in pixels) of minigraphs on the index page, and larger graphs
+MINIGRAPH_SIZE = 300, 60
+GRAPH_SIZE = 700, 300
+# Maximum number of charts cached per history, between samples
+CHART_CACHE_SIZE = 4096
+# Default number of types shown per index page
+INDEX_PAGE_SIZE = 150
+# Keys by which the index can be sorted
+INDEX_SORT_KEYS = 'name', 'current', 'max', 'growth', 'trend', 'size',
+# Maximum number of distinct index pages cached between samples
+INDEX_CACHE_SIZE = 16
+# Default number of top movers streamed per sample
+STREAM_MOVERS = 20
+# Maximum number of events queued for a stream client not keeping up
+STREAM_BUFFER_SIZE = 16
+# Number of bytes written per batch when streaming responses
+PRODUCER_CHUNK_SIZE = 64 * 1024
+# Default number of instances, maximal depth and number of nodes, and time
+# budget (in seconds) of referrer walks
+REFERRER_INSTANCES = 3
+REFERRER_DEPTH = 8
+REFERRER_NODES = 300
+REFERRER_BUDGET = 0.1
+# Maximum number of items searched for the key or index of a reference
+REFERRER_EDGE_SEARCH = 1000
+# Number of types and objects listed on the top retainers page
+RETAINER_TYPES = 50
+RETAINER_OBJECTS = 25
+# Maximal number of analysis workers forked at once. Every worker ends up
+# copying most of the heap, as reference counts get written to.
+ANALYSIS_WORKERS = 1
+# Number of fastest growing types attributed to allocation sites per update
+ALLOCATION_TYPES = 5
+# Time (in seconds) clients may cache static files
+STATIC_MAX_AGE = 30 * 24 * 3600
+
+
+class AnalysisBusyError(Exception):
+    '''Raised when an analysis can't be started as others are running'''
+
+
+class ServiceStoppedError(Exception):
+    '''Raised when the service stops before a request could be served'''
+
+
 def _log(fun, self, args, kwargs):
     '''
     Helper function calling log function 'fun' with the 'system' kwarg set to
@@ -79,412 +158,3820 @@ def _log(fun, self, args, kwargs):
         kwargs = kwargs.copy()
         kwargs['system'] = service.IService(self).name or '-'
 
-    fun(*args, **kwargs)
+    fun(*args, **kwargs)
+
+
+class LoggedServiceMixin:
+    '''Mixin providing logging-related utility methods'''
+
+    msg = lambda self, *a, **k: _log(log.msg, self, a, k)
+    err = lambda self, *a, **k: _log(log.err, self, a, k)
+    debug = lambda self, *a, **k: None
+
+    # IService helpers
+    def startService(self):
+        '''Start the service'''
+        self.msg('Starting %s service "%s"' % \
+                 (self.__class__.__name__, self.name))
+
+    def stopService(self):
+        '''Stop the service'''
+        self.msg('Stopping %s service "%s"' % \
+                 (self.__class__.__name__, self.name))
+
+
+    def enableDebug(self):
+        '''Enable debugging output'''
+        self.debug = self.msg
+
+    def disableDebug(self):
+        '''Disable debugging output'''
+        self.debug = LoggedServiceMixin.debug
+
+
+def safeCall(fun, err=lambda exc: log.err(exc, 'safeCall failed')):
+    '''
+    Call a function, catching all exceptions, which are logged using 'err'
+
+    This function returns nothing.
+
+    :Parameters:
+        fun : callable
+          Function to execute
+        err : callable
+          Function to call if calling `fun` raises an `Exception`. The
+          `Exception` will be passed as single argument.
+    '''
+    try:
+        fun()
+    except Exception, exc:
+        err(exc)
+
+
+def timeBudget(budget):
+    '''Create a predicate telling whether a time budget got exhausted
+
+    This can be used as `terminationPredicateFactory` of a
+    `twisted.internet.task.Cooperator`.
+
+    :Parameters:
+        budget : number
+          Time budget (in seconds), starting now
+
+    :return: Callable returning `True` once `budget` seconds passed
+    :rtype: callable
+    '''
+    deadline = time.time() + budget
+
+    return lambda: time.time() >= deadline
+
+
+def timedIterator(iterator, timings):
+    '''Wrap an iterator, recording how long every step takes
+
+    :Parameters:
+        iterator : iterable
+          Iterator to wrap
+        timings : list
+          List to which the duration (in seconds) of every step is appended
+    '''
+    iterator = iter(iterator)
+
+    while True:
+        start = time.time()
+        try:
+            value = iterator.next()
+        finally:
+            timings.append(time.time() - start)
+
+        yield value
+
+
+def getTypeName(object_):
+    '''Get the full type name of an object
+
+    :Parameters:
+        `object\_` : object
+          Object of which to calculate the type
+
+    :return: Complete name of `object_`'s type
+    :rtype: str
+    '''
+    type_ = type(object_)
+
+    if type_ is types.InstanceType:
+        type_ = object_.__class__
+
+    return typeNames[type_]
+
+
+def formatTypeName(type_):
+    '''Get the full name of a type
+
+    :Parameters:
+        `type\_` : type
+          Type (or old-style class) to name
+
+    :return: Complete name of `type_`
+    :rtype: str
+    '''
+    return '%s.%s' % (type_.__module__, type_.__name__)
+
+
+class TypeNameCache(object):
+    '''Cache of full type names, indexed by type
+
+    Types are referenced weakly: entries are evicted as soon as the type they
+    describe is garbage collected, so dynamically created classes don't leak
+    through the cache. Note renaming a type after its name got cached isn't
+    reflected.
+    '''
+
+    __slots__ = '_names', '_format',
+
+    def __init__(self, format=formatTypeName):
+        '''
+        :Parameters:
+            format : callable
+              Function calculating the name of a type
+        '''
+        # Mapping of type IDs to (weak reference to type, name) tuples. Using
+        # IDs as keys avoids creating a weak reference on every lookup. IDs
+        # can't be reused before the eviction callback ran.
+        self._names = dict()
+        self._format = format
+
+    def __getitem__(self, type_):
+        '''Get the full name of a type
+
+        :Parameters:
+            `type\_` : type
+              Type (or old-style class) to name
+
+        :return: Complete name of `type_`
+        :rtype: str
+        '''
+        key = id(type_)
+        entry = self._names.get(key, None)
+
+        if entry is not None:
+            return entry[1]
+
+        name = self._format(type_)
+
+        try:
+            ref = weakref.ref(type_, lambda _: self._names.pop(key, None))
+        except TypeError:
+            # Not weakly referenceable, don't cache
+            return name
+
+        self._names[key] = ref, name
+
+        return name
+
+    def __len__(self):
+        ''''''
+        return len(self._names)
+    __len__.__doc__ = dict.__len__.__doc__
+
+    def clear(self):
+        '''Remove all entries from the cache'''
+        self._names.clear()
+
+typeNames = TypeNameCache()
+
+
+def countTypes(objects):
+    '''Count the number of objects of every type in an iterable
+
+    Objects are tallied by type object in a single pass, names are only
+    calculated once for every distinct type. Types sharing the same name are
+    merged in the result.
+
+    :Parameters:
+        objects : iterable
+          Objects to count
+
+    :return: Mapping of type names to object counts
+    :rtype: dict
+    '''
+    return nameTypeCounts(tallyTypes(objects, dict()))
+
+
+def iterTallyTypes(objects, typeCounts, chunkSize=None, typeSizes=None,
+                   stride=1, offset=0, reservoir=None):
+    '''Tally the types of a list of objects in chunks
+
+    This is a generator yielding after every chunk of objects, suitable to be
+    scheduled using a `twisted.internet.task.Cooperator`.
+
+    :Parameters:
+        objects : list
+          Objects to count
+        typeCounts : dict
+          Mapping of types to object counts to update
+        chunkSize : number
+          Number of objects to handle per iteration, defaults to
+          `SAMPLE_CHUNK_SIZE`
+        typeSizes : dict
+          If given, mapping of types to estimated sizes to update, see
+          `tallySizes`
+        stride : number
+          Measure the size of every `stride`-th object only
+        offset : number
+          Index of the first object to measure, below `stride`
+        reservoir : `InstanceReservoir`
+          If given, reservoir to add the objects to
+    '''
+    chunkSize = chunkSize or SAMPLE_CHUNK_SIZE
+
+    for start in xrange(0, len(objects), chunkSize):
+        end = start + chunkSize
+        tallyTypes(objects[start:end], typeCounts)
+
+        if typeSizes is not None:
+            # Keep measuring every stride-th object across chunks
+            first = start + (offset - start) % stride
+            tallySizes(objects[first:end:stride], typeSizes, stride)
+
+        if reservoir is not None:
+            reservoir.add(objects[start:end])
+
+        yield None
+
+
+def tallyTypes(objects, typeCounts):
+    '''Add the types of all objects in an iterable to a tally
+
+    Old-style instances are tallied by their class.
+
+    :Parameters:
+        objects : iterable
+          Objects to count
+        typeCounts : dict
+          Mapping of types to object counts to update
+
+    :return: `typeCounts`
+    :rtype: dict
+    '''
+    instanceType = types.InstanceType
+
+    get = typeCounts.get
+
+    for object_ in objects:
+        type_ = type(object_)
+
+        if type_ is instanceType:
+            type_ = object_.__class__
+
+        typeCounts[type_] = get(type_, 0) + 1
+
+    return typeCounts
+
+
+def tallySizes(objects, typeSizes, scale=1):
+    '''Add the shallow sizes of all objects in an iterable to a tally
+
+    Sizes are measured using `sys.getsizeof`, so objects referenced by the
+    objects aren't accounted for. Old-style instances are tallied by their
+    class.
+
+    :Parameters:
+        objects : iterable
+          Objects to measure
+        typeSizes : dict
+          Mapping of types to sizes (in bytes) to update
+        scale : number
+          Factor to multiply every size with, e.g. to extrapolate from a
+          fraction of the objects
+
+    :return: `typeSizes`
+    :rtype: dict
+    '''
+    instanceType = types.InstanceType
+
+    get = typeSizes.get
+    getsizeof = sys.getsizeof
+
+    for object_ in objects:
+        type_ = type(object_)
+
+        if type_ is instanceType:
+            type_ = object_.__class__
+
+        typeSizes[type_] = get(type_, 0) + getsizeof(object_, 0) * scale
+
+    return typeSizes
+
+
+def nameTypeCounts(typeCounts):
+    '''Turn a tally of types into a tally of type names
+
+    :Parameters:
+        typeCounts : dict
+          Mapping of types to object counts
+
+    :return: Mapping of type names to object counts
+    :rtype: dict
+    '''
+    counts = dict()
+    for type_, count in typeCounts.iteritems():
+        typeName = typeNames[type_]
+        counts[typeName] = counts.get(typeName, 0) + count
+
+    return counts
+
+
+class InstanceReservoir(object):
+    '''Random selection of the instances of some types
+
+    Objects are added while walking the heap, e.g. along with tallying a
+    sample, so picking instances doesn't cost a heap walk of its own. Every
+    instance of a type added has the same chance to be selected (reservoir
+    sampling), without knowing the number of instances up front.
+    '''
+
+    __slots__ = '_size', '_instances', '_seen', '_matches',
+
+    def __init__(self, typeNames_, size):
+        '''
+        :Parameters:
+            `typeNames\_` : iterable
+              Names of the types of which to select instances
+            size : number
+              Maximal number of instances to select per type
+        '''
+        self._size = size
+        # Mapping of type names to selected instances and to the number of
+        # instances added
+        self._instances = dict((typeName, []) for typeName in typeNames_)
+        self._seen = dict.fromkeys(self._instances, 0)
+        # Mapping of types to their name, or `None` if not selected from
+        self._matches = dict()
+
+    def add(self, objects):
+        '''Add objects, only instances of the selected types are considered
+
+        :Parameters:
+            objects : iterable
+              Objects to add
+        '''
+        instances = self._instances
+        seen = self._seen
+        matches = self._matches
+        size = self._size
+        instanceType = types.InstanceType
+        randrange = random.randrange
+
+        for object_ in objects:
+            type_ = type(object_)
+
+            if type_ is instanceType:
+                type_ = object_.__class__
+
+            typeName = matches.get(type_, False)
+
+            if typeName is False:
+                typeName = typeNames[type_]
+                if typeName not in instances:
+                    typeName = None
+                matches[type_] = typeName
+
+            if typeName is None:
+                continue
+
+            count = seen[typeName] = seen[typeName] + 1
+
+            if count <= size:
+                instances[typeName].append(object_)
+            else:
+                i = randrange(count)
+                if i < size:
+                    instances[typeName][i] = object_
+
+    def pick(self, typeName, count):
+        '''Pick instances of a type from the selection
+
+        :Parameters:
+            typeName : str
+              Name of the type
+            count : number
+              Maximal number of instances to pick
+
+        :return: Number of instances added, and a new list of at most
+                 `count` randomly picked instances
+        :rtype: tuple
+        '''
+        selected = self._instances[typeName]
+
+        return self._seen[typeName], \
+               random.sample(selected, min(count, len(selected)))
+
+    def clear(self):
+        '''Drop all selected instances, starting a new selection'''
+        for selected in self._instances.itervalues():
+            del selected[:]
+        self._seen = dict.fromkeys(self._instances, 0)
+        self._matches.clear()
+
+    typeNames = property(lambda self: self._instances.keys(),
+                         doc='Names of the types of which instances are '
+                             'selected')
+
+
+def formatSize(size):
+    '''Format a size in bytes using binary prefixes
+
+    :Parameters:
+        size : number
+          Size (in bytes)
+
+    :return: Human-readable size, e.g. ``'1.5 MiB'``
+    :rtype: str
+    '''
+    for unit in 'B', 'KiB', 'MiB', 'GiB':
+        if abs(size) < 1024 or unit == 'GiB':
+            break
+        size /= 1024.0
+
+    if unit == 'B':
+        return '%d B' % size
+
+    return '%.1f %s' % (size, unit)
+
+
+def humanTypeName(typeName):
+    '''Make a type name slightly more human-readable
+
+    :Parameters:
+        typeName : str
+          Full type name
+
+    :return: `typeName`, without module for built-in types
+    :rtype: str
+    '''
+    if typeName.startswith('__builtin__.'):
+        return typeName[len('__builtin__.'):]
+
+    return typeName
+
+
+def parseIndexQuery(args):
+    '''Parse the query arguments of the index page
+
+    Supported arguments are ``filter`` (type name prefix), ``regex`` (regular
+    expression searched in type names), ``sort`` (one of `INDEX_SORT_KEYS`),
+    ``limit`` (number of types per page) and ``page`` (page number, starting
+    at 0).
+
+    :Parameters:
+        args : dict
+          Request arguments, mapping names to lists of values
+
+    :return: Normalized (prefix, regex, sort, limit, page) tuple
+    :rtype: tuple
+
+    :raise ValueError: Invalid argument value
+    '''
+    get = lambda name, default: args.get(name, [default])[0] or default
+
+    prefix = get('filter', None)
+    regex = get('regex', None)
+    sort = get('sort', 'name')
+    limit = int(get('limit', INDEX_PAGE_SIZE))
+    page = int(get('page', 0))
+
+    if regex is not None:
+        try:
+            re.compile(regex)
+        except re.error, exc:
+            raise ValueError('Invalid regular expression: %s' % exc)
+    if sort not in INDEX_SORT_KEYS:
+        raise ValueError('Invalid sort key: %s' % sort)
+    if limit <= 0 or page < 0:
+        raise ValueError('Invalid limit or page')
+
+    return prefix, regex, sort, limit, page
+
+
+def matchTypes(typeNames, prefix=None, regex=None):
+    '''Filter type names
+
+    :Parameters:
+        typeNames : iterable
+          Type names to filter
+        prefix : str
+          Prefix of the full or human-readable type names to keep
+        regex : str
+          Regular expression to search in the type names to keep
+
+    :return: Matching type names
+    :rtype: iterable
+    '''
+    if prefix is not None:
+        typeNames = (typeName for typeName in typeNames
+                     if typeName.startswith(prefix) or
+                        humanTypeName(typeName).startswith(prefix))
+    if regex is not None:
+        search = re.compile(regex).search
+        typeNames = (typeName for typeName in typeNames if search(typeName))
+
+    return typeNames
+
+
+def renderChart(series, kind, width, height, size, maxValue):
+    '''Render a line chart as SVG
+
+    Series shorter than `size` are drawn from the left, leaving room for
+    samples yet to come.
+
+    :Parameters:
+        series : list of sequences
+          Series of numbers to plot, all of the same length
+        kind : str
+          Kind of the series, `SERIES_COUNTS` or `SERIES_RANGE`
+        width : number
+          Width of the chart (in pixels)
+        height : number
+          Height of the chart (in pixels)
+        size : number
+          Number of samples spanning the full width of the chart
+        maxValue : number
+          Value at the top of the chart
+
+    :return: SVG document
+    :rtype: str
+    '''
+    xScale = float(width - 1) / max(size - 1, 1)
+    yScale = float(height - 1) / max(maxValue, 1)
+
+    parts = ['''<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" version="1.1" width="%d" height="%d"
+     viewBox="0 0 %d %d">
+<rect width="100%%" height="100%%" fill="#fff" stroke="#ddd" />''' % \
+                 (width, height, width, height)]
+
+    for samples, color in zip(series, CHART_COLORS[kind]):
+        points = ' '.join('%.1f,%.1f' % (i * xScale, (height - 1) - v * yScale)
+                          for i, v in enumerate(samples))
+        parts.append('<polyline fill="none" stroke="%s" points="%s" />' % \
+                     (color, points))
+
+    parts.append('''<text x="2" y="10" font-family="sans-serif" font-size="9"
+      fill="#666">%d</text>
+</svg>''' % maxValue)
+
+    return '\n'.join(parts)
+
+
+def downsample(samples, points, reduce_=max):
+    '''Reduce a series to a maximum number of points
+
+    The series is split in `points` consecutive buckets of (nearly) equal
+    size, which are reduced to a single value each.
+
+    :Parameters:
+        samples : sequence
+          Series to downsample
+        points : number
+          Maximum number of points to return, or `None` not to downsample
+        `reduce\_` : callable
+          Function reducing a bucket of samples to a single value
+
+    :return: Downsampled series
+    :rtype: sequence
+    '''
+    length = len(samples)
+
+    if points is None or length <= points:
+        return samples
+
+    return [reduce_(samples[i * length // points:(i + 1) * length // points])
+            for i in xrange(points)]
+
+
+average = lambda samples: sum(samples) / len(samples)
+average.__doc__ = '''
+Calculate the (integer) average of a non-empty sequence of numbers
+
+:Parameters:
+    samples : sequence
+      Numbers to average
+
+:return: Average of `samples`
+:rtype: number
+'''
+
+# Bucket reduction functions used when downsampling series, by kind of
+# series
+DOWNSAMPLERS = {
+    SERIES_COUNTS: (max, ),
+    SERIES_RANGE: (min, average, max),
+}
+
+
+def walkReferrers(objects, maxDepth, maxNodes, budget):
+    '''Walk the referrers of objects breadth-first, towards the modules
+
+    Every level of the walk costs a single `gc.get_referrers` scan of the
+    heap, the referrers are matched with the objects they refer to using
+    `gc.get_referents`. Modules and module globals are roots, their referrers
+    aren't followed. The walk stops once `maxDepth` levels are walked,
+    `maxNodes` objects are found or `budget` seconds passed, whichever comes
+    first.
+
+    A scan can't be interrupted, so the next level isn't walked unless the
+    previous scan would fit in the remaining budget. The first level is
+    always walked.
+
+    Every object is listed once, under the first object it was found to
+    refer to. Only objects tracked by the garbage collector are found.
+
+    :Parameters:
+        objects : list
+          Objects to start from
+        maxDepth : number
+          Maximal number of levels to walk
+        maxNodes : number
+          Maximal number of objects to list, including `objects`
+        budget : number
+          Time budget (in seconds)
+
+    :return: (parent index, description, reference, root) tuples in
+             breadth-first order, the entries of `objects` coming first
+             without parent, and whether the walk was cut short
+    :rtype: tuple
+    '''
+    deadline = time.time() + budget
+
+    modules = dict()
+    for module in sys.modules.values():
+        if module is not None:
+            modules[id(module)] = module.__name__
+            modules[id(getattr(module, '__dict__', None))] = module.__name__
+    modules.pop(id(None), None)
+
+    nodes = [(None, describeObject(object_, modules), None, False)
+             for object_ in objects]
+    seen = dict((id(object_), i) for i, object_ in enumerate(objects))
+
+    frontier = list(objects)
+    indices = range(len(objects))
+    cut = False
+    # Time (in seconds) the latest heap scan took
+    scanCost = 0.0
+
+    for _ in xrange(maxDepth):
+        if not frontier:
+            break
+        if time.time() + scanCost > deadline:
+            cut = True
+            break
+
+        nextFrontier, nextIndices = [], []
+        # Objects of the walk itself refer to the frontier as well
+        ignore = set(map(id, (objects, frontier, nextFrontier, indices,
+                              sys._getframe())))
+        positions = dict((id(object_), i) for i, object_ in
+                         enumerate(frontier))
+
+        scanStart = time.time()
+        referrers = gc.get_referrers(*frontier)
+        scanCost = time.time() - scanStart
+        ignore.add(id(referrers))
+
+        for referrer in referrers:
+            if id(referrer) in ignore or id(referrer) in seen:
+                continue
+            if type(referrer) is tuple and len(referrer) == len(frontier) \
+               and all(itertools.imap(operator.is_, referrer, frontier)):
+                # Arguments of the get_referrers call
+                continue
+
+            for referent in gc.get_referents(referrer):
+                position = positions.get(id(referent), None)
+                if position is not None:
+                    break
+            else:
+                continue
+
+            if len(nodes) >= maxNodes or time.time() > deadline:
+                cut = True
+                break
+
+            root = id(referrer) in modules
+            seen[id(referrer)] = len(nodes)
+            nodes.append((indices[position],
+                          describeObject(referrer, modules),
+                          describeReference(referrer, frontier[position]),
+                          root))
+
+            if not root:
+                nextFrontier.append(referrer)
+                nextIndices.append(len(nodes) - 1)
+
+        del referrers
+
+        if cut:
+            break
+
+        frontier, indices = nextFrontier, nextIndices
+    else:
+        cut = bool(frontier)
+
+    return nodes, cut
+
+
+def describeObject(object_, modules=None):
+    '''Describe an object briefly, without calling its `repr`
+
+    :Parameters:
+        `object\_` : object
+          Object to describe
+        modules : dict
+          Mapping of IDs of modules and module dictionaries to module names
+
+    :return: Description
+    :rtype: str
+    '''
+    module = (modules or {}).get(id(object_), None)
+
+    if module is not None:
+        if isinstance(object_, types.ModuleType):
+            return 'module %s' % module
+        return 'globals of module %s' % module
+
+    if isinstance(object_, (type, types.ClassType)):
+        return 'class %s' % typeNames[object_]
+    if isinstance(object_, (types.FunctionType, types.MethodType)):
+        return '%s %s' % (type(object_).__name__, object_.__name__)
+    if isinstance(object_, types.FrameType):
+        code = object_.f_code
+        return 'frame of %s (%s:%d)' % (code.co_name, code.co_filename,
+                                        object_.f_lineno)
+
+    description = '%s at 0x%x' % (getTypeName(object_), id(object_))
+
+    if isinstance(object_, (dict, list, tuple, set, frozenset)):
+        description += ', %d items' % len(object_)
+
+    return description
+
+
+def describeReference(referrer, referent):
+    '''Describe how an object refers to another one
+
+    :Parameters:
+        referrer : object
+          Referring object
+        referent : object
+          Object referred to
+
+    :return: Key, index or attribute name, or `None` if unknown
+    :rtype: str
+    '''
+    if isinstance(referrer, dict):
+        items = itertools.islice(referrer.iteritems(), REFERRER_EDGE_SEARCH)
+        for key, value in items:
+            if value is referent:
+                return '[%s]' % cgi.escape(safeRepr(key))
+            if key is referent:
+                return 'key'
+    elif isinstance(referrer, (list, tuple)):
+        items = itertools.islice(referrer, REFERRER_EDGE_SEARCH)
+        for i, value in enumerate(items):
+            if value is referent:
+                return '[%d]' % i
+    elif isinstance(referent, dict):
+        try:
+            if getattr(referrer, '__dict__', None) is referent:
+                return '__dict__'
+        except Exception:
+            # Custom attribute lookup failing
+            pass
+
+    return None
+
+
+def safeRepr(object_, maxLength=40):
+    '''Get a shortened `repr` of strings and numbers, or a description of
+    other objects
+
+    :Parameters:
+        `object\_` : object
+          Object to represent
+        maxLength : number
+          Maximal length of the representation
+
+    :return: Representation
+    :rtype: str
+    '''
+    if isinstance(object_, (basestring, int, long, float)):
+        representation = repr(object_)
+    else:
+        representation = describeObject(object_)
+
+    if len(representation) > maxLength:
+        representation = representation[:maxLength - 3] + '...'
+
+    return representation
+
+
+class Template(object):
+    '''A simple template, with ``{ key }`` placeholders
+
+    The template is parsed once. Rendering yields the literal parts and the
+    placeholder values in order, so large values are never copied into an
+    intermediate string.
+    '''
+
+    __slots__ = '_parts',
+
+    PLACEHOLDER = re.compile(r'\{ (\w+) \}')
+
+    def __init__(self, template):
+        '''
+        :Parameters:
+            template : str
+              Template string
+        '''
+        # Literal parts and placeholder keys alternate, starting with a
+        # literal
+        self._parts = tuple(self.PLACEHOLDER.split(template))
+
+    def iterRender(self, values):
+        '''Render the template, part by part
+
+        Placeholders without value are left as-is.
+
+        :Parameters:
+            values : dict
+              Key/value pairs to fill placeholders. Values are strings, or
+              iterables of strings which are yielded in order.
+
+        :return: Iterator of strings making up the rendered template
+        :rtype: iterable
+        '''
+        parts = self._parts
+
+        for i in xrange(0, len(parts) - 1, 2):
+            if parts[i]:
+                yield parts[i]
+
+            key = parts[i + 1]
+            value = values.get(key, None)
+
+            if value is None:
+                yield '{ %s }' % key
+            elif isinstance(value, basestring):
+                yield value
+            else:
+                for part in value:
+                    yield part
+
+        if parts[-1]:
+            yield parts[-1]
+
+    def render(self, values):
+        '''Render the template
+
+        :Parameters:
+            values : dict
+              Key/value pairs to fill placeholders, see `iterRender`
+
+        :return: Rendered template
+        :rtype: str
+        '''
+        return ''.join(self.iterRender(values))
+
+
+class ObjectBrowser(object, service.Service, resource.Resource,
+                    LoggedServiceMixin):
+    '''Object browser service'''
+
+    __slots__ = '_sampleInterval', '_sampleHistorySize', '_loop', '_history', \
+                   '_sliceBudget', '_cooperator', '_collectionPolicy', \
+                   '_sampleCount', '_targetOverhead', '_minSampleInterval', \
+                   '_maxSampleInterval', '_sampleCost', '_rollupSpecs', \
+                   '_rollups', '_chartCache', '_startTime', '_indexPages', \
+                   '_stream', '_sizeFraction', '_sizeHistory', \
+                   '_forkAnalyses', '_workers', '_snapshotDirectory', \
+                   '_traceAllocations', '_traceMemoryLimit', '_allocations', \
+                   '_instanceRequests',
+    
+    def __init__(self, sampleInterval, sampleHistorySize, sliceBudget=None,
+                 collectionPolicy=None, targetOverhead=None,
+                 minSampleInterval=None, maxSampleInterval=None,
+                 rollups=(), sizeFraction=None, forkAnalyses=False,
+                 snapshotDirectory=None, traceAllocations=None,
+                 traceMemoryLimit=allocations.TRACE_MEMORY_LIMIT):
+        '''
+        :Parameters:
+            sampleInterval : number
+              Interval (in seconds) object count samples should be taken
+            sampleHistorySize : number
+              Number of samples to keep track of
+            sliceBudget : number
+              If set, walk the heap cooperatively, spending at most this many
+              seconds per reactor iteration. If `None`, every sample is
+              taken in one go.
+            collectionPolicy : `CollectionPolicy`
+              Policy deciding which garbage collection to run before taking
+              a sample, defaults to a full collection before every sample
+            targetOverhead : number
+              If set, adapt the sample interval so sampling takes at most
+              this fraction of wall time (e.g. 0.01 for 1%). If `None`,
+              `sampleInterval` is used for good.
+            minSampleInterval : number
+              Lower bound of the adaptive sample interval, defaults to
+              `sampleInterval`
+            maxSampleInterval : number
+              Upper bound of the adaptive sample interval, defaults to 60
+              times `sampleInterval`
+            rollups : iterable
+              Downsampled history tiers to keep next to the raw samples, as
+              (bucket size, retention) tuples in seconds, e.g.
+              ``((60, 86400), (3600, 30 * 86400))``
+            sizeFraction : number
+              If set, also keep track of the shallow size of the objects of
+              every type (as reported by `sys.getsizeof`), measuring this
+              fraction of the objects (e.g. 0.1 for every 10th object) and
+              extrapolating. If `None`, sizes aren't accounted for.
+            forkAnalyses : bool
+              Run on-demand heap analyses (referrer walks, retained sizes,
+              snapshots) in a forked copy of the process, so they don't
+              block the reactor. Samples are still taken in this process:
+              they pick the instances these analyses and allocation tracing
+              start from, which a child can't hand back. Use `sliceBudget`
+              to keep them from blocking the reactor. Requires `os.fork`.
+            snapshotDirectory : str
+              If set, heap snapshots (see `heapsnapshot`) can be written to
+              this directory through the ``snapshot`` resource
+            traceAllocations : number
+              If set, trace allocations using `tracemalloc`, storing this
+              many frames per traceback, and attribute the types growing
+              fastest to their allocation sites every few samples (see
+              `allocations.AllocationTracker`). Requires `tracemalloc`, or
+              pytracemalloc on Python 2.
+            traceMemoryLimit : number
+              Memory (in bytes) `tracemalloc` and the snapshot kept may use
+              before tracing is stopped
+        '''
+        if collectionPolicy is None:
+            collectionPolicy = CollectGeneration(2)
+        if minSampleInterval is None:
+            minSampleInterval = sampleInterval
+        if maxSampleInterval is None:
+            maxSampleInterval = 60 * sampleInterval
+
+        assert minSampleInterval <= maxSampleInterval
+        assert sizeFraction is None or 0 < sizeFraction <= 1
+        assert not forkAnalyses or worker.canFork()
+        assert not traceAllocations or allocations.available()
+
+        self.msg('Initializing %s(%d, %d, %r, %r)' % \
+                 (self.__class__.__name__, sampleInterval, sampleHistorySize,
+                  sliceBudget, collectionPolicy))
+
+        resource.Resource.__init__(self)
+        self.putChild('style', CSSResource())
+        self.putChild('script', ScriptResource())
+        self.putChild('image', ImageResource())
+        self.putChild('graphs', GraphResource(self))
+        self.putChild('charts', ChartResource(self))
+        self.putChild('history', HistoryResource(self))
+        self.putChild('suspects', SuspectsResource(self))
+        self.putChild('referrers', ReferrerResource(self))
+        self.putChild('retainers', RetainerResource(self))
+        self.putChild('types', TypeResource(self))
+        if snapshotDirectory is not None:
+            self.putChild('snapshot', SnapshotResource(self))
+        self._stream = StreamResource()
+        self.putChild('stream', self._stream)
+
+        self._sampleInterval = sampleInterval
+        self._sampleHistorySize = sampleHistorySize
+        self._sliceBudget = sliceBudget
+        self._collectionPolicy = collectionPolicy
+        self._targetOverhead = targetOverhead
+        self._minSampleInterval = minSampleInterval
+        self._maxSampleInterval = maxSampleInterval
+        self._rollupSpecs = tuple(sorted(rollups))
+        self._sizeFraction = sizeFraction
+        self._forkAnalyses = forkAnalyses
+        # Number of analysis workers running
+        self._workers = 0
+        self._snapshotDirectory = snapshotDirectory
+        self._traceAllocations = traceAllocations
+        self._traceMemoryLimit = traceMemoryLimit
+
+        # The loop waits for cooperative samples to complete before
+        # scheduling the next one
+        self._loop = task.LoopingCall(
+            lambda: defer.maybeDeferred(self.updateStats).addErrback(
+                self._sampleFailed))
+
+        self._history = None
+        self._sizeHistory = None
+        self._rollups = None
+        self._allocations = None
+        self._sampleCount = 0
+        self._sampleCost = None
+        self._cooperator = None
+        self._chartCache = ChartCache()
+        self._startTime = None
+        self._indexPages = dict()
+        # (type name, number of instances, `Deferred`) tuples of requests to
+        # pick instances during the next sample
+        self._instanceRequests = []
+
+    # IService
+    def startService(self):
+        '''Start the service'''
+        LoggedServiceMixin.startService(self)
+
+        self._history = SampleHistory(self.sampleHistorySize)
+        if self.sizeFraction is not None:
+            self._sizeHistory = SampleHistory(self.sampleHistorySize)
+        if self.traceAllocations:
+            self._allocations = allocations.AllocationTracker(
+                self.traceAllocations, self._traceMemoryLimit)
+            self._allocations.start()
+        self._rollups = [RollupHistory(bucketSize,
+                                       max(int(retention // bucketSize), 2))
+                         for bucketSize, retention in self._rollupSpecs]
+        self._sampleCount = 0
+        self._sampleCost = None
+        self._startTime = time.time()
+        self._indexPages.clear()
+
+        if self.sliceBudget is not None:
+            self._cooperator = task.Cooperator(
+                terminationPredicateFactory=
+                    lambda: timeBudget(self.sliceBudget))
+
+        self.loop.start(self.sampleInterval)
+
+        return service.Service.startService(self)
+
+    def stopService(self):
+        '''Stop the service'''
+        self.loop.stop()
+
+        # Abort any sample in progress
+        if self._cooperator is not None:
+            self._cooperator.stop()
+            self._cooperator = None
+
+        if self._allocations is not None:
+            self._allocations.stop()
+
+        self._history = None
+        self._sizeHistory = None
+        self._rollups = None
+        self._allocations = None
+        self._chartCache.clear()
+        self._indexPages.clear()
+        self._stream.closeAll()
+
+        requests, self._instanceRequests = self._instanceRequests, []
+        self._failInstanceRequests(failure.Failure(ServiceStoppedError(
+            'Service stopped before taking a sample')), requests)
+
+        LoggedServiceMixin.stopService(self)
+        
+        return service.Service.stopService(self)
+
+
+    # IResource
+    def getChild(self, name, request):
+        if name == '':
+            return self
+
+        return resource.Resource.getChild(self, name, request)
+
+    def render_GET(self, request):
+        '''Render the heap usage statistics index
+
+        See `parseIndexQuery` for the supported query arguments.
+        '''
+        try:
+            query = parseIndexQuery(request.args)
+        except ValueError, exc:
+            request.setResponseCode(http.BAD_REQUEST)
+            request.setHeader('Content-Type', 'text/plain')
+            return str(exc)
+
+        return self.renderCached(request, query, self.renderIndex)
+
+    def renderCached(self, request, query, render):
+        '''Render a page derived from the samples, or get it from the cache
+
+        The page only changes when a sample is taken, so it's cached until
+        then, and conditional requests are answered with ``304 Not
+        Modified``.
+
+        :Parameters:
+            request : `twisted.web.server.Request`
+              Request to render the page for
+            query : tuple
+              Hashable description of the page
+            render : callable
+              Function rendering the page given `query`, returning a list of
+              parts
+
+        :return: Response body, or `NOT_DONE_YET`
+        :rtype: str
+        '''
+        # Make clients revalidate every time
+        request.setHeader('Cache-Control', 'no-cache')
+
+        if request.getHeader('If-None-Match') is None:
+            cached = request.setLastModified(self.lastModified)
+        else:
+            # The entity tag takes precedence, as modification times only
+            # have a resolution of a second
+            request.setHeader('Last-Modified', http.datetimeToString(
+                math.ceil(self.lastModified)))
+            cached = None
+
+        if request.setETag(self.etag) is http.CACHED or cached is http.CACHED:
+            return ''
+
+        parts = self._indexPages.get(query, None)
+
+        if parts is None:
+            if len(self._indexPages) >= INDEX_CACHE_SIZE:
+                self._indexPages.clear()
+
+            parts = render(query)
+            self._indexPages[query] = parts
+
+        request.setHeader('Content-Length', str(sum(map(len, parts))))
+        ResponseProducer(request, parts).start()
+
+        return server.NOT_DONE_YET
+
+    def selectTypes(self, query):
+        '''Select the types to show on a page of the index
+
+        Types are filtered and sorted using the aggregates maintained by the
+        history, so no series are read.
+
+        :Parameters:
+            query : tuple
+              Query, as returned by `parseIndexQuery`
+
+        :return: Names of the types on the requested page, and the number of
+                 types matching the query
+        :rtype: tuple
+        '''
+        prefix, regex, sort, limit, page = query
+        history = self.history
+
+        typeNames = list(matchTypes(history, prefix, regex))
+        end = (page + 1) * limit
+
+        if sort == 'name':
+            selected = sorted(typeNames, key=humanTypeName)[end - limit:end]
+        else:
+            key = {
+                'current': history.current,
+                'max': history.max,
+                'growth': lambda typeName: history.current(typeName) - \
+                                               history.first(typeName),
+                'trend': self.suspicion,
+                'size': self.currentSize,
+            }[sort]
+            selected = heapq.nlargest(end, typeNames, key=key)[end - limit:]
+
+        return selected, len(typeNames)
+
+    def currentSize(self, typeName):
+        '''Get the estimated size of the objects of a type in the latest
+        sample, or 0 if sizes aren't accounted for'''
+        sizes = self.sizeHistory
+
+        if sizes is None or typeName not in sizes:
+            return 0
+
+        return sizes.current(typeName)
+
+    def suspicion(self, typeName):
+        '''Score how much a type looks like it's leaking
+
+        The score is the slope of the trend of the type, weighted by how well
+        the trend fits the samples, so steady growth ranks above noisy
+        fluctuations. Types which aren't growing score 0.
+
+        :Parameters:
+            typeName : str
+              Name of the type
+
+        :return: Score
+        :rtype: float
+        '''
+        slope, fit = self.history.trend(typeName)
+
+        return max(slope * fit, 0.0)
+
+    def renderSuspects(self, query):
+        '''Render a page of types ranked by sustained growth
+
+        :Parameters:
+            query : tuple
+              Query, as returned by `parseIndexQuery` with sort key ``trend``,
+              prefixed with ``'suspects'``
+
+        :return: Parts making up the page
+        :rtype: list of str
+        '''
+        typeNames = self.selectTypes(query[1:])[0]
+        history = self.history
+
+        def genRows():
+            for typeName in typeNames:
+                slope, fit = history.trend(typeName)
+
+                if slope * fit <= 0:
+                    # Ranked by score, none of the following types grow
+                    break
+
+                yield '''
+<tr>
+    <td><a href="graphs/%(uriTypeName)s" class="lightbox"
+           title="%(typeName)s">%(humanTypeName)s</a>
+        <a href="types/%(uriTypeName)s" class="quiet">details</a></td>
+    <td>%(slope).2f</td>
+    <td>%(fit).2f</td>
+    <td>%(streak)d</td>
+    <td>%(first)d</td>
+    <td>%(current)d</td>
+</tr>''' % {
+    'typeName': typeName,
+    'humanTypeName': humanTypeName(typeName),
+    'uriTypeName': cgi.escape(typeName),
+    'slope': slope,
+    'fit': fit,
+    'streak': history.streak(typeName),
+    'first': history.first(typeName),
+    'current': history.current(typeName),
+}
+
+        header = '''
+<div class="span-24 last">
+    <h1>Leak Suspects</h1>
+    <p>Types ranked by sustained growth over the last %d samples. Growth is
+    the slope of a least-squares fit through the object counts, fit is its
+    coefficient of determination, streak the number of consecutive samples
+    in which the count grew.</p>
+    <p><a href="./">&laquo; All types</a></p>
+</div>
+<div class="span-24 last">
+<table>
+<tr>
+    <th>Type</th><th>Growth (objects / sample)</th><th>Fit</th>
+    <th>Streak</th><th>First</th><th>Current</th>
+</tr>''' % history.numSamples
+
+        return list(BASE_TEMPLATE.iterRender({
+            'title': 'Leak Suspects',
+            'root': '',
+            'body': itertools.chain([header], genRows(),
+                                    ['\n</table>\n</div>']),
+        }))
+
+    def renderIndex(self, query):
+        '''Render a heap usage statistics index page
+
+        :Parameters:
+            query : tuple
+              Query, as returned by `parseIndexQuery`
+
+        :return: Parts making up the page
+        :rtype: list of str
+        '''
+        prefix, regex, sort, limit, page = query
+        history, total = self.selectTypes(query)
+
+        def pageLink(page_, label):
+            args = dict(filter=prefix or '', regex=regex or '', sort=sort,
+                        limit=limit, page=page_)
+            return '<a href="?%s">%s</a>' % \
+                       (cgi.escape(urllib.urlencode(sorted(args.items()))),
+                        label)
+
+        def genNavigation():
+            yield '''
+<div class="span-24 last">
+<form method="get" action="">
+    <input type="text" name="filter" value="%s" title="Type name prefix" />
+    <input type="text" name="regex" value="%s" title="Regular expression" />
+    <select name="sort">%s</select>
+    <input type="text" name="limit" value="%d" size="4" title="Limit" />
+    <input type="submit" value="Show" />
+</form>
+<p>''' % (
+    cgi.escape(prefix or '', True), cgi.escape(regex or '', True),
+    ''.join('<option%s>%s</option>' % \
+                (' selected="selected"' if key == sort else '', key)
+            for key in INDEX_SORT_KEYS),
+    limit)
+
+            # Pages past the end stay valid, types may come back later on
+            if history:
+                yield 'Showing %d-%d of %d types.' % \
+                          (page * limit + 1, page * limit + len(history),
+                           total)
+            elif total:
+                yield 'No types on this page, %d types in total.' % total
+            else:
+                yield 'No types match.'
+
+            if page > 0:
+                # From past the end straight to the last page
+                lastPage = max(total - 1, 0) // limit
+                yield '\n' + pageLink(min(page - 1, lastPage),
+                                      '&laquo; Previous')
+            if (page + 1) * limit < total:
+                yield '\n' + pageLink(page + 1, 'Next &raquo;')
+
+            yield '</p>\n</div>'
+
+        sizes = self.sizeHistory
+
+        def genSize(typeName):
+            if sizes is None:
+                return ''
+
+            return ''',
+    <a href="graphs/%s?metric=size" class="lightbox"
+       title="%s (size)">%s</a>''' % (cgi.escape(typeName),
+                                      cgi.escape(typeName),
+                                      formatSize(self.currentSize(typeName)))
+
+        def genContent():
+            hr = humanTypeName
+
+            # Some trickery to get everything in 3 columns
+            for i in xrange(3):
+                if i < 2:
+                    yield '<div class="span-8">'
+                else:
+                    yield '<div class="span-8 last">'
+
+                for typeName in history[i::3]:
+                    yield '''
+<div class="minigraph">
+    <strong>%(humanTypeName)s:</strong> %(min)d / %(max)d / %(current)d%(size)s
+    <a href="types/%(uriTypeName)s" class="quiet">details</a>
+    <div>
+    <a href="graphs/%(uriTypeName)s" class="lightbox" title="%(typeName)s">
+        <img src="charts/%(uriTypeName)s" width="%(width)d"
+             height="%(height)d" alt="" />
+    </a>
+    </div>
+</div>''' % {
+    'typeName': typeName,
+    'humanTypeName': hr(typeName),
+    'uriTypeName': cgi.escape(typeName),
+    'min': self.history.min(typeName),
+    'max': self.history.max(typeName),
+    'current': self.history.current(typeName),
+    'size': genSize(typeName),
+    'width': MINIGRAPH_SIZE[0],
+    'height': MINIGRAPH_SIZE[1],
+}
+                yield '</div>'
+
+        header = '''
+<div class="span-24 last">
+    <h1>Heap Usage Statistics</h1>
+    <p>Object counts are min / max / current%s.
+    <a href="suspects">Leak suspects &raquo;</a>
+    <a href="retainers">Top retainers &raquo;</a>%s</p>
+    <p class="quiet">Garbage collection policy: %s<br />
+    Sample interval: %.2fs, sample cost: %s</p>
+</div>
+''' % (', followed by the current size' if sizes is not None else '',
+       '\n    <a href="snapshot">Heap snapshot &raquo;</a>' \
+           if self.snapshotDirectory is not None else '',
+       cgi.escape(str(self.collectionPolicy)),
+       self.effectiveSampleInterval,
+       '%.1fms' % (self.sampleCost * 1000) \
+           if self.sampleCost is not None else 'n/a')
+
+        return list(BASE_TEMPLATE.iterRender({
+            'title': 'Heap Usage Statistics',
+            'root': '',
+            'body': itertools.chain([header], genNavigation(), genContent()),
+        }))
+
+
+    def updateStats(self):
+        '''Update object count statistics
+
+        When sampling cooperatively, the heap is snapshotted first and walked
+        in chunks afterwards. The snapshot keeps all objects alive until the
+        walk is complete, so the resulting counts are consistent.
+
+        Instances requested using `pickInstances`, and those attributed to
+        their allocation sites if tracing allocations, are picked along the
+        way.
+
+        :return: `Deferred` firing once the sample is recorded if sampling
+                 cooperatively, `None` otherwise
+        :rtype: `twisted.internet.defer.Deferred`
+        '''
+        self.debug('Updating object stats')
+
+        start = time.time()
+
+        generation = self.collectionPolicy.select(self._sampleCount)
+
+        if generation is not None:
+            gc.collect(generation)
+
+        timestamp = time.time()
+        objects = gc.get_objects()
+
+        requests, self._instanceRequests = self._instanceRequests, []
+        traced = self.tracedTypes()
+        reservoir = None
+        if requests or traced:
+            counts = [count for _, count, _ in requests]
+            if traced:
+                counts.append(self._allocations.numInstances)
+            reservoir = InstanceReservoir(
+                set(typeName for typeName, _, _ in requests) | set(traced),
+                max(counts))
+
+        typeSizes, stride, offset = None, 1, 0
+        if self.sizeFraction is not None:
+            typeSizes = dict()
+            stride = max(int(round(1 / self.sizeFraction)), 1)
+            # Measure other objects every sample
+            offset = random.randrange(stride)
+
+        if self._cooperator is None:
+            sizes = None
+            if typeSizes is not None:
+                sizes = nameTypeCounts(tallySizes(objects[offset::stride],
+                                                  typeSizes, stride))
+            if reservoir is not None:
+                reservoir.add(objects)
+
+            self.recordSample(countTypes(objects), timestamp, generation,
+                              sizes)
+            self.adjustSampleInterval(time.time() - start)
+
+            # The list of objects includes the frame of this call, which
+            # would keep the list alive and show up as referrer of the picked
+            # instances
+            del objects
+
+            if reservoir is not None:
+                self.attributeAllocations(reservoir, traced)
+                self._deliverInstances(requests, reservoir)
+            return None
+
+        # Only account for time actually spent sampling, not for the time
+        # the reactor spends elsewhere in between slices
+        timings = [time.time() - start]
+        typeCounts = dict()
+
+        def record(_):
+            recordStart = time.time()
+            self.recordSample(nameTypeCounts(typeCounts), timestamp,
+                              generation,
+                              nameTypeCounts(typeSizes) \
+                                  if typeSizes is not None else None)
+            self.adjustSampleInterval(
+                sum(timings) + time.time() - recordStart)
+
+            if reservoir is not None:
+                self.attributeAllocations(reservoir, traced)
+                self._deliverInstances(requests, reservoir)
+
+        def abort(failure_):
+            self._failInstanceRequests(failure_, requests)
+            return failure_
+
+        d = self._cooperator.coiterate(
+            timedIterator(iterTallyTypes(objects, typeCounts,
+                                         typeSizes=typeSizes, stride=stride,
+                                         offset=offset, reservoir=reservoir),
+                          timings))
+        # Only the walk should keep the list of objects alive, see above
+        del objects
+        d.addCallbacks(record, abort)
+
+        return d
+
+    def pickInstances(self, typeName, count):
+        '''Pick random instances of a type while taking the next sample
+
+        :Parameters:
+            typeName : str
+              Name of the type
+            count : number
+              Maximal number of instances to pick
+
+        :return: `Deferred` firing with the number of instances found and a
+                 list of at most `count` of them, once the next sample is
+                 taken, or failing with `ServiceStoppedError`
+        :rtype: `twisted.internet.defer.Deferred`
+        '''
+        d = defer.Deferred()
+        self._instanceRequests.append((typeName, count, d))
+
+        return d
+
+    def _deliverInstances(self, requests, reservoir):
+        '''Hand the instances picked during a sample to their requesters'''
+        results = [(reservoir.pick(typeName, count), d)
+                   for typeName, count, d in requests]
+        # Requesters should hold the only references to the instances
+        reservoir.clear()
+
+        for result, d in results:
+            d.callback(result)
+
+    def _failInstanceRequests(self, failure_, requests):
+        '''Fail requests to pick instances'''
+        for _, _, d in requests:
+            d.errback(failure_)
+
+    def adjustSampleInterval(self, cost):
+        '''Account for the cost of a sample, adapting the sample interval
+
+        The interval is only adapted if a target overhead is set. It is
+        calculated from a moving average of sample costs, bounded by the
+        minimum and maximum sample interval.
+
+        :Parameters:
+            cost : number
+              Time (in seconds) it took to take the last sample
+        '''
+        if self._sampleCost is None:
+            self._sampleCost = cost
+        else:
+            self._sampleCost += SAMPLE_COST_SMOOTHING * \
+                                    (cost - self._sampleCost)
+
+        if self.targetOverhead is None or self._history is None:
+            return
+
+        interval = min(max(self._sampleCost / self.targetOverhead,
+                           self.minSampleInterval),
+                       self.maxSampleInterval)
+
+        if interval != self.loop.interval:
+            self.debug('Adapting sample interval from %.3fs to %.3fs' % \
+                       (self.loop.interval, interval))
+            # Picked up by the LoopingCall when scheduling its next call
+            self.loop.interval = interval
+
+    def recordSample(self, counts, timestamp, generation=None, sizes=None):
+        '''Append a sample to the history
+
+        :Parameters:
+            counts : dict
+              Mapping of type names to object counts
+            timestamp : number
+              Time at which the sample was taken
+            generation : number
+              Garbage collection generation collected before taking the
+              sample, or `None` if no collection was performed
+            sizes : dict
+              Mapping of type names to estimated sizes (in bytes), recorded
+              if sizes are accounted for
+        '''
+        if self._history is None:
+            self.debug('Service stopped, discarding sample')
+            return
+
+        self._history.append(timestamp, counts, generation)
+        if self._sizeHistory is not None and sizes is not None:
+            self._sizeHistory.append(timestamp, sizes, generation)
+        for rollup in self._rollups:
+            rollup.append(timestamp, counts)
+        self._sampleCount += 1
+
+        # Invalidate the cached index pages
+        self._indexPages.clear()
+
+        self._stream.publish(timestamp, counts)
+
+        self.debug('Tracking %d object types in %d samples' % \
+                   (len(self.history), self.history.numSamples))
+
+    def tracedTypes(self):
+        '''Select the types to attribute to their allocation sites
+
+        Counts the sample about to be taken, so allocations are only
+        attributed every `allocations.AllocationTracker.period` samples,
+        and tracing is stopped as soon as it exceeds its memory limit.
+
+        :return: Names of the types growing fastest, if an update of the
+                 allocation sites is due
+        :rtype: list of str
+        '''
+        tracker = self._allocations
+
+        if tracker is None or self._history is None:
+            return []
+
+        tracing = tracker.tracing
+        if not tracker.tick():
+            if tracing and not tracker.tracing:
+                self._tracingStopped()
+            return []
+
+        growing = heapq.nlargest(ALLOCATION_TYPES, self.history,
+                                 key=self.suspicion)
+        return [typeName for typeName in growing
+                if self.suspicion(typeName) > 0]
+
+    def attributeAllocations(self, reservoir, typeNames):
+        '''Attribute the instances picked during a sample to their allocation
+        sites
+
+        :Parameters:
+            reservoir : `InstanceReservoir`
+              Reservoir the instances were picked into
+            typeNames : list of str
+              Names of the types to attribute, see `tracedTypes`
+        '''
+        tracker = self._allocations
+
+        if tracker is None or not typeNames:
+            return
+
+        tracker.update(dict((typeName,
+                             reservoir.pick(typeName,
+                                            tracker.numInstances)[1])
+                            for typeName in typeNames),
+                       self.loop.interval)
+
+        if not tracker.tracing:
+            self._tracingStopped()
+        else:
+            self.debug('Updated allocation sites in %.3fs, updating every '
+                       '%d samples' % (tracker.updateCost, tracker.period))
+
+    def _tracingStopped(self):
+        '''Log why the allocation tracker stopped tracing'''
+        tracker = self._allocations
+
+        if tracker.overLimit:
+            self.msg('Allocation tracing stopped, tracemalloc exceeded its '
+                     'memory limit of %s' % \
+                     formatSize(tracker.memoryLimit))
+        elif tracker.overBudget:
+            self.msg('Allocation tracing stopped, updating allocation sites '
+                     'took %.3fs every %d samples' % \
+                     (tracker.updateCost, tracker.period))
+
+    def renderChart(self, history, typeName, width, height, start=0,
+                    end=None, points=None):
+        '''Render the chart of a type, or get it from the chart cache
+
+        Without window or number of points, the chart spans the full
+        capacity of the history. Otherwise it spans the selected window,
+        downsampled to at most `points` points.
+
+        :Parameters:
+            history : `SampleHistory` or `RollupHistory`
+              History to plot
+            typeName : str
+              Name of the type to plot
+            width : number
+              Width of the chart (in pixels)
+            height : number
+              Height of the chart (in pixels)
+            start : number
+              Index of the first retained sample to plot
+            end : number
+              Index of the retained sample to stop at, defaults to all
+            points : number
+              Maximum number of points to plot per series
+
+        :return: SVG document
+        :rtype: str
+        '''
+        def render():
+            series = history.series(typeName, start, end)
+
+            if start == 0 and end is None and points is None:
+                size = history.size
+                max_ = history.max(typeName)
+            else:
+                series = [downsample(samples, points, reduce_) \
+                          for samples, reduce_ in
+                          zip(series, DOWNSAMPLERS[history.seriesKind])]
+                size = len(series[0])
+                max_ = max(max(samples or [0]) for samples in series)
+
+            maxValue = ((max_ / 10) + 1) * 10
+            return renderChart(series, history.seriesKind, width, height,
+                               size, maxValue)
+
+        return self._chartCache.get(
+            history, (typeName, width, height, start, end, points), render)
+
+    def selectHistory(self, span):
+        '''Select the finest history covering a time span
+
+        :Parameters:
+            span : number
+              Time span (in seconds) to cover
+
+        :return: The raw history, or one of the rollups. If none covers
+                 `span`, the coarsest one.
+        :rtype: `SampleHistory` or `RollupHistory`
+        '''
+        if span <= self.effectiveSampleInterval * self.sampleHistorySize \
+           or not self._rollups:
+            return self._history
+
+        for rollup in self._rollups:
+            if span <= rollup.span:
+                return rollup
+
+        return self._rollups[-1]
+
+    def analyze(self, function):
+        '''Run a heap analysis
+
+        If analyses are forked, `function` is called in a forked copy of the
+        process, otherwise it's called right away, blocking the reactor. At
+        most `ANALYSIS_WORKERS` workers are forked at once. Only on-demand
+        analyses are run this way, samples are taken in this process, see
+        `updateStats`.
+
+        :Parameters:
+            function : callable
+              Function returning an iterable of results, which must be
+              serializable as JSON if analyses are forked
+
+        :return: `Deferred` firing with the list of results and the time (in
+                 seconds) forking the worker took, or `None` if not forked.
+                 Fails with `AnalysisBusyError` if too many workers are
+                 running.
+        :rtype: `twisted.internet.defer.Deferred`
+        '''
+        if not self.forkAnalyses:
+            return defer.maybeDeferred(lambda: (list(function()), None))
+
+        if self._workers >= ANALYSIS_WORKERS:
+            return defer.fail(AnalysisBusyError(
+                'Another analysis is running, try again later'))
+
+        worker_ = worker.ForkedWorker(function)
+        d = defer.maybeDeferred(worker_.start)
+        self._workers += 1
+
+        def done(result):
+            self._workers -= 1
+            return result
+
+        d.addBoth(done)
+        d.addCallback(lambda results: (results, worker_.forkDuration))
+
+        if worker_.pid is not None:
+            self.debug('Forked analysis worker %d in %.1fms' % \
+                       (worker_.pid, worker_.forkDuration * 1000))
+
+        return d
+
+    def _sampleFailed(self, failure):
+        '''Log a failure to take a sample, unless it got aborted'''
+        if failure.check(task.SchedulerStopped):
+            return
+
+        self.err(failure, 'Error while updating object stats')
+
+
+    sampleInterval = property(operator.attrgetter('_sampleInterval'),
+                              doc='Sample interval')
+    sampleHistorySize = property(operator.attrgetter('_sampleHistorySize'),
+                                 doc='Number of samples to keep track of')
+    sliceBudget = property(operator.attrgetter('_sliceBudget'),
+                           doc='Cooperative sampling time budget per slice')
+    loop = property(operator.attrgetter('_loop'), doc='Loop task')
+    history = property(operator.attrgetter('_history'), doc='Sample history')
+    sizeFraction = property(operator.attrgetter('_sizeFraction'),
+                            doc='Fraction of objects of which the size is '
+                                'measured, or `None`')
+    forkAnalyses = property(operator.attrgetter('_forkAnalyses'),
+                            doc='Whether heap analyses are forked')
+    workers = property(operator.attrgetter('_workers'),
+                       doc='Number of analysis workers running')
+    traceAllocations = property(operator.attrgetter('_traceAllocations'),
+                                doc='Number of frames traced per allocation, '
+                                    'or `None`')
+    allocations = property(operator.attrgetter('_allocations'),
+                           doc='Allocation site tracker, if tracing')
+    snapshotDirectory = property(operator.attrgetter('_snapshotDirectory'),
+                                 doc='Directory heap snapshots are written '
+                                     'to, or `None`')
+    sizeHistory = property(operator.attrgetter('_sizeHistory'),
+                           doc='History of estimated sizes (in bytes) per '
+                               'type, or `None`')
+    rollups = property(operator.attrgetter('_rollups'),
+                       doc='Downsampled histories, finest first')
+    timestamps = property(
+        lambda self: None if self._history is None \
+                         else self._history.timestamps,
+        doc='Sample timestamps')
+    collectionPolicy = property(operator.attrgetter('_collectionPolicy'),
+                                doc='Garbage collection policy')
+    collectedGenerations = property(
+        lambda self: None if self._history is None \
+                         else self._history.collectedGenerations,
+        doc='Garbage collection generation collected before every sample')
+    sampleCount = property(operator.attrgetter('_sampleCount'),
+                           doc='Number of samples taken since starting')
+    etag = property(lambda self: '"%x-%x"' % (int(self._startTime * 1000),
+                                              self._sampleCount),
+                    doc='Entity tag identifying the current set of samples')
+    lastModified = property(
+        lambda self: self._history.timestamps[-1] \
+                         if self._history.numSamples else self._startTime,
+        doc='Time at which the latest sample was taken')
+    targetOverhead = property(operator.attrgetter('_targetOverhead'),
+                              doc='Target fraction of wall time to spend '
+                                  'sampling')
+    minSampleInterval = property(operator.attrgetter('_minSampleInterval'),
+                                 doc='Minimal adaptive sample interval')
+    maxSampleInterval = property(operator.attrgetter('_maxSampleInterval'),
+                                 doc='Maximal adaptive sample interval')
+    sampleCost = property(operator.attrgetter('_sampleCost'),
+                          doc='Moving average of the time taken per sample')
+    effectiveSampleInterval = property(
+        lambda self: self.loop.interval if self.loop.running \
+                         else self.sampleInterval,
+        doc='Sample interval currently in use')
+
+
+class GraphResource(resource.Resource):
+    '''A resource serving larger graphs for a given type'''
+
+    # Whether types only found in the downsampled histories are served
+    servesRollups = True
+
+    def __init__(self, objectBrowser):
+        '''
+        :Parameters:
+            objectBrowser : ObjectBrowser
+              ObjectBrowser managing type count history
+        '''
+        resource.Resource.__init__(self)
+
+        self.objectBrowser = objectBrowser
+
+    def getChild(self, name, request):
+        if self.tracks(name):
+            return self
+
+        return resource.Resource.getChild(self, name, request)
+
+    def tracks(self, typeName):
+        '''Check whether a type can be served
+
+        Types pruned from the raw history may still be found in the
+        downsampled histories, which cover a longer time.
+        '''
+        browser = self.objectBrowser
+
+        if typeName in browser.history:
+            return True
+        if not self.servesRollups:
+            return False
+
+        for rollup in browser.rollups:
+            if typeName in rollup:
+                return True
+
+        return False
+
+    def render_GET(self, request):
+        '''Render a graph of a type
+
+        Supported query arguments are
+
+        - ``from`` and ``to``: timestamps delimiting the window to show,
+          defaulting to all retained samples
+        - ``range``: time span (in seconds) to show, ending at ``to``, if
+          ``from`` isn't given
+        - ``resolution``: maximum number of points to plot, defaulting to
+          the graph width in pixels
+        - ``metric``: ``count`` (the default) to plot object counts, or
+          ``size`` to plot estimated sizes if sizes are accounted for
+
+        The time span selects the raw or a downsampled history. Windows with
+        more samples than the resolution are downsampled on the server. Sizes
+        are only kept in the raw history.
+        '''
+        typeName = request.prepath[-1]
+        browser = self.objectBrowser
+
+        get = lambda name: request.args.get(name, [None])[0] or None
+
+        try:
+            from_, to, span, resolution = [
+                float(value) if value is not None else None
+                for value in map(get, ('from', 'to', 'range', 'resolution'))]
+        except ValueError:
+            request.setResponseCode(http.BAD_REQUEST)
+            request.setHeader('Content-Type', 'text/plain')
+            return 'Invalid argument'
+
+        metric = get('metric') or 'count'
+        if metric not in ('count', 'size') or \
+           (metric == 'size' and browser.sizeHistory is None):
+            request.setResponseCode(http.BAD_REQUEST)
+            request.setHeader('Content-Type', 'text/plain')
+            return 'Invalid metric'
+
+        if from_ is None and span is not None:
+            from_ = (to if to is not None else time.time()) - span
+        if from_ is not None:
+            span = (to if to is not None else time.time()) - from_
+
+        history = browser.history
+        if metric == 'size':
+            history = browser.sizeHistory
+        elif span is not None:
+            history = browser.selectHistory(span)
+        if typeName not in history:
+            candidates = []
+            if metric == 'count':
+                candidates = [browser.history] + list(browser.rollups)
+
+            # The finest history still tracking the type
+            history = None
+            for candidate in candidates:
+                if typeName in candidate:
+                    history = candidate
+                    break
+
+        if history is None:
+            # No size measured for any retained sample
+            return NoResource().render(request)
+
+        timestamps = history.timestamps
+        start, end = 0, None
+        if from_ is not None:
+            start = bisect.bisect_left(timestamps, from_)
+        if to is not None:
+            end = bisect.bisect_right(timestamps, to)
+
+        points = None
+        if (from_, to, resolution) != (None, None, None):
+            points = max(min(int(resolution or GRAPH_SIZE[0]),
+                             GRAPH_SIZE[0]), 2)
+
+        request.setHeader('Content-Type', 'image/svg+xml')
+        return browser.renderChart(history, typeName, GRAPH_SIZE[0],
+                                   GRAPH_SIZE[1], start, end, points)
+
+
+class ChartResource(GraphResource):
+    '''A resource serving minigraphs for a given type'''
+
+    servesRollups = False
+
+    def render_GET(self, request):
+        '''Render a minigraph of a type'''
+        request.setHeader('Content-Type', 'image/svg+xml')
+        return self.objectBrowser.renderChart(self.objectBrowser.history,
+                                              request.prepath[-1],
+                                              *MINIGRAPH_SIZE)
+
+
+class TypeResource(GraphResource):
+    '''A resource showing the details of a given type'''
+
+    servesRollups = False
+
+    def render_GET(self, request):
+        '''Render the statistics, graph and allocation sites of a type'''
+        typeName = request.prepath[-1]
+        browser = self.objectBrowser
+        history = browser.history
+        slope, fit = history.trend(typeName)
+
+        def genAllocations():
+            tracker = browser.allocations
+
+            if tracker is None:
+                yield '<p>Allocation tracing is off.</p>'
+                return
+            if tracker.overLimit:
+                yield '''<p>Allocation tracing stopped, tracemalloc exceeded
+    its memory limit of %s.</p>''' % formatSize(tracker.memoryLimit)
+                return
+            if tracker.overBudget:
+                yield '''<p>Allocation tracing stopped, updating allocation
+    sites took %.3fs every %d samples.</p>''' % (tracker.updateCost,
+                                                tracker.period)
+                return
+
+            sites = tracker.sites(typeName)
+            if sites is None:
+                yield '''<p>Only the %d types growing fastest are attributed
+    to allocation sites.</p>''' % ALLOCATION_TYPES
+                return
+
+            yield '''<p class="quiet">Allocation sites of some instances, and
+    how much the memory still allocated there grew since the previous
+    update. Allocation sites are updated every %d samples.</p>
+<table>
+<tr><th>Instances</th><th>Growth</th><th>Traceback</th></tr>''' % \
+                tracker.period
+
+            for site in sites:
+                frames = '<br />'.join(
+                    '%s:%d' % (cgi.escape(filename), lineno)
+                    for filename, lineno in site.frames) or \
+                    'Allocated before tracing started'
+
+                yield '''
+<tr>
+    <td>%d</td><td>%s, %+d blocks</td>
+    <td>%s</td>
+</tr>''' % (site.count, formatSize(site.sizeGrowth), site.countGrowth,
+            frames)
+
+            yield '\n</table>'
+
+        header = '''
+<div class="span-24 last">
+    <h1>%(humanTypeName)s</h1>
+    <p>Objects: %(min)d / %(max)d / %(current)d (min / max / current).
+    Growth: %(slope).2f objects / sample (fit %(fit).2f), growing for
+    %(streak)d samples.</p>
+    <p><a href="../referrers/%(uriTypeName)s">Referrers &raquo;</a>
+    <a href="../">&laquo; All types</a></p>
+    <img src="../graphs/%(uriTypeName)s" width="%(width)d"
+         height="%(height)d" alt="" />
+    <h2>Allocation sites</h2>
+''' % {
+    'humanTypeName': cgi.escape(humanTypeName(typeName)),
+    'uriTypeName': cgi.escape(typeName),
+    'min': history.min(typeName),
+    'max': history.max(typeName),
+    'current': history.current(typeName),
+    'slope': slope,
+    'fit': fit,
+    'streak': history.streak(typeName),
+    'width': GRAPH_SIZE[0],
+    'height': GRAPH_SIZE[1],
+}
+
+        return BASE_TEMPLATE.render({
+            'title': cgi.escape(humanTypeName(typeName)),
+            'root': '../',
+            'body': itertools.chain([header], genAllocations(),
+                                    ['\n</div>']),
+        })
+
+
+class ReferrerResource(GraphResource):
+    '''A resource showing who holds instances of a given type'''
+
+    def render_GET(self, request):
+        '''Render the referrer trees of some instances of a type
+
+        Supported query arguments are ``instances`` (number of instances to
+        pick), ``depth`` (maximal number of levels to walk) and ``nodes``
+        (maximal number of objects to show). The depth and number of nodes
+        can't exceed the defaults, `REFERRER_DEPTH` and `REFERRER_NODES`, and
+        every walk takes at most `REFERRER_BUDGET` seconds.
+
+        Instances are picked at random while the next sample is taken, see
+        `ObjectBrowser.pickInstances`, so the page is rendered after at most
+        a sample interval. Unless analyses are forked, the walk happens in
+        the process itself.
+        '''
+        typeName = request.prepath[-1]
+
+        get = lambda name, default: request.args.get(name, [default])[0] or \
+                                        default
+
+        try:
+            numInstances, maxDepth, maxNodes = [int(get(name, default))
+                for name, default in (('instances', REFERRER_INSTANCES),
+                                      ('depth', REFERRER_DEPTH),
+                                      ('nodes', REFERRER_NODES))]
+        except ValueError:
+            numInstances = 0
+
+        if numInstances <= 0 or maxDepth <= 0 or maxNodes <= 0:
+            request.setResponseCode(http.BAD_REQUEST)
+            request.setHeader('Content-Type', 'text/plain')
+            return 'Invalid argument'
+
+        maxDepth = min(maxDepth, REFERRER_DEPTH)
+        maxNodes = min(maxNodes, REFERRER_NODES)
+
+        def walk((total, instances)):
+            # Don't bind any instance to a local variable, as the frame
+            # would show up as referrer. The list of instances is ignored by
+            # the walk.
+            def analyze():
+                start = time.time()
+                nodes, cut = walkReferrers(instances, maxDepth, maxNodes,
+                                           REFERRER_BUDGET)
+
+                return [(total, nodes, cut, time.time() - start)]
+
+            d = self.objectBrowser.analyze(analyze)
+            # Done walking, or forked a worker with a copy of the instances
+            del instances[:]
+
+            return d
+
+        d = self.objectBrowser.pickInstances(typeName,
+                                             min(numInstances, maxNodes))
+        def render(((result, ), forkDuration)):
+            return self.renderReferrers(typeName, maxDepth,
+                                        forkDuration=forkDuration, *result)
+
+        d.addCallback(walk)
+        d.addCallback(render)
+
+        return renderLater(request, d)
+
+    def renderReferrers(self, typeName, maxDepth, total, nodes, cut,
+                        duration, forkDuration=None):
+        '''Render the result of a referrer walk
+
+        :Parameters:
+            typeName : str
+              Name of the type of which instances were walked from
+            maxDepth : number
+              Maximal number of levels walked
+            total : number
+              Number of instances found
+            nodes : list
+              Nodes, as returned by `walkReferrers`
+            cut : bool
+              Whether the walk was cut short
+            duration : number
+              Time (in seconds) the walk took
+            forkDuration : number
+              Time (in seconds) forking the worker took, `None` if not
+              forked
+
+        :return: Page
+        :rtype: str
+        '''
+        children = collections.defaultdict(list)
+        for i, (parent, _, _, _) in enumerate(nodes):
+            children[parent].append(i)
+
+        def genTree(i):
+            _, description, reference, root = nodes[i]
+
+            yield '\n<li>'
+            if reference is not None:
+                yield '<span class="quiet">%s of</span> ' % reference
+            if root:
+                yield '<strong>%s</strong>' % cgi.escape(description)
+            else:
+                yield cgi.escape(description)
+
+            if children[i]:
+                yield '\n<ul>'
+                for child in children[i]:
+                    for part in genTree(child):
+                        yield part
+                yield '\n</ul>'
+
+            yield '</li>'
+
+        def genBody():
+            yield '''
+<div class="span-24 last">
+    <h1>Referrers of %s</h1>
+    <p>Showing %d of %d instances, and %d referring objects within %d
+    levels, found in %.1fms. Modules and module globals are in bold.%s</p>
+    <p><a href="../">&laquo; All types</a></p>
+</div>
+<div class="span-24 last">''' % (cgi.escape(humanTypeName(typeName)),
+                                 len(children[None]), total,
+                                 len(nodes) - len(children[None]), maxDepth,
+                                 duration * 1000,
+                                 ' The walk was cut short.' if cut else '')
+
+            if forkDuration is not None:
+                yield '''
+<p class="quiet">Walked in a forked worker, forking took %.1fms.</p>''' % \
+                    (forkDuration * 1000)
+
+            yield '\n<ul>'
+
+            for i in children[None]:
+                for part in genTree(i):
+                    yield part
+
+            yield '\n</ul>\n</div>'
+
+        return BASE_TEMPLATE.render({
+            'title': 'Referrers of %s' % cgi.escape(humanTypeName(typeName)),
+            'root': '../',
+            'body': genBody(),
+        })
+
+
+class RetainerResource(resource.Resource):
+    '''A resource showing which types and objects keep most memory alive
+
+    The analysis builds a `heapgraph.HeapGraph` of the whole heap and its
+    dominator tree, which takes a while. Unless analyses are forked, this
+    blocks the process, so it's only run on demand: when the page is first
+    requested, or when the ``refresh`` query argument is given. Otherwise
+    the latest analysis is shown.
+    '''
+
+    isLeaf = True
+
+    def __init__(self, objectBrowser):
+        '''
+        :Parameters:
+            objectBrowser : ObjectBrowser
+              ObjectBrowser running the analysis
+        '''
+        resource.Resource.__init__(self)
+
+        self.objectBrowser = objectBrowser
+        # (timestamp, duration, summary, fork duration) of the latest analysis
+        self.analysis = None
+        # Deferreds of the requests waiting for the analysis in progress
+        self.waiting = None
+
+    def render_GET(self, request):
+        if self.analysis is not None and \
+           not request.args.get('refresh', None):
+            return self.renderAnalysis(*self.analysis)
+
+        d = defer.Deferred()
+        d.addCallback(lambda _: self.renderAnalysis(*self.analysis))
+
+        if self.waiting is not None:
+            # Wait for the analysis in progress
+            self.waiting.append(d)
+            return renderLater(request, d)
+
+        self.waiting = [d]
+        start = time.time()
+
+        def done(result):
+            waiting, self.waiting = self.waiting, None
+
+            if isinstance(result, failure.Failure):
+                for waiter in waiting:
+                    waiter.errback(result)
+                return
+
+            (summary, ), forkDuration = result
+            self.analysis = start, time.time() - start, summary, forkDuration
+            for waiter in waiting:
+                waiter.callback(None)
+
+        self.objectBrowser.analyze(
+            lambda: [heapgraph.analyze(nameType=getTypeName,
+                                       numTypes=RETAINER_TYPES,
+                                       numObjects=RETAINER_OBJECTS)]
+        ).addBoth(done)
+
+        return renderLater(request, d)
+
+    def renderAnalysis(self, timestamp, duration, summary,
+                       forkDuration=None):
+        '''Render the result of an analysis
+
+        :Parameters:
+            timestamp : number
+              Time at which the analysis started
+            duration : number
+              Time (in seconds) the analysis took
+            summary : dict
+              Summary, as returned by `heapgraph.analyze`
+            forkDuration : number
+              Time (in seconds) forking the worker took, `None` if not
+              forked
+
+        :return: Page
+        :rtype: str
+        '''
+        def genRows(rows, format):
+            for row in rows:
+                yield '\n<tr>%s</tr>' % ''.join(
+                    '<td>%s</td>' % value for value in format(*row))
+
+        def formatType(typeName, count, size, retained):
+            return (cgi.escape(humanTypeName(typeName)), count,
+                    formatSize(size), formatSize(retained))
+
+        def formatObject(typeName, id_, size, retained):
+            return (cgi.escape(humanTypeName(typeName)), '0x%x' % id_,
+                    formatSize(size), formatSize(retained))
+
+        header = '''
+<div class="span-24 last">
+    <h1>Top Retainers</h1>
+    <p>The retained size of an object is the memory freed when it's freed,
+    the size of a type the memory retained by all of its objects. Sizes are
+    shallow sizes as reported by <code>sys.getsizeof</code>.</p>
+    <p class="quiet">Analyzed %d objects and %d references (%s) at %s, in
+    %.1fs%s. <a href="?refresh=1">Analyze again</a></p>
+    <p><a href="./">&laquo; All types</a></p>
+</div>
+<div class="span-24 last">
+<h2>Types</h2>
+<table>
+<tr>
+    <th>Type</th><th>Objects</th><th>Size</th><th>Retained size</th>
+</tr>''' % (
+    summary['nodes'], summary['edges'], formatSize(summary['totalSize']),
+    time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)),
+    duration,
+    ' in a forked worker, forking took %.1fms' % (forkDuration * 1000) \
+        if forkDuration is not None else '')
+
+        middle = '''
+</table>
+<h2>Objects</h2>
+<table>
+<tr><th>Type</th><th>Address</th><th>Size</th><th>Retained size</th></tr>'''
+
+        return BASE_TEMPLATE.render({
+            'title': 'Top Retainers',
+            'root': '',
+            'body': itertools.chain(
+                [header], genRows(summary['types'], formatType), [middle],
+                genRows(summary['objects'], formatObject),
+                ['\n</table>\n</div>']),
+        })
+
+
+class SnapshotResource(resource.Resource):
+    '''A resource writing heap snapshots
+
+    A ``POST`` writes a snapshot of all objects tracked by the garbage
+    collector to a new file in the snapshot directory. Snapshots are meant
+    to be compared offline, using ``python -m txspy.heapsnapshot``.
+    '''
+
+    isLeaf = True
+
+    def __init__(self, objectBrowser):
+        '''
+        :Parameters:
+            objectBrowser : ObjectBrowser
+              ObjectBrowser writing the snapshots
+        '''
+        resource.Resource.__init__(self)
+
+        self.objectBrowser = objectBrowser
+
+    def render_GET(self, request):
+        return BASE_TEMPLATE.render({
+            'title': 'Heap Snapshot',
+            'root': '',
+            'body': '''
+<div class="span-24 last">
+    <h1>Heap Snapshot</h1>
+    <p>Write the type, size and references of every object to a file in
+    <code>%s</code>. Compare two snapshots using
+    <code>python -m txspy.heapsnapshot BEFORE AFTER</code>.</p>
+    <form method="post" action="">
+        <input type="submit" value="Write snapshot" />
+    </form>
+    <p><a href="./">&laquo; All types</a></p>
+</div>''' % cgi.escape(self.objectBrowser.snapshotDirectory),
+        })
+
+    def render_POST(self, request):
+        # Reserve a new file, whatever the number of snapshots written at
+        # once
+        fd, path = tempfile.mkstemp(
+            suffix='.snapshot',
+            prefix='txspy-%s-%d-' % (time.strftime('%Y%m%d-%H%M%S'),
+                                     os.getpid()),
+            dir=self.objectBrowser.snapshotDirectory)
+        os.close(fd)
+
+        def write():
+            file_ = open(path, 'wb')
+            try:
+                numNodes, numEdges = heapsnapshot.writeSnapshot(
+                    file_, nameType=getTypeName)
+            finally:
+                file_.close()
+
+            return [(numNodes, numEdges)]
+
+        def report(((result, ), _)):
+            request.setHeader('Content-Type', 'text/plain')
+            return 'Wrote %d objects and %d references to %s\n' % \
+                       (result[0], result[1], path)
+
+        def discard(failure_):
+            os.remove(path)
+            return failure_
+
+        return renderLater(request,
+                           self.objectBrowser.analyze(write).addCallbacks(
+                               report, discard))
+
+
+class HistoryResource(resource.Resource):
+    '''A resource serving the sample history as JSON
+
+    The response is an object holding the ``timestamps`` of the samples, the
+    ``collectedGenerations`` before every sample, and ``types``, mapping type
+    names to their object counts in these samples. Types of which no objects
+    were found in any of the returned samples are left out.
+
+    Supported query arguments are ``since`` (only return samples taken after
+    this timestamp), and ``filter`` and ``regex`` as supported by the index.
+    '''
+
+    isLeaf = True
+
+    def __init__(self, objectBrowser):
+        '''
+        :Parameters:
+            objectBrowser : ObjectBrowser
+              ObjectBrowser managing type count history
+        '''
+        resource.Resource.__init__(self)
+
+        self.objectBrowser = objectBrowser
+
+    def render_GET(self, request):
+        get = lambda name: request.args.get(name, [None])[0] or None
+
+        try:
+            since = get('since')
+            since = float(since) if since is not None else None
+            prefix, regex = parseIndexQuery(request.args)[:2]
+        except ValueError, exc:
+            request.setResponseCode(http.BAD_REQUEST)
+            request.setHeader('Content-Type', 'text/plain')
+            return str(exc)
+
+        history = self.objectBrowser.history
+        timestamps = history.timestamps
+
+        start = 0
+        if since is not None:
+            start = bisect.bisect_right(timestamps, since)
+
+        request.setHeader('Content-Type', 'application/json')
+
+        ResponseProducer(request, self.iterDocument(
+            history, start, list(matchTypes(history, prefix, regex)))).start()
+
+        return server.NOT_DONE_YET
+
+    def iterDocument(self, history, start, typeNames):
+        '''Serialize (part of) a history, type by type
+
+        Sample numbers are fixed up front, so the document stays consistent
+        if samples are added while it's being streamed. Samples dropping out
+        of the history in the mean time read as zero.
+
+        :Parameters:
+            history : `SampleHistory`
+              History to serialize
+            start : number
+              Index of the first retained sample to serialize
+            typeNames : list
+              Names of the types to serialize
+
+        :return: Iterator of document parts
+        :rtype: iterable
+        '''
+        # Number of the first sample to return, and number of samples
+        first = history.firstSample + start
+        length = history.numSamples - start
+
+        yield '{"timestamps": %s, "collectedGenerations": %s, "types": {' % (
+            json.dumps(history.timestamps[start:].tolist()),
+            json.dumps(history.collectedGenerations[start:]))
+
+        separator = '\n'
+        for typeName in typeNames:
+            if typeName not in history or history.lastFound(typeName) < first:
+                continue
+
+            yield '%s%s: %s' % (
+                separator, json.dumps(typeName),
+                json.dumps(history.samplesAt(typeName, first,
+                                             length).tolist()))
+            separator = ',\n'
+
+        yield '}}'
+
+
+def renderLater(request, d):
+    '''Finish a request with the page a `Deferred` fires with
+
+    If the `Deferred` fails, the failure is logged and an error page is
+    sent instead, or a ``503 Service Unavailable`` response if the analysis
+    couldn't be started because others are running. Nothing is sent if the
+    client went away in the mean time.
+
+    :Parameters:
+        request : `twisted.web.server.Request`
+          Request to respond to
+        d : `twisted.internet.defer.Deferred`
+          `Deferred` firing with the page
+
+    :return: `NOT_DONE_YET`
+    :rtype: object
+    '''
+    finished = []
+    request.notifyFinish().addBoth(finished.append)
+
+    def write(page):
+        if finished:
+            return
+
+        if isinstance(page, unicode):
+            # Results of forked analyses are decoded from JSON as unicode
+            page = page.encode('utf-8')
+
+        request.setHeader('Content-Length', str(len(page)))
+        request.write(page)
+        request.finish()
+
+    def fail(failure):
+        if failure.check(AnalysisBusyError):
+            if not finished:
+                request.setResponseCode(http.SERVICE_UNAVAILABLE)
+                request.setHeader('Content-Type', 'text/plain')
+                write(failure.getErrorMessage())
+            return
+
+        log.err(failure, 'Error while analyzing the heap')
+
+        if finished:
+            return
+
+        request.setResponseCode(http.INTERNAL_SERVER_ERROR)
+        request.setHeader('Content-Type', 'text/plain')
+        write('Analysis failed: %s' % failure.getErrorMessage())
+
+    d.addCallbacks(write, fail)
+
+    return server.NOT_DONE_YET
+
+
+class SuspectsResource(resource.Resource):
+    '''A resource ranking types by sustained growth
+
+    Supported query arguments are ``filter``, ``regex``, ``limit`` and
+    ``page``, as supported by the index.
+    '''
+
+    isLeaf = True
+
+    def __init__(self, objectBrowser):
+        '''
+        :Parameters:
+            objectBrowser : ObjectBrowser
+              ObjectBrowser managing type count history
+        '''
+        resource.Resource.__init__(self)
+
+        self.objectBrowser = objectBrowser
+
+    def render_GET(self, request):
+        try:
+            prefix, regex, _, limit, page = parseIndexQuery(request.args)
+        except ValueError, exc:
+            request.setResponseCode(http.BAD_REQUEST)
+            request.setHeader('Content-Type', 'text/plain')
+            return str(exc)
+
+        return self.objectBrowser.renderCached(
+            request, ('suspects', prefix, regex, 'trend', limit, page),
+            self.objectBrowser.renderSuspects)
+
+
+class ResponseProducer(object):
+    '''A streaming producer writing the parts of a response to a request
+
+    Parts are written in batches of about `PRODUCER_CHUNK_SIZE` bytes, giving
+    control back to the reactor in between. Writing stops while the
+    transport is paused, so slow clients don't hold up other connections and
+    large responses aren't buffered in memory. The request is finished once
+    all parts are written.
+    '''
+
+    implements(IPushProducer)
+
+    __slots__ = '_request', '_parts', '_clock', '_call', '_paused', '_done',
+
+    def __init__(self, request, parts, clock=None):
+        '''
+        :Parameters:
+            request : `twisted.web.server.Request`
+              Request to write to
+            parts : iterable
+              Strings making up the response body
+            clock : `twisted.internet.interfaces.IReactorTime`
+              Clock used to schedule batches, defaults to the reactor
+        '''
+        if clock is None:
+            from twisted.internet import reactor as clock
+
+        self._request = request
+        self._parts = iter(parts)
+        self._clock = clock
+        self._call = None
+        self._paused = False
+        self._done = False
+
+    def start(self):
+        '''Start writing the response'''
+        self._request.registerProducer(self, True)
+        self._schedule()
+
+    def _schedule(self):
+        '''Schedule writing the next batch, unless paused or done'''
+        if self._paused or self._done or self._call is not None:
+            return
+
+        self._call = self._clock.callLater(0, self._writeBatch)
+
+    def _writeBatch(self):
+        '''Write a batch of parts'''
+        self._call = None
+        written = 0
+
+        try:
+            while not self._paused and written < PRODUCER_CHUNK_SIZE:
+                part = self._parts.next()
+                self._request.write(part)
+                written += len(part)
+        except StopIteration:
+            self._finish()
+            return
+        except Exception, exc:
+            log.err(exc, 'Error while producing response')
+            self._done = True
+            self._request.unregisterProducer()
+            # Don't make a truncated response look complete
+            self._request.channel.transport.loseConnection()
+            return
+
+        self._schedule()
+
+    def _finish(self):
+        '''Finish the response'''
+        self._done = True
+        self._request.unregisterProducer()
+        self._request.finish()
+
+    # IPushProducer
+    def pauseProducing(self):
+        self._paused = True
+
+        if self._call is not None:
+            self._call.cancel()
+            self._call = None
+
+    def resumeProducing(self):
+        self._paused = False
+        self._schedule()
+
+    def stopProducing(self):
+        # Connection lost
+        self._done = True
+
+        if self._call is not None:
+            self._call.cancel()
+            self._call = None
+
+
+class StreamResource(resource.Resource):
+    '''A resource streaming new samples as Server-Sent Events
+
+    Every sample is sent as a ``sample`` event, identified by its timestamp.
+    Its data is a JSON object holding the ``timestamp`` and either
+
+    - ``counts``, mapping the names of the types of which the count changed
+      since the previous sample to their new count (``mode=delta``, the
+      default), or
+    - ``movers``, a list of [type name, count, change] lists of the ``limit``
+      types of which the count changed most (``mode=movers``).
+
+    Every event is serialized once, and shared by all clients requesting the
+    same mode. Events for clients not keeping up are queued, up to
+    `STREAM_BUFFER_SIZE` events per client. The oldest events are dropped
+    beyond that, which is signalled to the client using a ``dropped`` event
+    holding the number of events lost.
+    '''
+
+    isLeaf = True
+
+    def __init__(self):
+        resource.Resource.__init__(self)
+
+        self._clients = set()
+        self._previous = dict()
+
+    def render_GET(self, request):
+        mode = request.args.get('mode', ['delta'])[0]
+
+        try:
+            limit = int(request.args.get('limit', [STREAM_MOVERS])[0])
+        except ValueError:
+            limit = 0
+
+        if mode not in ('delta', 'movers') or limit <= 0:
+            request.setResponseCode(http.BAD_REQUEST)
+            request.setHeader('Content-Type', 'text/plain')
+            return 'Invalid mode or limit'
+
+        request.setHeader('Content-Type', 'text/event-stream')
+        request.setHeader('Cache-Control', 'no-cache')
+
+        client = StreamClient(request, (mode, limit))
+        self._clients.add(client)
+
+        def remove(_):
+            self._clients.discard(client)
+        request.notifyFinish().addBoth(remove)
+
+        # Flush the headers
+        client.send(': connected\n\n')
+
+        return server.NOT_DONE_YET
+
+    def publish(self, timestamp, counts):
+        '''Send a sample to all connected clients
+
+        :Parameters:
+            timestamp : number
+              Time at which the sample was taken
+            counts : dict
+              Mapping of type names to object counts
+        '''
+        previous, self._previous = self._previous, counts
+
+        if not self._clients:
+            return
+
+        changes = dict((typeName, count)
+                       for typeName, count in counts.iteritems()
+                       if previous.get(typeName, 0) != count)
+        changes.update((typeName, 0) for typeName in previous
+                       if typeName not in counts)
+
+        events = dict()
+
+        for client in list(self._clients):
+            event = events.get(client.query, None)
+
+            if event is None:
+                event = self._serialize(client.query, timestamp, changes,
+                                        previous)
+                events[client.query] = event
+
+            client.send(event)
+
+    def _serialize(self, query, timestamp, changes, previous):
+        '''Serialize a sample event for a given client query'''
+        mode, limit = query
+
+        if mode == 'delta':
+            data = {'timestamp': timestamp, 'counts': changes}
+        else:
+            change = lambda (typeName, count): \
+                abs(count - previous.get(typeName, 0))
+
+            data = {'timestamp': timestamp,
+                    'movers': [[typeName, count,
+                                count - previous.get(typeName, 0)]
+                               for typeName, count in heapq.nlargest(
+                                   limit, changes.iteritems(), key=change)]}
+
+        return 'id: %r\nevent: sample\ndata: %s\n\n' % \
+                   (timestamp, json.dumps(data))
+
+    def closeAll(self):
+        '''Close all client connections'''
+        for client in list(self._clients):
+            client.close()
+
+        self._clients.clear()
+        self._previous = dict()
+
+
+class StreamClient(object):
+    '''A client connected to a `StreamResource`
+
+    The client registers itself as streaming producer of its request, so it
+    gets paused while the transport buffer is full, and queues events in the
+    mean time.
+    '''
+
+    implements(IPushProducer)
+
+    __slots__ = '_request', '_query', '_queue', '_paused', '_dropped', \
+                '_closed',
+
+    def __init__(self, request, query):
+        '''
+        :Parameters:
+            request : `twisted.web.server.Request`
+              Request to stream events to
+            query : tuple
+              Hashable description of the events the client wants
+        '''
+        self._request = request
+        self._query = query
+        self._queue = collections.deque()
+        self._paused = False
+        self._dropped = 0
+        self._closed = False
+
+        request.registerProducer(self, True)
+
+    def send(self, event):
+        '''Send an event, or queue it if the client isn't keeping up
+
+        :Parameters:
+            event : str
+              Serialized event
+        '''
+        if self._closed:
+            return
+
+        if not self._paused:
+            self._request.write(event)
+            return
+
+        self._queue.append(event)
+
+        if len(self._queue) > STREAM_BUFFER_SIZE:
+            self._queue.popleft()
+            self._dropped += 1
+
+    def close(self):
+        '''Finish the response'''
+        if self._closed:
+            return
+
+        self._closed = True
+        self._queue.clear()
+        self._request.unregisterProducer()
+        self._request.finish()
+
+    # IPushProducer
+    def pauseProducing(self):
+        self._paused = True
+
+    def resumeProducing(self):
+        self._paused = False
+
+        if self._dropped:
+            self._request.write('event: dropped\ndata: %d\n\n' % \
+                                    self._dropped)
+            self._dropped = 0
+
+        while self._queue and not self._paused:
+            self._request.write(self._queue.popleft())
+
+    def stopProducing(self):
+        # Connection lost
+        self._closed = True
+        self._queue.clear()
+
+    query = property(operator.attrgetter('_query'),
+                     doc='Description of the events the client wants')
+
+
+class ChartCache(object):
+    '''Cache of rendered charts
+
+    Charts are cached per history, and invalidated as soon as a sample is
+    added to the history they were rendered from.
+    '''
+
+    __slots__ = '_charts',
+
+    def __init__(self):
+        # Mapping of histories to (generation, {key: chart}) tuples
+        self._charts = dict()
+
+    def get(self, history, key, render):
+        '''Get a chart from the cache, rendering it if required
+
+        :Parameters:
+            history : `SampleHistory` or `RollupHistory`
+              History the chart is rendered from
+            key : object
+              Key identifying the chart within `history`
+            render : callable
+              Function rendering the chart
+
+        :return: Chart
+        :rtype: str
+        '''
+        generation, charts = self._charts.get(history, (None, None))
+
+        if generation != history.generation:
+            # Drops all charts rendered from an older generation
+            charts = dict()
+            self._charts[history] = history.generation, charts
+
+        chart = charts.get(key, None)
+
+        if chart is None:
+            if len(charts) >= CHART_CACHE_SIZE:
+                charts.clear()
+
+            chart = render()
+            charts[key] = chart
+
+        return chart
+
+    def clear(self):
+        '''Remove all charts from the cache'''
+        self._charts.clear()
+
+
+class SampleHistory(object):
+    '''Store of type count samples
+
+    Timestamps and collected garbage collection generations are kept in
+    fixed-size circular arrays sharing a single write index. Object counts
+    are stored sparsely: every type keeps a `SparseSeries` of the samples in
+    which it was found only. Dense series are rebuilt on read.
+
+    Appending a sample costs O(1) per type found in it, independent of the
+    number of types tracked. Types of which no objects were found in any of
+    the retained samples are pruned. The minimum, maximum and current count of
+    a type are maintained incrementally, reading them costs amortized O(1).
+    The same goes for the growth trend of a type, see `trend`.
+
+    The object behaves like a read-only mapping of type names to their
+    samples, in chronological order.
+    '''
+
+    __slots__ = '_size', '_head', '_length', '_count', '_timestamps', \
+                '_generations', '_series', '_expiry',
+
+    # Kind of the series returned by `series`
+    seriesKind = SERIES_COUNTS
+
+    def __init__(self, size):
+        '''
+        :Parameters:
+            size : number
+              Maximum number of samples to keep
+        '''
+        assert size > 0
+        self._size = size
+        # Index of the slot the next sample will be written to
+        self._head = 0
+        self._length = 0
+        # Number of samples ever appended, samples are numbered from 0
+        self._count = 0
+
+        self._timestamps = array.array('d', [0.0]) * size
+        # -1 marks samples taken without collecting garbage
+        self._generations = array.array('b', [-1]) * size
+
+        self._series = dict()
+        # Mapping of sample numbers to the names of the types last found in
+        # that sample, used to prune types without looking at all of them
+        self._expiry = dict()
+
+    def append(self, timestamp, counts, generation=None):
+        '''Append a sample
+
+        :Parameters:
+            timestamp : number
+              Time at which the sample was taken
+            counts : dict
+              Mapping of type names to object counts
+            generation : number
+              Garbage collection generation collected before taking the
+              sample, or `None` if no collection was performed
+        '''
+        number = self._count
+        # First sample number retained once this sample is added
+        first = number - self._size + 1
+
+        series = self._series
+        expiry = self._expiry
+        lastFound = set()
+
+        for typeName, count in counts.iteritems():
+            if count == 0:
+                continue
+
+            samples = series.get(typeName, None)
+
+            if samples is None:
+                samples = SparseSeries()
+                series[typeName] = samples
+            else:
+                expiry[samples.last].discard(typeName)
+                samples.expire(first)
+
+            samples.append(number, count)
+            lastFound.add(typeName)
+
+        expiry[number] = lastFound
+
+        # Prune object types last found in the sample which drops out now
+        for typeName in expiry.pop(number - self._size, ()):
+            del series[typeName]
+
+        self._timestamps[self._head] = timestamp
+        self._generations[self._head] = -1 if generation is None \
+                                            else generation
+
+        self._head = (self._head + 1) % self._size
+        self._length = min(self._length + 1, self._size)
+        self._count += 1
+
+    def _ordered(self, column):
+        '''Get the retained values of a column in chronological order
+
+        :Parameters:
+            column : `array.array`
+              Column to read
+
+        :return: Copy of the retained part of `column`
+        :rtype: `array.array`
+        '''
+        if self._length < self._size:
+            return column[:self._length]
+
+        return column[self._head:] + column[:self._head]
+
+    def _retained(self, typeName):
+        '''Get the series of a type, with samples no longer retained expired
+        '''
+        samples = self._series[typeName]
+        samples.expire(self.firstSample)
+
+        return samples
+
+    def min(self, typeName):
+        '''Get the minimal retained count of a type'''
+        samples = self._retained(typeName)
+
+        # Missing samples are zeros
+        if len(samples) < self._length:
+            return 0
+
+        return samples.min
+
+    def max(self, typeName):
+        '''Get the maximal retained count of a type'''
+        return self._retained(typeName).max
+
+    def current(self, typeName):
+        '''Get the count of a type in the latest sample'''
+        samples = self._series[typeName]
+
+        if samples.last != self._count - 1:
+            return 0
+
+        return samples.latest
+
+    def trend(self, typeName):
+        '''Fit a line through the retained counts of a type
+
+        The least-squares fit is calculated from sums maintained by the
+        series of the type, and closed forms of the sums over sample numbers,
+        so it costs amortized O(1).
+
+        :Parameters:
+            typeName : str
+              Name of the type
+
+        :return: Slope (in objects per sample) and coefficient of
+                 determination of the fit, between 0 and 1
+        :rtype: tuple
+        '''
+        samples = self._retained(typeName)
+        n = self._length
+
+        if n < 2:
+            return 0.0, 0.0
+
+        # Sample numbers are shifted to start at 0, missing samples are
+        # zeros and don't contribute to any sum
+        sumX = n * (n - 1) / 2
+        sumXX = (n - 1) * n * (2 * n - 1) / 6
+        sumY = samples.sum
+        sumXY = samples.weightedSum - self.firstSample * sumY
+
+        covariance = n * sumXY - sumX * sumY
+        varianceX = n * sumXX - sumX * sumX
+        varianceY = n * samples.squaredSum - sumY * sumY
+
+        if varianceY == 0:
+            return 0.0, 0.0
+
+        return float(covariance) / varianceX, \
+               float(covariance * covariance) / (varianceX * varianceY)
+
+    def streak(self, typeName):
+        '''Get the number of consecutive retained samples, up to the latest
+        one, in which the count of a type grew'''
+        samples = self._series[typeName]
+
+        if samples.last != self._count - 1:
+            return 0
+
+        return min(samples.streak, self._length - 1)
 
+    def lastFound(self, typeName):
+        '''Get the number of the latest sample in which a type was found'''
+        return self._series[typeName].last
 
-class LoggedServiceMixin:
-    '''Mixin providing logging-related utility methods'''
+    def first(self, typeName):
+        '''Get the count of a type in the oldest retained sample'''
+        samples = self._retained(typeName)
 
-    msg = lambda self, *a, **k: _log(log.msg, self, a, k)
-    err = lambda self, *a, **k: _log(log.err, self, a, k)
-    debug = lambda self, *a, **k: None
+        if samples.first != self.firstSample:
+            return 0
 
-    # IService helpers
-    def startService(self):
-        '''Start the service'''
-        self.msg('Starting %s service "%s"' % \
-                 (self.__class__.__name__, self.name))
+        return samples.earliest
 
-    def stopService(self):
-        '''Stop the service'''
-        self.msg('Stopping %s service "%s"' % \
-                 (self.__class__.__name__, self.name))
+    def series(self, typeName, start=0, end=None):
+        '''Get the series to plot for a type
 
+        :Parameters:
+            typeName : str
+              Name of the type
+            start : number
+              Index of the first retained sample to return
+            end : number
+              Index of the retained sample to stop at, defaults to all
+
+        :return: Object counts, in chronological order
+        :rtype: list of `array.array`
+        '''
+        return [self.samples(typeName, start, end)]
 
-    def enableDebug(self):
-        '''Enable debugging output'''
-        self.debug = self.msg
+    def samples(self, typeName, start=0, end=None):
+        '''Get the samples of a type, in chronological order
 
-    def disableDebug(self):
-        '''Disable debugging output'''
-        self.debug = LoggedServiceMixin.debug
+        :Parameters:
+            typeName : str
+              Name of the type
+            start : number
+              Index of the first retained sample to return
+            end : number
+              Index of the retained sample to stop at, defaults to all
+
+        :return: Object counts
+        :rtype: `array.array`
+        '''
+        if end is None or end > self._length:
+            end = self._length
 
+        return self._retained(typeName).dense(self.firstSample + start,
+                                              max(end - start, 0))
 
-def safeCall(fun, err=lambda exc: log.err(exc, 'safeCall failed')):
-    '''
-    Call a function, catching all exceptions, which are logged using 'err'
+    def samplesAt(self, typeName, first, length):
+        '''Get the samples of a type, by sample number
 
-    This function returns nothing.
+        Samples no longer retained read as zero.
 
-    :Parameters:
-        fun : callable
-          Function to execute
-        err : callable
-          Function to call if calling `fun` raises an `Exception`. The
-          `Exception` will be passed as single argument.
-    '''
-    try:
-        fun()
-    except Exception, exc:
-        err(exc)
+        :Parameters:
+            typeName : str
+              Name of the type
+            first : number
+              Number of the first sample to return
+            length : number
+              Number of samples to return
+
+        :return: Object counts
+        :rtype: `array.array`
+        '''
+        return self._series[typeName].dense(first, length)
 
+    def __getitem__(self, typeName):
+        ''''''
+        return self.samples(typeName)
+    __getitem__.__doc__ = samples.__doc__
 
-def getTypeName(object_):
-    '''Get the full type name of an object
+    def __contains__(self, typeName):
+        ''''''
+        return typeName in self._series
+    __contains__.__doc__ = dict.__contains__.__doc__
 
-    :Parameters:
-        `object\_` : object
-          Object of which to calculate the type
+    def __len__(self):
+        ''''''
+        return len(self._series)
+    __len__.__doc__ = dict.__len__.__doc__
 
-    :return: Complete name of `object_`'s type
-    :rtype: str
+    def __iter__(self):
+        ''''''
+        return iter(self._series)
+    __iter__.__doc__ = dict.__iter__.__doc__
+
+    def iterkeys(self):
+        ''''''
+        return self._series.iterkeys()
+    iterkeys.__doc__ = dict.iterkeys.__doc__
+
+    def iteritems(self):
+        '''Iterate over all tracked type names and their samples'''
+        for typeName in self._series:
+            yield typeName, self[typeName]
+
+    size = property(operator.attrgetter('_size'),
+                    doc='Maximum number of samples to keep')
+    numSamples = property(operator.attrgetter('_length'),
+                          doc='Number of retained samples')
+    generation = property(operator.attrgetter('_count'),
+                          doc='Number of samples ever appended')
+    firstSample = property(lambda self: self._count - self._length,
+                           doc='Number of the oldest retained sample')
+    timestamps = property(lambda self: self._ordered(self._timestamps),
+                          doc='Sample timestamps, in chronological order')
+    collectedGenerations = property(
+        lambda self: [g if g >= 0 else None \
+                      for g in self._ordered(self._generations)],
+        doc='Garbage collection generation collected before every sample')
+
+
+class SparseSeries(object):
+    '''Series of non-zero object counts of a single type
+
+    Only samples in which the type was found are stored, as sample numbers
+    and counts in ascending sample order. Expired samples are dropped from
+    the front lazily, the arrays are compacted once more than half of them
+    is expired.
+
+    The minimum and maximum of the stored counts are tracked using monotonic
+    queues of (sample number, count) pairs, so they're available in O(1)
+    while samples are appended and expired. The sums required to fit a trend
+    line through the stored samples, and the number of consecutive samples
+    in which the count grew, are maintained the same way.
     '''
-    type_ = type(object_)
 
-    if type_ == types.InstanceType:
-        type_ = object_.__class__
+    __slots__ = '_numbers', '_counts', '_start', '_minima', '_maxima', \
+                '_sum', '_squaredSum', '_weightedSum', '_streak',
 
-    return '%s.%s' % (type_.__module__, type_.__name__)
+    def __init__(self):
+        self._numbers = array.array('L')
+        self._counts = array.array('l')
+        # Index of the first sample which isn't expired
+        self._start = 0
 
+        # Candidates for the minimum (ascending) and maximum (descending) of
+        # the stored counts, the actual minimum and maximum come first
+        self._minima = collections.deque()
+        self._maxima = collections.deque()
 
-# TODO Is there no C builtin for this somehow?
-count = lambda iterable: reduce(lambda i, _: i + 1, iterable, 0)
-count.__doc__ = '''
-Count the number of items in an iterable
+        # Sums of counts, squared counts and counts times sample numbers of
+        # the stored samples
+        self._sum = 0
+        self._squaredSum = 0
+        self._weightedSum = 0
+        # Number of consecutive samples, up to the latest one, in which the
+        # count grew
+        self._streak = 0
 
-Note: this function consumes the iterable.
+    def append(self, number, count):
+        '''Append a sample
 
-:Parameters:
-    iterable : iterable
-      Iterable to count
+        :Parameters:
+            number : number
+              Sample number, larger than the one of any sample stored before
+            count : number
+              Object count
+        '''
+        numbers = self._numbers
 
-:return: Number of items in the given iterable
-:rtype: number
-'''
+        if not numbers or numbers[-1] != number - 1:
+            # The type wasn't found in the previous sample, so it grew from
+            # zero
+            self._streak = 1
+        elif count > self._counts[-1]:
+            self._streak += 1
+        else:
+            self._streak = 0
 
+        numbers.append(number)
+        self._counts.append(count)
 
-def renderTemplate(template, values):
-    '''Render a simple template
+        self._sum += count
+        self._squaredSum += count * count
+        self._weightedSum += number * count
 
-    :Parameters:
-        template : str
-          Template string
-        values : dict
-          Key/value pairs to fill placeholders
+        minima = self._minima
+        while minima and minima[-1][1] >= count:
+            minima.pop()
+        minima.append((number, count))
 
-    :return: Rendered template
-    :rtype: str
-    '''
-    for key, value in values.iteritems():
-        template = template.replace('{ %s }' % key, value)
+        maxima = self._maxima
+        while maxima and maxima[-1][1] <= count:
+            maxima.pop()
+        maxima.append((number, count))
 
-    return template
+    def expire(self, first):
+        '''Drop all samples numbered below `first`
 
+        :Parameters:
+            first : number
+              Number of the first sample to keep
+        '''
+        numbers = self._numbers
 
-class ObjectBrowser(object, service.Service, resource.Resource,
-                    LoggedServiceMixin):
-    '''Object browser service'''
+        if self._start == len(numbers) or numbers[self._start] >= first:
+            return
 
-    __slots__ = '_sampleInterval', '_sampleHistorySize', '_loop', '_history', \
-                   '_timestamps',
-    
-    def __init__(self, sampleInterval, sampleHistorySize):
+        start = self._start
+        self._start = bisect.bisect_left(numbers, first, start)
+
+        counts = self._counts
+        for i in xrange(start, self._start):
+            count = counts[i]
+            self._sum -= count
+            self._squaredSum -= count * count
+            self._weightedSum -= numbers[i] * count
+
+        for queue in self._minima, self._maxima:
+            while queue and queue[0][0] < first:
+                queue.popleft()
+
+        if self._start > len(numbers) / 2:
+            del numbers[:self._start]
+            del self._counts[:self._start]
+            self._start = 0
+
+    def dense(self, first, length):
+        '''Get a dense copy of a range of the series
+
+        :Parameters:
+            first : number
+              Number of the first sample of the range
+            length : number
+              Number of samples in the range
+
+        :return: Object counts, zero for samples not in the series
+        :rtype: `array.array`
+        '''
+        result = array.array('l', [0]) * length
+        numbers = self._numbers
+        counts = self._counts
+
+        for i in xrange(bisect.bisect_left(numbers, first, self._start),
+                        bisect.bisect_left(numbers, first + length,
+                                           self._start)):
+            result[numbers[i] - first] = counts[i]
+
+        return result
+
+    def __len__(self):
+        '''Get the number of stored samples'''
+        return len(self._numbers) - self._start
+
+    last = property(lambda self: self._numbers[-1] if self._numbers else None,
+                    doc='Number of the latest stored sample')
+    first = property(lambda self: self._numbers[self._start] \
+                                      if len(self) else None,
+                     doc='Number of the oldest stored sample')
+    latest = property(lambda self: self._counts[-1],
+                      doc='Latest stored object count')
+    earliest = property(lambda self: self._counts[self._start],
+                        doc='Oldest stored object count')
+    min = property(lambda self: self._minima[0][1],
+                   doc='Minimal stored object count')
+    max = property(lambda self: self._maxima[0][1],
+                   doc='Maximal stored object count')
+    counts = property(lambda self: self._counts[self._start:],
+                      doc='Stored object counts')
+    numbers = property(lambda self: self._numbers[self._start:],
+                       doc='Stored sample numbers')
+    sum = property(operator.attrgetter('_sum'),
+                   doc='Sum of the stored object counts')
+    squaredSum = property(operator.attrgetter('_squaredSum'),
+                          doc='Sum of the squares of the stored object counts')
+    weightedSum = property(operator.attrgetter('_weightedSum'),
+                           doc='Sum of the stored object counts multiplied by '
+                               'their sample numbers')
+    streak = property(operator.attrgetter('_streak'),
+                      doc='Number of consecutive samples, up to the latest '
+                          'stored one, in which the object count grew')
+
+
+class RollupHistory(object):
+    '''Downsampled store of type count samples
+
+    Samples are aggregated into buckets covering a fixed amount of time. For
+    every bucket the minimum, maximum and average count of every type is
+    kept, in three `SampleHistory` stores sharing bucket timestamps. Types
+    not found in a sample count as zero.
+
+    Aggregates of the current bucket are updated incrementally whenever a
+    sample is added, in O(1) per type found in it. The bucket is stored once
+    a sample falling in a later bucket is added. Until then, it's served as
+    the latest bucket. Buckets in which no sample was taken, e.g. while the
+    sample interval is wider than a bucket, are stored empty, so every
+    bucket kept covers the same amount of time. Samples taken before the
+    current bucket, if the clock went backwards, are added to the current
+    bucket, so buckets stay in chronological order.
+    '''
+
+    __slots__ = '_bucketSize', '_size', '_minima', '_maxima', '_averages', \
+                '_bucket', '_bucketSamples', '_accumulators', '_generation',
+
+    # Kind of the series returned by `series`
+    seriesKind = SERIES_RANGE
+
+    def __init__(self, bucketSize, size):
         '''
         :Parameters:
-            sampleInterval : number
-              Interval (in seconds) object count samples should be taken
-            sampleHistorySize : number
-              Number of samples to keep track of
+            bucketSize : number
+              Time (in seconds) covered by a bucket
+            size : number
+              Maximum number of buckets to keep, including the current one
         '''
-        self.msg('Initializing %s(%d, %d)' % \
-                 (self.__class__.__name__, sampleInterval, sampleHistorySize))
+        assert bucketSize > 0
+        assert size > 1
+        self._bucketSize = bucketSize
+        self._size = size
+
+        # Stored buckets, the current one comes on top
+        self._minima = SampleHistory(size - 1)
+        self._maxima = SampleHistory(size - 1)
+        self._averages = SampleHistory(size - 1)
+
+        # Index of the current bucket, number of samples added to it, and
+        # [min, max, sum, number of samples found in] per type found in it
+        self._bucket = None
+        self._bucketSamples = 0
+        self._accumulators = dict()
+        # Number of samples ever added
+        self._generation = 0
+
+    def append(self, timestamp, counts):
+        '''Add a sample
 
-        resource.Resource.__init__(self)
-        self.putChild('style', CSSResource())
-        self.putChild('script', ScriptResource())
-        self.putChild('image', ImageResource())
-        self.putChild('graphs', GraphResource(self))
+        :Parameters:
+            timestamp : number
+              Time at which the sample was taken
+            counts : dict
+              Mapping of type names to object counts
+        '''
+        bucket = int(timestamp // self.bucketSize)
 
-        self._sampleInterval = sampleInterval
-        self._sampleHistorySize = sampleHistorySize
+        if self._bucket is not None and bucket < self._bucket:
+            # The clock went backwards, keep the buckets in order
+            bucket = self._bucket
 
-        self._loop = task.LoopingCall(
-            lambda: safeCall(self.updateStats,
-             lambda exc: self.err(exc, 'Error while updating object stats')))
+        if bucket != self._bucket:
+            self.flush()
 
-        self._history = None
-        self._timestamps = None
+            if self._bucket is not None and bucket > self._bucket + 1:
+                # Older empty buckets would drop out right away
+                skipped = min(bucket - self._bucket - 1, self._maxima.size)
+                for empty in xrange(bucket - skipped, bucket):
+                    self._store(empty * self.bucketSize, {}, {}, {})
 
-    # IService
-    def startService(self):
-        '''Start the service'''
-        LoggedServiceMixin.startService(self)
+            self._bucket = bucket
 
-        self._history = dict()
-        self._timestamps = RingBuffer(self.sampleHistorySize)
+        accumulators = self._accumulators
 
-        self.loop.start(self.sampleInterval)
+        for typeName, count in counts.iteritems():
+            accumulator = accumulators.get(typeName, None)
 
-        return service.Service.startService(self)
+            if accumulator is None:
+                accumulators[typeName] = [count, count, count, 1]
+                continue
 
-    def stopService(self):
-        '''Stop the service'''
-        self.loop.stop()
+            if count < accumulator[0]:
+                accumulator[0] = count
+            if count > accumulator[1]:
+                accumulator[1] = count
+            accumulator[2] += count
+            accumulator[3] += 1
 
-        self._history = None
-        self._timestamps = None
+        self._bucketSamples += 1
+        self._generation += 1
 
-        LoggedServiceMixin.stopService(self)
-        
-        return service.Service.stopService(self)
+    def flush(self):
+        '''Store the aggregates of the current bucket, if any'''
+        if not self._bucketSamples:
+            return
 
+        minima, maxima, averages = dict(), dict(), dict()
 
-    # IResource
-    def getChild(self, name, request):
-        if name == '':
-            return self
+        for typeName, accumulator in self._accumulators.iteritems():
+            minima[typeName], averages[typeName], maxima[typeName] = \
+                self._aggregate(accumulator)
 
-        return resource.Resource.getChild(self, name, request)
+        self._store(self._bucket * self.bucketSize, minima, averages, maxima)
 
-    def render_GET(self, request):
-        '''Temporary GET resource'''
+        self._bucketSamples = 0
+        self._accumulators = dict()
 
-        def genContent():
-            # Make a type name slightly more human-readable
-            hr = lambda n: n if not n.startswith('__builtin__.') \
-                                else n[len('__builtin__.'):]
+    def _store(self, timestamp, minima, averages, maxima):
+        '''Store the aggregates of a bucket'''
+        self._minima.append(timestamp, minima)
+        self._averages.append(timestamp, averages)
+        self._maxima.append(timestamp, maxima)
 
-            history = sorted(self.history.iteritems(),
-                             key=lambda (t, _): hr(t))
+    def _aggregate(self, accumulator):
+        '''Get the minimum, average and maximum of a type in the current
+        bucket
 
-            # Some trickery to get everything in 3 columns
-            for i in xrange(3):
-                if i < 2:
-                    yield '<div class="span-8">'
-                else:
-                    yield '<div class="span-8 last">'
+        :Parameters:
+            accumulator : list
+              Accumulator of the type, or `None` if it wasn't found
 
-                for typeName, samples in history[i::3]:
-                    range_ = [0, ((max(samples) / 10) + 1) * 10]
-                    chart = pygooglechart.SimpleLineChart(300, 60,
-                                                          y_range=range_)
+        :return: Minimum, average and maximum count
+        :rtype: tuple
+        '''
+        if accumulator is None:
+            return 0, 0, 0
 
-                    if len(samples) < self.sampleHistorySize:
-                        data = list(samples)
-                        data.extend(itertools.repeat(
-                            None, self.sampleHistorySize - len(samples)))
-                    else:
-                        data = samples
+        min_, max_, sum_, found = accumulator
+        samples = self._bucketSamples
 
-                    chart.add_data(data)
-                    chart.set_axis_labels(pygooglechart.Axis.LEFT,
-                                          chart.y_range)
+        # The type wasn't found in some samples, which count as zero
+        return min_ if found == samples else 0, \
+               int(round(float(sum_) / samples)), max_
 
-                    graphElement = '<img src="%s" />' % chart.get_url()
+    def series(self, typeName, start=0, end=None):
+        '''Get the minima, averages and maxima of a type
 
-                    yield '''
-<div class="minigraph">
-    <strong>%(humanTypeName)s:</strong> %(min)d / %(max)d / %(current)d
-    <div>
-    <a href="graphs/%(uriTypeName)s" class="lightbox" title="%(typeName)s">
-        %(img)s
-    </a>
-    </div>
-</div>''' % {
-    'typeName': typeName,
-    'humanTypeName': hr(typeName),
-    'uriTypeName': cgi.escape(typeName),
-    'min': min(samples),
-    'max': max(samples),
-    'current': samples[-1],
-    'img': graphElement,
-}
-                yield '</div>'
+        :Parameters:
+            typeName : str
+              Name of the type
+            start : number
+              Index of the first retained bucket to return
+            end : number
+              Index of the retained bucket to stop at, defaults to all
+
+        :return: Bucket minima, averages and maxima, in chronological order
+        :rtype: list of `array.array`
+        '''
+        stored = self._maxima.numSamples
+        if end is None or end > self.numSamples:
+            end = self.numSamples
+        storedEnd = min(end, stored)
+        zeros = array.array('l', [0]) * max(storedEnd - start, 0)
 
-        return renderTemplate(BASE_TEMPLATE, {
-            'title': 'Heap Usage Statistics',
-            'root': '',
-            'body': '''
-<div class="span-24 last">
-    <h1>Heap Usage Statistics</h1>
-    <p>Object counts are min / max / current.</p>
-</div>
-%s''' % '\n'.join(genContent()),
-        })
-        return '\n'.join(genContent())
+        result = [store.samples(typeName, start, storedEnd) \
+                      if typeName in store else zeros[:]
+                  for store in (self._minima, self._averages, self._maxima)]
 
+        if end > stored and start < end:
+            for samples, value in zip(result, self._aggregate(
+                    self._accumulators.get(typeName, None))):
+                samples.append(value)
 
-    def updateStats(self):
-        '''Update object count statistics'''
-        self.debug('Updating object stats')
+        return result
+
+    def min(self, typeName):
+        '''Get the minimal retained count of a type'''
+        if self._maxima.numSamples and typeName not in self._minima:
+            return 0
+
+        min_ = self._aggregate(self._accumulators.get(typeName, None))[0]
+        if typeName in self._minima:
+            min_ = min(min_, self._minima.min(typeName))
 
-        gc.collect()
+        return min_
 
-        # Get all objects
-        allObjects = gc.get_objects()
-        # Calculate their type names
-        objectTypes = itertools.imap(getTypeName, allObjects)
-        # Sort all names (for itertools.groupby to work correctly)
-        sortedObjectTypes = sorted(objectTypes)
+    def max(self, typeName):
+        '''Get the maximal retained count of a type'''
+        max_ = self._aggregate(self._accumulators.get(typeName, None))[2]
+        if typeName in self._maxima:
+            max_ = max(max_, self._maxima.max(typeName))
 
-        # Group all object type names
-        groups = itertools.groupby(sortedObjectTypes)
+        return max_
 
-        # Put counts of types in the sample history
-        for typeName, objects in groups:
-            history = self._history.get(typeName, None)
+    def __contains__(self, typeName):
+        ''''''
+        return typeName in self._maxima or typeName in self._accumulators
+    __contains__.__doc__ = dict.__contains__.__doc__
 
-            if history is None:
-                history = RingBuffer(self.sampleHistorySize)
-                # Prefill the buffer with zeros so final length will match
-                # Note we didn't update self.timestamps yet
-                history.extend(itertools.repeat(0, len(self.timestamps)))
+    def __len__(self):
+        ''''''
+        return len(set(self._maxima).union(self._accumulators))
+    __len__.__doc__ = dict.__len__.__doc__
 
-                self.history[typeName] = history
+    def __iter__(self):
+        ''''''
+        return iter(set(self._maxima).union(self._accumulators))
+    __iter__.__doc__ = dict.__iter__.__doc__
+
+    def _timestamps(self):
+        '''Get the start timestamps of the retained buckets'''
+        timestamps = self._maxima.timestamps
+        if self._bucketSamples:
+            timestamps.append(self._bucket * self.bucketSize)
+
+        return timestamps
+
+    bucketSize = property(operator.attrgetter('_bucketSize'),
+                          doc='Time covered by a bucket')
+    size = property(operator.attrgetter('_size'),
+                    doc='Maximum number of buckets to keep')
+    span = property(lambda self: self.bucketSize * self.size,
+                    doc='Time covered by all buckets kept')
+    numSamples = property(lambda self: self._maxima.numSamples + \
+                                       (1 if self._bucketSamples else 0),
+                          doc='Number of retained buckets, including the '
+                              'current one')
+    generation = property(operator.attrgetter('_generation'),
+                          doc='Number of samples ever added')
+    timestamps = property(_timestamps,
+                          doc='Bucket start timestamps, in chronological '
+                              'order')
+
+
+class CollectionPolicy(object):
+    '''Garbage collection policy, deciding what to collect before a sample'''
+
+    __slots__ = ()
+
+    def select(self, sampleNumber):
+        '''Select the garbage collection generation to collect
 
-            history.append(count(objects))
+        :Parameters:
+            sampleNumber : number
+              Number of samples taken before the one about to be taken
 
+        :return: Generation to collect, or `None` not to collect at all
+        :rtype: number
+        '''
+        raise NotImplementedError
 
-        objectTypeSet = set(sortedObjectTypes)
-        # Can't use iteritems, modifying dict in the loop
-        for typeName, samples in self.history.items():
-            # Append 0 to every type we're tracking, but of which we no longer
-            # found an object
-            if typeName not in objectTypeSet:
-                samples.append(0)
+    def __repr__(self):
+        return '%s()' % self.__class__.__name__
 
-            # Prune object types for which we no longer have stats
-            if all(s == 0 for s in samples):
-                self.history.pop(typeName)
 
-        # Update timestamp bookkeeping
-        self.timestamps.append(time.time())
+class NeverCollect(CollectionPolicy):
+    '''Policy never collecting garbage before a sample'''
 
-        # Some sanity checking
-        numSamples = len(self.timestamps)
-        assert all(len(history) == numSamples
-                   for history in self.history.itervalues())
+    __slots__ = ()
 
-        self.debug('Tracking %d object types in %d samples' % \
-                   (len(self.history), numSamples))
+    def select(self, sampleNumber):
+        return None
+    select.__doc__ = CollectionPolicy.select.__doc__
 
+    def __str__(self):
+        return 'never collect'
 
-    sampleInterval = property(operator.attrgetter('_sampleInterval'),
-                              doc='Sample interval')
-    sampleHistorySize = property(operator.attrgetter('_sampleHistorySize'),
-                                 doc='Number of samples to keep track of')
-    loop = property(operator.attrgetter('_loop'), doc='Loop task')
-    history = property(operator.attrgetter('_history'), doc='Sample history')
-    timestamps = property(operator.attrgetter('_timestamps'),
-                          doc='Sample timestamps')
 
+class CollectGeneration(CollectionPolicy):
+    '''Policy collecting a given generation before every sample'''
 
-class GraphResource(resource.Resource):
-    '''A resource redirecting to larger graphs for a given type'''
-    def __init__(self, objectBrowser):
+    __slots__ = '_generation',
+
+    def __init__(self, generation):
         '''
         :Parameters:
-            objectBrowser : ObjectBrowser
-              ObjectBrowser managing type count history
+            generation : number
+              Garbage collection generation to collect (0, 1 or 2)
         '''
-        resource.Resource.__init__(self)
+        assert 0 <= generation <= 2
+        self._generation = generation
 
-        self.objectBrowser = objectBrowser
+    def select(self, sampleNumber):
+        return self.generation
+    select.__doc__ = CollectionPolicy.select.__doc__
 
-    def getChild(self, name, request):
-        if name in self.objectBrowser.history.iterkeys():
-            return self
+    def __repr__(self):
+        return '%s(%d)' % (self.__class__.__name__, self.generation)
 
-        return resource.Resource.getChild(self, name, resource)
+    def __str__(self):
+        return 'collect generation %d' % self.generation
 
-    def render_GET(self, request):
-        typeName = request.prepath[-1]
+    generation = property(operator.attrgetter('_generation'),
+                          doc='Generation to collect')
 
-        samples = self.objectBrowser.history[typeName]
 
-        range_ = [0, ((max(samples) / 10) + 1) * 10]
+class CollectEvery(CollectGeneration):
+    '''Policy collecting a given generation before every Kth sample'''
 
-        chart = pygooglechart.SimpleLineChart(700, 300, y_range=range_)
+    __slots__ = '_period',
 
-        chart.add_data(samples)
-        chart.set_axis_labels(pygooglechart.Axis.LEFT, chart.y_range)
+    def __init__(self, period, generation=2):
+        '''
+        :Parameters:
+            period : number
+              Number of samples between collections
+            generation : number
+              Garbage collection generation to collect (0, 1 or 2)
+        '''
+        assert period > 0
+        CollectGeneration.__init__(self, generation)
+        self._period = period
 
-        request.redirect(chart.get_url())
-        request.finish()
+    def select(self, sampleNumber):
+        if sampleNumber % self.period == 0:
+            return self.generation
 
+        return None
+    select.__doc__ = CollectionPolicy.select.__doc__
 
-class RingBuffer(object):
-    '''Simple ring buffer implementation'''
+    def __repr__(self):
+        return '%s(%d, %d)' % (self.__class__.__name__, self.period,
+                               self.generation)
 
-    __slots__ = '_maxSize', '_collection',
-    
-    def __init__(self, size):
-        '''
-        :Parameters:
-            size : number
-              Maximum size of the ringbuffer
-        '''
-        assert size > 0
-        self._maxSize = size
-        self._collection = collections.deque()
+    def __str__(self):
+        return 'collect generation %d every %d samples' % \
+                   (self.generation, self.period)
+
+    period = property(operator.attrgetter('_period'),
+                      doc='Number of samples between collections')
 
-    def append(self, x):
-        '''Append an item to the ring buffer
 
-        If the maximum number of items is exceeded, the buffer will be shifted.
+class CollectOverThreshold(CollectionPolicy):
+    '''Policy collecting based on the garbage collector counts
 
+    Thresholds are interpreted like the ones passed to `gc.set_threshold`,
+    and compared to the values returned by `gc.get_count`. The oldest
+    generation for which the count exceeds its threshold is collected.
+    '''
+
+    __slots__ = '_thresholds',
+
+    def __init__(self, *thresholds):
+        '''
         :Parameters:
-            x : object
-              Object to append to the buffer
+            thresholds : number
+              Up to 3 thresholds, for generation 0, 1 and 2. A threshold of
+              `None` disables collection of a generation.
         '''
-        self._collection.append(x)
+        assert 0 < len(thresholds) <= 3
+        self._thresholds = thresholds
 
-        if len(self) > self._maxSize:
-            self._collection.popleft()
+    def select(self, sampleNumber):
+        generation = None
 
-    def extend(self, xs):
-        ''''''
-        self._collection.extend(xs)
-    extend.__doc__ = collections.deque.extend.__doc__
+        for i, (count, threshold) in \
+            enumerate(zip(gc.get_count(), self.thresholds)):
+            if threshold is not None and count > threshold:
+                generation = i
 
-    def __len__(self):
-        ''''''
-        return self._collection.__len__()
-    __len__.__doc__ = collections.deque.__len__.__doc__
+        return generation
+    select.__doc__ = CollectionPolicy.select.__doc__
 
-    def __iter__(self):
-        ''''''
-        return self._collection.__iter__()
-    __iter__.__doc__ = collections.deque.__iter__.__doc__
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__,
+                           ', '.join(map(repr, self.thresholds)))
 
     def __str__(self):
-        ''''''
-        return self._collection.__str__()
-    __iter__.__doc__ = collections.deque.__str__.__doc__
-
-    def __getitem__(self, key):
-        ''''''
-        return self._collection.__getitem__(key)
-    __getitem__.__doc__ = collections.deque.__getitem__.__doc__
+        return 'collect when counts exceed %r' % (self.thresholds, )
 
-    # TODO This is not completely safe, e.g. in case extend() is called with
-    # > maxSize elements
+    thresholds = property(operator.attrgetter('_thresholds'),
+                          doc='Per-generation collection thresholds')
 
 
 class InlineResource(resource.Resource):
-    '''A resource serving hardcoded strings'''
+    '''A resource serving hardcoded strings
+
+    Every string is served by a `StaticResource`, prepared once per class.
+    '''
     RESOURCES = None
     CONTENT_TYPE = None
 
+    # Mapping of names to StaticResources, per class
+    _children = None
+
+    def __init__(self):
+        resource.Resource.__init__(self)
+
+        cls = self.__class__
+        if cls.__dict__.get('_children', None) is None:
+            cls._children = dict(
+                (name, StaticResource(body, self.CONTENT_TYPE))
+                for name, body in self.RESOURCES.iteritems())
+
     def getChild(self, name, request):
-        if name not in self.RESOURCES:
-            return NoResource()
+        child = self._children.get(name, None)
 
-        return self
+        if child is None:
+            return NoResource()
 
-    def render_GET(self, request):
-        request.setHeader('Content-Type', self.CONTENT_TYPE)
-        return self.RESOURCES[request.prepath[-1]]
+        return child
 
 class CSSResource(InlineResource):
     '''A resource serving static CSS files'''
@@ -503,6 +3990,90 @@ class ImageResource(InlineResource):
     CONTENT_TYPE = 'image/gif'
 
 
+class StaticResource(resource.Resource):
+    '''A resource serving a string which never changes
+
+    The response is identified by a content-hash entity tag, may be cached
+    for `STATIC_MAX_AGE` seconds, and is served gzip-compressed to clients
+    accepting it. Compression happens once, when the resource is created.
+    Both encodings are different representations, so the compressed one
+    gets an entity tag of its own.
+    '''
+
+    isLeaf = True
+
+    def __init__(self, body, contentType):
+        '''
+        :Parameters:
+            body : str
+              Content to serve
+            contentType : str
+              MIME type of `body`
+        '''
+        resource.Resource.__init__(self)
+
+        self.body = body
+        self.contentType = contentType
+        digest = hashlib.sha1(body).hexdigest()
+        self.etag = '"%s"' % digest
+        self.compressedEtag = '"%s-gz"' % digest
+
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        compressed = compressor.compress(body) + compressor.flush()
+        # Don't bother if compression doesn't help, e.g. for images
+        self.compressedBody = compressed if len(compressed) < len(body) \
+                                  else None
+
+    def render_GET(self, request):
+        request.setHeader('Content-Type', self.contentType)
+        request.setHeader('Cache-Control',
+                          'public, max-age=%d' % STATIC_MAX_AGE)
+
+        compressed = False
+        if self.compressedBody is not None:
+            request.setHeader('Vary', 'Accept-Encoding')
+            compressed = acceptsGzip(request)
+
+        if request.setETag(self.compressedEtag if compressed
+                           else self.etag) is http.CACHED:
+            return ''
+
+        if compressed:
+            request.setHeader('Content-Encoding', 'gzip')
+            return self.compressedBody
+
+        return self.body
+
+
+def acceptsGzip(request):
+    '''Check whether a client accepts gzip-encoded responses
+
+    :Parameters:
+        request : `twisted.web.server.Request`
+          Request to check
+
+    :return: Whether ``gzip`` is an acceptable content coding
+    :rtype: bool
+    '''
+    for coding in (request.getHeader('Accept-Encoding') or '').split(','):
+        parameters = [part.strip() for part in coding.split(';')]
+
+        if parameters[0].lower() not in ('gzip', 'x-gzip'):
+            continue
+
+        for parameter in parameters[1:]:
+            name, _, value = parameter.partition('=')
+            if name.strip() == 'q':
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+
+        return True
+
+    return False
+
+
 # Twistd compatibility
 if __name__ == '__builtin__':
     import random
@@ -547,7 +4118,7 @@ if __name__ == '__builtin__':
 
 
 # Some templates and static files come next
-BASE_TEMPLATE = '''
+BASE_TEMPLATE = Template('''
 <!DOCTYPE html
      PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN"
      "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">
@@ -566,10 +4137,8 @@ BASE_TEMPLATE = '''
     <link rel="stylesheet" type="text/css" media="screen, projection"
          href="{ root }style/lightbox.css" />
 
-    <script type="text/javascript" src="http://www.google.com/jsapi"></script>
-    <script type="text/javascript">
-    google.load("jquery", "1.3.2");
-    </script>
+    <script type="text/javascript"
+         src="{ root }script/jquery-1.6.4.min.js"></script>
     <script type="text/javascript"
          src="{ root }script/jquery.lightbox-0.5.min.js"></script>
 
@@ -601,7 +4170,7 @@ BASE_TEMPLATE = '''
 </div>
 </body>
 </html>
-'''
+''')
 
 
 ##############################################################################
@@ -1065,7 +4634,16 @@ button, input.button {position:relative;top:0.25em;}
 
 
 # Scripts
+#
+# jQuery is distributed under the MIT license, see http://jquery.org/license
 SCRIPT = {
+    'jquery-1.6.4.min.js': r'''
+/*! jQuery v1.6.4 http://jquery.com/ | http://jquery.org/license */
+(function(a,b){function cu(a){return f.isWindow(a)?a:a.nodeType===9?a.defaultView||a.parentWindow:!1}function cr(a){if(!cg[a]){var b=c.body,d=f("<"+a+">").appendTo(b),e=d.css("display");d.remove();if(e==="none"||e===""){ch||(ch=c.createElement("iframe"),ch.frameBorder=ch.width=ch.height=0),b.appendChild(ch);if(!ci||!ch.createElement)ci=(ch.contentWindow||ch.contentDocument).document,ci.write((c.compatMode==="CSS1Compat"?"<!doctype html>":"")+"<html><body>"),ci.close();d=ci.createElement(a),ci.body.appendChild(d),e=f.css(d,"display"),b.removeChild(ch)}cg[a]=e}return cg[a]}function cq(a,b){var c={};f.each(cm.concat.apply([],cm.slice(0,b)),function(){c[this]=a});return c}function cp(){cn=b}function co(){setTimeout(cp,0);return cn=f.now()}function cf(){try{return new a.ActiveXObject("Microsoft.XMLHTTP")}catch(b){}}function ce(){try{return new a.XMLHttpRequest}catch(b){}}function b$(a,c){a.dataFilter&&(c=a.dataFilter(c,a.dataType));var d=a.dataTypes,e={},g,h,i=d.length,j,k=d[0],l,m,n,o,p;for(g=1;g<i;g++){if(g===1)for(h in a.converters)typeof h=="string"&&(e[h.toLowerCase()]=a.converters[h]);l=k,k=d[g];if(k==="*")k=l;else if(l!=="*"&&l!==k){m=l+" "+k,n=e[m]||e["* "+k];if(!n){p=b;for(o in e){j=o.split(" ");if(j[0]===l||j[0]==="*"){p=e[j[1]+" "+k];if(p){o=e[o],o===!0?n=p:p===!0&&(n=o);break}}}}!n&&!p&&f.error("No conversion from "+m.replace(" "," to ")),n!==!0&&(c=n?n(c):p(o(c)))}}return c}function bZ(a,c,d){var e=a.contents,f=a.dataTypes,g=a.responseFields,h,i,j,k;for(i in g)i in d&&(c[g[i]]=d[i]);while(f[0]==="*")f.shift(),h===b&&(h=a.mimeType||c.getResponseHeader("content-type"));if(h)for(i in e)if(e[i]&&e[i].test(h)){f.unshift(i);break}if(f[0]in d)j=f[0];else{for(i in d){if(!f[0]||a.converters[i+" "+f[0]]){j=i;break}k||(k=i)}j=j||k}if(j){j!==f[0]&&f.unshift(j);return d[j]}}function bY(a,b,c,d){if(f.isArray(b))f.each(b,function(b,e){c||bA.test(a)?d(a,e):bY(a+"["+(typeof e=="object"||f.isArray(e)?b:"")+"]",e,c,d)});else if(!c&&b!=null&&typeof b=="object")for(var e in b)bY(a+"["+e+"]",b[e],c,d);else d(a,b)}function bX(a,c){var d,e,g=f.ajaxSettings.flatOptions||{};for(d in c)c[d]!==b&&((g[d]?a:e||(e={}))[d]=c[d]);e&&f.extend(!0,a,e)}function bW(a,c,d,e,f,g){f=f||c.dataTypes[0],g=g||{},g[f]=!0;var h=a[f],i=0,j=h?h.length:0,k=a===bP,l;for(;i<j&&(k||!l);i++)l=h[i](c,d,e),typeof l=="string"&&(!k||g[l]?l=b:(c.dataTypes.unshift(l),l=bW(a,c,d,e,l,g)));(k||!l)&&!g["*"]&&(l=bW(a,c,d,e,"*",g));return l}function bV(a){return function(b,c){typeof b!="string"&&(c=b,b="*");if(f.isFunction(c)){var d=b.toLowerCase().split(bL),e=0,g=d.length,h,i,j;for(;e<g;e++)h=d[e],j=/^\+/.test(h),j&&(h=h.substr(1)||"*"),i=a[h]=a[h]||[],i[j?"unshift":"push"](c)}}}function by(a,b,c){var d=b==="width"?a.offsetWidth:a.offsetHeight,e=b==="width"?bt:bu;if(d>0){c!=="border"&&f.each(e,function(){c||(d-=parseFloat(f.css(a,"padding"+this))||0),c==="margin"?d+=parseFloat(f.css(a,c+this))||0:d-=parseFloat(f.css(a,"border"+this+"Width"))||0});return d+"px"}d=bv(a,b,b);if(d<0||d==null)d=a.style[b]||0;d=parseFloat(d)||0,c&&f.each(e,function(){d+=parseFloat(f.css(a,"padding"+this))||0,c!=="padding"&&(d+=parseFloat(f.css(a,"border"+this+"Width"))||0),c==="margin"&&(d+=parseFloat(f.css(a,c+this))||0)});return d+"px"}function bl(a,b){b.src?f.ajax({url:b.src,async:!1,dataType:"script"}):f.globalEval((b.text||b.textContent||b.innerHTML||"").replace(bd,"/*$0*/")),b.parentNode&&b.parentNode.removeChild(b)}function bk(a){f.nodeName(a,"input")?bj(a):"getElementsByTagName"in a&&f.grep(a.getElementsByTagName("input"),bj)}function bj(a){if(a.type==="checkbox"||a.type==="radio")a.defaultChecked=a.checked}function bi(a){return"getElementsByTagName"in a?a.getElementsByTagName("*"):"querySelectorAll"in a?a.querySelectorAll("*"):[]}function bh(a,b){var c;if(b.nodeType===1){b.clearAttributes&&b.clearAttributes(),b.mergeAttributes&&b.mergeAttributes(a),c=b.nodeName.toLowerCase();if(c==="object")b.outerHTML=a.outerHTML;else if(c!=="input"||a.type!=="checkbox"&&a.type!=="radio"){if(c==="option")b.selected=a.defaultSelected;else if(c==="input"||c==="textarea")b.defaultValue=a.defaultValue}else a.checked&&(b.defaultChecked=b.checked=a.checked),b.value!==a.value&&(b.value=a.value);b.removeAttribute(f.expando)}}function bg(a,b){if(b.nodeType===1&&!!f.hasData(a)){var c=f.expando,d=f.data(a),e=f.data(b,d);if(d=d[c]){var g=d.events;e=e[c]=f.extend({},d);if(g){delete e.handle,e.events={};for(var h in g)for(var i=0,j=g[h].length;i<j;i++)f.event.add(b,h+(g[h][i].namespace?".":"")+g[h][i].namespace,g[h][i],g[h][i].data)}}}}function bf(a,b){return f.nodeName(a,"table")?a.getElementsByTagName("tbody")[0]||a.appendChild(a.ownerDocument.createElement("tbody")):a}function V(a,b,c){b=b||0;if(f.isFunction(b))return f.grep(a,function(a,d){var e=!!b.call(a,d,a);return e===c});if(b.nodeType)return f.grep(a,function(a,d){return a===b===c});if(typeof b=="string"){var d=f.grep(a,function(a){return a.nodeType===1});if(Q.test(b))return f.filter(b,d,!c);b=f.filter(b,d)}return f.grep(a,function(a,d){return f.inArray(a,b)>=0===c})}function U(a){return!a||!a.parentNode||a.parentNode.nodeType===11}function M(a,b){return(a&&a!=="*"?a+".":"")+b.replace(y,"`").replace(z,"&")}function L(a){var b,c,d,e,g,h,i,j,k,l,m,n,o,p=[],q=[],r=f._data(this,"events");if(!(a.liveFired===this||!r||!r.live||a.target.disabled||a.button&&a.type==="click")){a.namespace&&(n=new RegExp("(^|\\.)"+a.namespace.split(".").join("\\.(?:.*\\.)?")+"(\\.|$)")),a.liveFired=this;var s=r.live.slice(0);for(i=0;i<s.length;i++)g=s[i],g.origType.replace(w,"")===a.type?q.push(g.selector):s.splice(i--,1);e=f(a.target).closest(q,a.currentTarget);for(j=0,k=e.length;j<k;j++){m=e[j];for(i=0;i<s.length;i++){g=s[i];if(m.selector===g.selector&&(!n||n.test(g.namespace))&&!m.elem.disabled){h=m.elem,d=null;if(g.preType==="mouseenter"||g.preType==="mouseleave")a.type=g.preType,d=f(a.relatedTarget).closest(g.selector)[0],d&&f.contains(h,d)&&(d=h);(!d||d!==h)&&p.push({elem:h,handleObj:g,level:m.level})}}}for(j=0,k=p.length;j<k;j++){e=p[j];if(c&&e.level>c)break;a.currentTarget=e.elem,a.data=e.handleObj.data,a.handleObj=e.handleObj,o=e.handleObj.origHandler.apply(e.elem,arguments);if(o===!1||a.isPropagationStopped()){c=e.level,o===!1&&(b=!1);if(a.isImmediatePropagationStopped())break}}return b}}function J(a,c,d){var e=f.extend({},d[0]);e.type=a,e.originalEvent={},e.liveFired=b,f.event.handle.call(c,e),e.isDefaultPrevented()&&d[0].preventDefault()}function D(){return!0}function C(){return!1}function m(a,c,d){var e=c+"defer",g=c+"queue",h=c+"mark",i=f.data(a,e,b,!0);i&&(d==="queue"||!f.data(a,g,b,!0))&&(d==="mark"||!f.data(a,h,b,!0))&&setTimeout(function(){!f.data(a,g,b,!0)&&!f.data(a,h,b,!0)&&(f.removeData(a,e,!0),i.resolve())},0)}function l(a){for(var b in a)if(b!=="toJSON")return!1;return!0}function k(a,c,d){if(d===b&&a.nodeType===1){var e="data-"+c.replace(j,"-$1").toLowerCase();d=a.getAttribute(e);if(typeof d=="string"){try{d=d==="true"?!0:d==="false"?!1:d==="null"?null:f.isNaN(d)?i.test(d)?f.parseJSON(d):d:parseFloat(d)}catch(g){}f.data(a,c,d)}else d=b}return d}var c=a.document,d=a.navigator,e=a.location,f=function(){function K(){if(!e.isReady){try{c.documentElement.doScroll("left")}catch(a){setTimeout(K,1);return}e.ready()}}var e=function(a,b){return new e.fn.init(a,b,h)},f=a.jQuery,g=a.$,h,i=/^(?:[^#<]*(<[\w\W]+>)[^>]*$|#([\w\-]*)$)/,j=/\S/,k=/^\s+/,l=/\s+$/,m=/\d/,n=/^<(\w+)\s*\/?>(?:<\/\1>)?$/,o=/^[\],:{}\s]*$/,p=/\\(?:["\\\/bfnrt]|u[0-9a-fA-F]{4})/g,q=/"[^"\\\n\r]*"|true|false|null|-?\d+(?:\.\d*)?(?:[eE][+\-]?\d+)?/g,r=/(?:^|:|,)(?:\s*\[)+/g,s=/(webkit)[ \/]([\w.]+)/,t=/(opera)(?:.*version)?[ \/]([\w.]+)/,u=/(msie) ([\w.]+)/,v=/(mozilla)(?:.*? rv:([\w.]+))?/,w=/-([a-z]|[0-9])/ig,x=/^-ms-/,y=function(a,b){return(b+"").toUpperCase()},z=d.userAgent,A,B,C,D=Object.prototype.toString,E=Object.prototype.hasOwnProperty,F=Array.prototype.push,G=Array.prototype.slice,H=String.prototype.trim,I=Array.prototype.indexOf,J={};e.fn=e.prototype={constructor:e,init:function(a,d,f){var g,h,j,k;if(!a)return this;if(a.nodeType){this.context=this[0]=a,this.length=1;return this}if(a==="body"&&!d&&c.body){this.context=c,this[0]=c.body,this.selector=a,this.length=1;return this}if(typeof a=="string"){a.charAt(0)!=="<"||a.charAt(a.length-1)!==">"||a.length<3?g=i.exec(a):g=[null,a,null];if(g&&(g[1]||!d)){if(g[1]){d=d instanceof e?d[0]:d,k=d?d.ownerDocument||d:c,j=n.exec(a),j?e.isPlainObject(d)?(a=[c.createElement(j[1])],e.fn.attr.call(a,d,!0)):a=[k.createElement(j[1])]:(j=e.buildFragment([g[1]],[k]),a=(j.cacheable?e.clone(j.fragment):j.fragment).childNodes);return e.merge(this,a)}h=c.getElementById(g[2]);if(h&&h.parentNode){if(h.id!==g[2])return f.find(a);this.length=1,this[0]=h}this.context=c,this.selector=a;return this}return!d||d.jquery?(d||f).find(a):this.constructor(d).find(a)}if(e.isFunction(a))return f.ready(a);a.selector!==b&&(this.selector=a.selector,this.context=a.context);return e.makeArray(a,this)},selector:"",jquery:"1.6.4",length:0,size:function(){return this.length},toArray:function(){return G.call(this,0)},get:function(a){return a==null?this.toArray():a<0?this[this.length+a]:this[a]},pushStack:function(a,b,c){var d=this.constructor();e.isArray(a)?F.apply(d,a):e.merge(d,a),d.prevObject=this,d.context=this.context,b==="find"?d.selector=this.selector+(this.selector?" ":"")+c:b&&(d.selector=this.selector+"."+b+"("+c+")");return d},each:function(a,b){return e.each(this,a,b)},ready:function(a){e.bindReady(),B.done(a);return this},eq:function(a){return a===-1?this.slice(a):this.slice(a,+a+1)},first:function(){return this.eq(0)},last:function(){return this.eq(-1)},slice:function(){return this.pushStack(G.apply(this,arguments),"slice",G.call(arguments).join(","))},map:function(a){return this.pushStack(e.map(this,function(b,c){return a.call(b,c,b)}))},end:function(){return this.prevObject||this.constructor(null)},push:F,sort:[].sort,splice:[].splice},e.fn.init.prototype=e.fn,e.extend=e.fn.extend=function(){var a,c,d,f,g,h,i=arguments[0]||{},j=1,k=arguments.length,l=!1;typeof i=="boolean"&&(l=i,i=arguments[1]||{},j=2),typeof i!="object"&&!e.isFunction(i)&&(i={}),k===j&&(i=this,--j);for(;j<k;j++)if((a=arguments[j])!=null)for(c in a){d=i[c],f=a[c];if(i===f)continue;l&&f&&(e.isPlainObject(f)||(g=e.isArray(f)))?(g?(g=!1,h=d&&e.isArray(d)?d:[]):h=d&&e.isPlainObject(d)?d:{},i[c]=e.extend(l,h,f)):f!==b&&(i[c]=f)}return i},e.extend({noConflict:function(b){a.$===e&&(a.$=g),b&&a.jQuery===e&&(a.jQuery=f);return e},isReady:!1,readyWait:1,holdReady:function(a){a?e.readyWait++:e.ready(!0)},ready:function(a){if(a===!0&&!--e.readyWait||a!==!0&&!e.isReady){if(!c.body)return setTimeout(e.ready,1);e.isReady=!0;if(a!==!0&&--e.readyWait>0)return;B.resolveWith(c,[e]),e.fn.trigger&&e(c).trigger("ready").unbind("ready")}},bindReady:function(){if(!B){B=e._Deferred();if(c.readyState==="complete")return setTimeout(e.ready,1);if(c.addEventListener)c.addEventListener("DOMContentLoaded",C,!1),a.addEventListener("load",e.ready,!1);else if(c.attachEvent){c.attachEvent("onreadystatechange",C),a.attachEvent("onload",e.ready);var b=!1;try{b=a.frameElement==null}catch(d){}c.documentElement.doScroll&&b&&K()}}},isFunction:function(a){return e.type(a)==="function"},isArray:Array.isArray||function(a){return e.type(a)==="array"},isWindow:function(a){return a&&typeof a=="object"&&"setInterval"in a},isNaN:function(a){return a==null||!m.test(a)||isNaN(a)},type:function(a){return a==null?String(a):J[D.call(a)]||"object"},isPlainObject:function(a){if(!a||e.type(a)!=="object"||a.nodeType||e.isWindow(a))return!1;try{if(a.constructor&&!E.call(a,"constructor")&&!E.call(a.constructor.prototype,"isPrototypeOf"))return!1}catch(c){return!1}var d;for(d in a);return d===b||E.call(a,d)},isEmptyObject:function(a){for(var b in a)return!1;return!0},error:function(a){throw a},parseJSON:function(b){if(typeof b!="string"||!b)return null;b=e.trim(b);if(a.JSON&&a.JSON.parse)return a.JSON.parse(b);if(o.test(b.replace(p,"@").replace(q,"]").replace(r,"")))return(new Function("return "+b))();e.error("Invalid JSON: "+b)},parseXML:function(c){var d,f;try{a.DOMParser?(f=new DOMParser,d=f.parseFromString(c,"text/xml")):(d=new ActiveXObject("Microsoft.XMLDOM"),d.async="false",d.loadXML(c))}catch(g){d=b}(!d||!d.documentElement||d.getElementsByTagName("parsererror").length)&&e.error("Invalid XML: "+c);return d},noop:function(){},globalEval:function(b){b&&j.test(b)&&(a.execScript||function(b){a.eval.call(a,b)})(b)},camelCase:function(a){return a.replace(x,"ms-").replace(w,y)},nodeName:function(a,b){return a.nodeName&&a.nodeName.toUpperCase()===b.toUpperCase()},each:function(a,c,d){var f,g=0,h=a.length,i=h===b||e.isFunction(a);if(d){if(i){for(f in a)if(c.apply(a[f],d)===!1)break}else for(;g<h;)if(c.apply(a[g++],d)===!1)break}else if(i){for(f in a)if(c.call(a[f],f,a[f])===!1)break}else for(;g<h;)if(c.call(a[g],g,a[g++])===!1)break;return a},trim:H?function(a){return a==null?"":H.call(a)}:function(a){return a==null?"":(a+"").replace(k,"").replace(l,"")},makeArray:function(a,b){var c=b||[];if(a!=null){var d=e.type(a);a.length==null||d==="string"||d==="function"||d==="regexp"||e.isWindow(a)?F.call(c,a):e.merge(c,a)}return c},inArray:function(a,b){if(!b)return-1;if(I)return I.call(b,a);for(var c=0,d=b.length;c<d;c++)if(b[c]===a)return c;return-1},merge:function(a,c){var d=a.length,e=0;if(typeof c.length=="number")for(var f=c.length;e<f;e++)a[d++]=c[e];else while(c[e]!==b)a[d++]=c[e++];a.length=d;return a},grep:function(a,b,c){var d=[],e;c=!!c;for(var f=0,g=a.length;f<g;f++)e=!!b(a[f],f),c!==e&&d.push(a[f]);return d},map:function(a,c,d){var f,g,h=[],i=0,j=a.length,k=a instanceof e||j!==b&&typeof j=="number"&&(j>0&&a[0]&&a[j-1]||j===0||e.isArray(a));if(k)for(;i<j;i++)f=c(a[i],i,d),f!=null&&(h[h.length]=f);else for(g in a)f=c(a[g],g,d),f!=null&&(h[h.length]=f);return h.concat.apply([],h)},guid:1,proxy:function(a,c){if(typeof c=="string"){var d=a[c];c=a,a=d}if(!e.isFunction(a))return b;var f=G.call(arguments,2),g=function(){return a.apply(c,f.concat(G.call(arguments)))};g.guid=a.guid=a.guid||g.guid||e.guid++;return g},access:function(a,c,d,f,g,h){var i=a.length;if(typeof c=="object"){for(var j in c)e.access(a,j,c[j],f,g,d);return a}if(d!==b){f=!h&&f&&e.isFunction(d);for(var k=0;k<i;k++)g(a[k],c,f?d.call(a[k],k,g(a[k],c)):d,h);return a}return i?g(a[0],c):b},now:function(){return(new Date).getTime()},uaMatch:function(a){a=a.toLowerCase();var b=s.exec(a)||t.exec(a)||u.exec(a)||a.indexOf("compatible")<0&&v.exec(a)||[];return{browser:b[1]||"",version:b[2]||"0"}},sub:function(){function a(b,c){return new a.fn.init(b,c)}e.extend(!0,a,this),a.superclass=this,a.fn=a.prototype=this(),a.fn.constructor=a,a.sub=this.sub,a.fn.init=function(d,f){f&&f instanceof e&&!(f instanceof a)&&(f=a(f));return e.fn.init.call(this,d,f,b)},a.fn.init.prototype=a.fn;var b=a(c);return a},browser:{}}),e.each("Boolean Number String Function Array Date RegExp Object".split(" "),function(a,b){J["[object "+b+"]"]=b.toLowerCase()}),A=e.uaMatch(z),A.browser&&(e.browser[A.browser]=!0,e.browser.version=A.version),e.browser.webkit&&(e.browser.safari=!0),j.test("\xA0")&&(k=/^[\s\xA0]+/,l=/[\s\xA0]+$/),h=e(c),c.addEventListener?C=function(){c.removeEventListener("DOMContentLoaded",C,!1),e.ready()}:c.attachEvent&&(C=function(){c.readyState==="complete"&&(c.detachEvent("onreadystatechange",C),e.ready())});return e}(),g="done fail isResolved isRejected promise then always pipe".split(" "),h=[].slice;f.extend({_Deferred:function(){var a=[],b,c,d,e={done:function(){if(!d){var c=arguments,g,h,i,j,k;b&&(k=b,b=0);for(g=0,h=c.length;g<h;g++)i=c[g],j=f.type(i),j==="array"?e.done.apply(e,i):j==="function"&&a.push(i);k&&e.resolveWith(k[0],k[1])}return this},resolveWith:function(e,f){if(!d&&!b&&!c){f=f||[],c=1;try{while(a[0])a.shift().apply(e,f)}finally{b=[e,f],c=0}}return this},resolve:function(){e.resolveWith(this,arguments);return this},isResolved:function(){return!!c||!!b},cancel:function(){d=1,a=[];return this}};return e},Deferred:function(a){var b=f._Deferred(),c=f._Deferred(),d;f.extend(b,{then:function(a,c){b.done(a).fail(c);return this},always:function(){return b.done.apply(b,arguments).fail.apply(this,arguments)},fail:c.done,rejectWith:c.resolveWith,reject:c.resolve,isRejected:c.isResolved,pipe:function(a,c){return f.Deferred(function(d){f.each({done:[a,"resolve"],fail:[c,"reject"]},function(a,c){var e=c[0],g=c[1],h;f.isFunction(e)?b[a](function(){h=e.apply(this,arguments),h&&f.isFunction(h.promise)?h.promise().then(d.resolve,d.reject):d[g+"With"](this===b?d:this,[h])}):b[a](d[g])})}).promise()},promise:function(a){if(a==null){if(d)return d;d=a={}}var c=g.length;while(c--)a[g[c]]=b[g[c]];return a}}),b.done(c.cancel).fail(b.cancel),delete b.cancel,a&&a.call(b,b);return b},when:function(a){function i(a){return function(c){b[a]=arguments.length>1?h.call(arguments,0):c,--e||g.resolveWith(g,h.call(b,0))}}var b=arguments,c=0,d=b.length,e=d,g=d<=1&&a&&f.isFunction(a.promise)?a:f.Deferred();if(d>1){for(;c<d;c++)b[c]&&f.isFunction(b[c].promise)?b[c].promise().then(i(c),g.reject):--e;e||g.resolveWith(g,b)}else g!==a&&g.resolveWith(g,d?[a]:[]);return g.promise()}}),f.support=function(){var a=c.createElement("div"),b=c.documentElement,d,e,g,h,i,j,k,l,m,n,o,p,q,r,s,t,u;a.setAttribute("className","t"),a.innerHTML="   <link/><table></table><a href='/a' style='top:1px;float:left;opacity:.55;'>a</a><input type='checkbox'/>",d=a.getElementsByTagName("*"),e=a.getElementsByTagName("a")[0];if(!d||!d.length||!e)return{};g=c.createElement("select"),h=g.appendChild(c.createElement("option")),i=a.getElementsByTagName("input")[0],k={leadingWhitespace:a.firstChild.nodeType===3,tbody:!a.getElementsByTagName("tbody").length,htmlSerialize:!!a.getElementsByTagName("link").length,style:/top/.test(e.getAttribute("style")),hrefNormalized:e.getAttribute("href")==="/a",opacity:/^0.55$/.test(e.style.opacity),cssFloat:!!e.style.cssFloat,checkOn:i.value==="on",optSelected:h.selected,getSetAttribute:a.className!=="t",submitBubbles:!0,changeBubbles:!0,focusinBubbles:!1,deleteExpando:!0,noCloneEvent:!0,inlineBlockNeedsLayout:!1,shrinkWrapBlocks:!1,reliableMarginRight:!0},i.checked=!0,k.noCloneChecked=i.cloneNode(!0).checked,g.disabled=!0,k.optDisabled=!h.disabled;try{delete a.test}catch(v){k.deleteExpando=!1}!a.addEventListener&&a.attachEvent&&a.fireEvent&&(a.attachEvent("onclick",function(){k.noCloneEvent=!1}),a.cloneNode(!0).fireEvent("onclick")),i=c.createElement("input"),i.value="t",i.setAttribute("type","radio"),k.radioValue=i.value==="t",i.setAttribute("checked","checked"),a.appendChild(i),l=c.createDocumentFragment(),l.appendChild(a.firstChild),k.checkClone=l.cloneNode(!0).cloneNode(!0).lastChild.checked,a.innerHTML="",a.style.width=a.style.paddingLeft="1px",m=c.getElementsByTagName("body")[0],o=c.createElement(m?"div":"body"),p={visibility:"hidden",width:0,height:0,border:0,margin:0,background:"none"},m&&f.extend(p,{position:"absolute",left:"-1000px",top:"-1000px"});for(t in p)o.style[t]=p[t];o.appendChild(a),n=m||b,n.insertBefore(o,n.firstChild),k.appendChecked=i.checked,k.boxModel=a.offsetWidth===2,"zoom"in a.style&&(a.style.display="inline",a.style.zoom=1,k.inlineBlockNeedsLayout=a.offsetWidth===2,a.style.display="",a.innerHTML="<div style='width:4px;'></div>",k.shrinkWrapBlocks=a.offsetWidth!==2),a.innerHTML="<table><tr><td style='padding:0;border:0;display:none'></td><td>t</td></tr></table>",q=a.getElementsByTagName("td"),u=q[0].offsetHeight===0,q[0].style.display="",q[1].style.display="none",k.reliableHiddenOffsets=u&&q[0].offsetHeight===0,a.innerHTML="",c.defaultView&&c.defaultView.getComputedStyle&&(j=c.createElement("div"),j.style.width="0",j.style.marginRight="0",a.appendChild(j),k.reliableMarginRight=(parseInt((c.defaultView.getComputedStyle(j,null)||{marginRight:0}).marginRight,10)||0)===0),o.innerHTML="",n.removeChild(o);if(a.attachEvent)for(t in{submit:1,change:1,focusin:1})s="on"+t,u=s in a,u||(a.setAttribute(s,"return;"),u=typeof a[s]=="function"),k[t+"Bubbles"]=u;o=l=g=h=m=j=a=i=null;return k}(),f.boxModel=f.support.boxModel;var i=/^(?:\{.*\}|\[.*\])$/,j=/([A-Z])/g;f.extend({cache:{},uuid:0,expando:"jQuery"+(f.fn.jquery+Math.random()).replace(/\D/g,""),noData:{embed:!0,object:"clsid:D27CDB6E-AE6D-11cf-96B8-444553540000",applet:!0},hasData:function(a){a=a.nodeType?f.cache[a[f.expando]]:a[f.expando];return!!a&&!l(a)},data:function(a,c,d,e){if(!!f.acceptData(a)){var g,h,i=f.expando,j=typeof c=="string",k=a.nodeType,l=k?f.cache:a,m=k?a[f.expando]:a[f.expando]&&f.expando;if((!m||e&&m&&l[m]&&!l[m][i])&&j&&d===b)return;m||(k?a[f.expando]=m=++f.uuid:m=f.expando),l[m]||(l[m]={},k||(l[m].toJSON=f.noop));if(typeof c=="object"||typeof c=="function")e?l[m][i]=f.extend(l[m][i],c):l[m]=f.extend(l[m],c);g=l[m],e&&(g[i]||(g[i]={}),g=g[i]),d!==b&&(g[f.camelCase(c)]=d);if(c==="events"&&!g[c])return g[i]&&g[i].events;j?(h=g[c],h==null&&(h=g[f.camelCase(c)])):h=g;return h}},removeData:function(a,b,c){if(!!f.acceptData(a)){var d,e=f.expando,g=a.nodeType,h=g?f.cache:a,i=g?a[f.expando]:f.expando;if(!h[i])return;if(b){d=c?h[i][e]:h[i];if(d){d[b]||(b=f.camelCase(b)),delete d[b];if(!l(d))return}}if(c){delete h[i][e];if(!l(h[i]))return}var j=h[i][e];f.support.deleteExpando||!h.setInterval?delete h[i]:h[i]=null,j?(h[i]={},g||(h[i].toJSON=f.noop),h[i][e]=j):g&&(f.support.deleteExpando?delete a[f.expando]:a.removeAttribute?a.removeAttribute(f.expando):a[f.expando]=null)}},_data:function(a,b,c){return f.data(a,b,c,!0)},acceptData:function(a){if(a.nodeName){var b=f.noData[a.nodeName.toLowerCase()];if(b)return b!==!0&&a.getAttribute("classid")===b}return!0}}),f.fn.extend({data:function(a,c){var d=null;if(typeof a=="undefined"){if(this.length){d=f.data(this[0]);if(this[0].nodeType===1){var e=this[0].attributes,g;for(var h=0,i=e.length;h<i;h++)g=e[h].name,g.indexOf("data-")===0&&(g=f.camelCase(g.substring(5)),k(this[0],g,d[g]))}}return d}if(typeof a=="object")return this.each(function(){f.data(this,a)});var j=a.split(".");j[1]=j[1]?"."+j[1]:"";if(c===b){d=this.triggerHandler("getData"+j[1]+"!",[j[0]]),d===b&&this.length&&(d=f.data(this[0],a),d=k(this[0],a,d));return d===b&&j[1]?this.data(j[0]):d}return this.each(function(){var b=f(this),d=[j[0],c];b.triggerHandler("setData"+j[1]+"!",d),f.data(this,a,c),b.triggerHandler("changeData"+j[1]+"!",d)})},removeData:function(a){return this.each(function(){f.removeData(this,a)})}}),f.extend({_mark:function(a,c){a&&(c=(c||"fx")+"mark",f.data(a,c,(f.data(a,c,b,!0)||0)+1,!0))},_unmark:function(a,c,d){a!==!0&&(d=c,c=a,a=!1);if(c){d=d||"fx";var e=d+"mark",g=a?0:(f.data(c,e,b,!0)||1)-1;g?f.data(c,e,g,!0):(f.removeData(c,e,!0),m(c,d,"mark"))}},queue:function(a,c,d){if(a){c=(c||"fx")+"queue";var e=f.data(a,c,b,!0);d&&(!e||f.isArray(d)?e=f.data(a,c,f.makeArray(d),!0):e.push(d));return e||[]}},dequeue:function(a,b){b=b||"fx";var c=f.queue(a,b),d=c.shift(),e;d==="inprogress"&&(d=c.shift()),d&&(b==="fx"&&c.unshift("inprogress"),d.call(a,function(){f.dequeue(a,b)})),c.length||(f.removeData(a,b+"queue",!0),m(a,b,"queue"))}}),f.fn.extend({queue:function(a,c){typeof a!="string"&&(c=a,a="fx");if(c===b)return f.queue(this[0],a);return this.each(function(){var b=f.queue(this,a,c);a==="fx"&&b[0]!=="inprogress"&&f.dequeue(this,a)})},dequeue:function(a){return this.each(function(){f.dequeue(this,a)})},delay:function(a,b){a=f.fx?f.fx.speeds[a]||a:a,b=b||"fx";return this.queue(b,function(){var c=this;setTimeout(function(){f.dequeue(c,b)},a)})},clearQueue:function(a){return this.queue(a||"fx",[])},promise:function(a,c){function m(){--h||d.resolveWith(e,[e])}typeof a!="string"&&(c=a,a=b),a=a||"fx";var d=f.Deferred(),e=this,g=e.length,h=1,i=a+"defer",j=a+"queue",k=a+"mark",l;while(g--)if(l=f.data(e[g],i,b,!0)||(f.data(e[g],j,b,!0)||f.data(e[g],k,b,!0))&&f.data(e[g],i,f._Deferred(),!0))h++,l.done(m);m();return d.promise()}});var n=/[\n\t\r]/g,o=/\s+/,p=/\r/g,q=/^(?:button|input)$/i,r=/^(?:button|input|object|select|textarea)$/i,s=/^a(?:rea)?$/i,t=/^(?:autofocus|autoplay|async|checked|controls|defer|disabled|hidden|loop|multiple|open|readonly|required|scoped|selected)$/i,u,v;f.fn.extend({attr:function(a,b){return f.access(this,a,b,!0,f.attr)},removeAttr:function(a){return this.each(function(){f.removeAttr(this,a)})},prop:function(a,b){return f.access(this,a,b,!0,f.prop)},removeProp:function(a){a=f.propFix[a]||a;return this.each(function(){try{this[a]=b,delete this[a]}catch(c){}})},addClass:function(a){var b,c,d,e,g,h,i;if(f.isFunction(a))return this.each(function(b){f(this).addClass(a.call(this,b,this.className))});if(a&&typeof a=="string"){b=a.split(o);for(c=0,d=this.length;c<d;c++){e=this[c];if(e.nodeType===1)if(!e.className&&b.length===1)e.className=a;else{g=" "+e.className+" ";for(h=0,i=b.length;h<i;h++)~g.indexOf(" "+b[h]+" ")||(g+=b[h]+" ");e.className=f.trim(g)}}}return this},removeClass:function(a){var c,d,e,g,h,i,j;if(f.isFunction(a))return this.each(function(b){f(this).removeClass(a.call(this,b,this.className))});if(a&&typeof a=="string"||a===b){c=(a||"").split(o);for(d=0,e=this.length;d<e;d++){g=this[d];if(g.nodeType===1&&g.className)if(a){h=(" "+g.className+" ").replace(n," ");for(i=0,j=c.length;i<j;i++)h=h.replace(" "+c[i]+" "," ");g.className=f.trim(h)}else g.className=""}}return this},toggleClass:function(a,b){var c=typeof a,d=typeof b=="boolean";if(f.isFunction(a))return this.each(function(c){f(this).toggleClass(a.call(this,c,this.className,b),b)});return this.each(function(){if(c==="string"){var e,g=0,h=f(this),i=b,j=a.split(o);while(e=j[g++])i=d?i:!h.hasClass(e),h[i?"addClass":"removeClass"](e)}else if(c==="undefined"||c==="boolean")this.className&&f._data(this,"__className__",this.className),this.className=this.className||a===!1?"":f._data(this,"__className__")||""})},hasClass:function(a){var b=" "+a+" ";for(var c=0,d=this.length;c<d;c++)if(this[c].nodeType===1&&(" "+this[c].className+" ").replace(n," ").indexOf(b)>-1)return!0;return!1},val:function(a){var c,d,e=this[0];if(!arguments.length){if(e){c=f.valHooks[e.nodeName.toLowerCase()]||f.valHooks[e.type];if(c&&"get"in c&&(d=c.get(e,"value"))!==b)return d;d=e.value;return typeof d=="string"?d.replace(p,""):d==null?"":d}return b}var g=f.isFunction(a);return this.each(function(d){var e=f(this),h;if(this.nodeType===1){g?h=a.call(this,d,e.val()):h=a,h==null?h="":typeof h=="number"?h+="":f.isArray(h)&&(h=f.map(h,function(a){return a==null?"":a+""})),c=f.valHooks[this.nodeName.toLowerCase()]||f.valHooks[this.type];if(!c||!("set"in c)||c.set(this,h,"value")===b)this.value=h}})}}),f.extend({valHooks:{option:{get:function(a){var b=a.attributes.value;return!b||b.specified?a.value:a.text}},select:{get:function(a){var b,c=a.selectedIndex,d=[],e=a.options,g=a.type==="select-one";if(c<0)return null;for(var h=g?c:0,i=g?c+1:e.length;h<i;h++){var j=e[h];if(j.selected&&(f.support.optDisabled?!j.disabled:j.getAttribute("disabled")===null)&&(!j.parentNode.disabled||!f.nodeName(j.parentNode,"optgroup"))){b=f(j).val();if(g)return b;d.push(b)}}if(g&&!d.length&&e.length)return f(e[c]).val();return d},set:function(a,b){var c=f.makeArray(b);f(a).find("option").each(function(){this.selected=f.inArray(f(this).val(),c)>=0}),c.length||(a.selectedIndex=-1);return c}}},attrFn:{val:!0,css:!0,html:!0,text:!0,data:!0,width:!0,height:!0,offset:!0},attrFix:{tabindex:"tabIndex"},attr:function(a,c,d,e){var g=a.nodeType;if(!a||g===3||g===8||g===2)return b;if(e&&c in f.attrFn)return f(a)[c](d);if(!("getAttribute"in a))return f.prop(a,c,d);var h,i,j=g!==1||!f.isXMLDoc(a);j&&(c=f.attrFix[c]||c,i=f.attrHooks[c],i||(t.test(c)?i=v:u&&(i=u)));if(d!==b){if(d===null){f.removeAttr(a,c);return b}if(i&&"set"in i&&j&&(h=i.set(a,d,c))!==b)return h;a.setAttribute(c,""+d);return d}if(i&&"get"in i&&j&&(h=i.get(a,c))!==null)return h;h=a.getAttribute(c);return h===null?b:h},removeAttr:function(a,b){var c;a.nodeType===1&&(b=f.attrFix[b]||b,f.attr(a,b,""),a.removeAttribute(b),t.test(b)&&(c=f.propFix[b]||b)in a&&(a[c]=!1))},attrHooks:{type:{set:function(a,b){if(q.test(a.nodeName)&&a.parentNode)f.error("type property can't be changed");else if(!f.support.radioValue&&b==="radio"&&f.nodeName(a,"input")){var c=a.value;a.setAttribute("type",b),c&&(a.value=c);return b}}},value:{get:function(a,b){if(u&&f.nodeName(a,"button"))return u.get(a,b);return b in a?a.value:null},set:function(a,b,c){if(u&&f.nodeName(a,"button"))return u.set(a,b,c);a.value=b}}},propFix:{tabindex:"tabIndex",readonly:"readOnly","for":"htmlFor","class":"className",maxlength:"maxLength",cellspacing:"cellSpacing",cellpadding:"cellPadding",rowspan:"rowSpan",colspan:"colSpan",usemap:"useMap",frameborder:"frameBorder",contenteditable:"contentEditable"},prop:function(a,c,d){var e=a.nodeType;if(!a||e===3||e===8||e===2)return b;var g,h,i=e!==1||!f.isXMLDoc(a);i&&(c=f.propFix[c]||c,h=f.propHooks[c]);return d!==b?h&&"set"in h&&(g=h.set(a,d,c))!==b?g:a[c]=d:h&&"get"in h&&(g=h.get(a,c))!==null?g:a[c]},propHooks:{tabIndex:{get:function(a){var c=a.getAttributeNode("tabindex");return c&&c.specified?parseInt(c.value,10):r.test(a.nodeName)||s.test(a.nodeName)&&a.href?0:b}}}}),f.attrHooks.tabIndex=f.propHooks.tabIndex,v={get:function(a,c){var d;return f.prop(a,c)===!0||(d=a.getAttributeNode(c))&&d.nodeValue!==!1?c.toLowerCase():b},set:function(a,b,c){var d;b===!1?f.removeAttr(a,c):(d=f.propFix[c]||c,d in a&&(a[d]=!0),a.setAttribute(c,c.toLowerCase()));return c}},f.support.getSetAttribute||(u=f.valHooks.button={get:function(a,c){var d;d=a.getAttributeNode(c);return d&&d.nodeValue!==""?d.nodeValue:b},set:function(a,b,d){var e=a.getAttributeNode(d);e||(e=c.createAttribute(d),a.setAttributeNode(e));return e.nodeValue=b+""}},f.each(["width","height"],function(a,b){f.attrHooks[b]=f.extend(f.attrHooks[b],{set:function(a,c){if(c===""){a.setAttribute(b,"auto");return c}}})})),f.support.hrefNormalized||f.each(["href","src","width","height"],function(a,c){f.attrHooks[c]=f.extend(f.attrHooks[c],{get:function(a){var d=a.getAttribute(c,2);return d===null?b:d}})}),f.support.style||(f.attrHooks.style={get:function(a){return a.style.cssText.toLowerCase()||b},set:function(a,b){return a.style.cssText=""+b}}),f.support.optSelected||(f.propHooks.selected=f.extend(f.propHooks.selected,{get:function(a){var b=a.parentNode;b&&(b.selectedIndex,b.parentNode&&b.parentNode.selectedIndex);return null}})),f.support.checkOn||f.each(["radio","checkbox"],function(){f.valHooks[this]={get:function(a){return a.getAttribute("value")===null?"on":a.value}}}),f.each(["radio","checkbox"],function(){f.valHooks[this]=f.extend(f.valHooks[this],{set:function(a,b){if(f.isArray(b))return a.checked=f.inArray(f(a).val(),b)>=0}})});var w=/\.(.*)$/,x=/^(?:textarea|input|select)$/i,y=/\./g,z=/ /g,A=/[^\w\s.|`]/g,B=function(a){return a.replace(A,"\\$&")};f.event={add:function(a,c,d,e){if(a.nodeType!==3&&a.nodeType!==8){if(d===!1)d=C;else if(!d)return;var g,h;d.handler&&(g=d,d=g.handler),d.guid||(d.guid=f.guid++);var i=f._data(a);if(!i)return;var j=i.events,k=i.handle;j||(i.events=j={}),k||(i.handle=k=function(a){return typeof f!="undefined"&&(!a||f.event.triggered!==a.type)?f.event.handle.apply(k.elem,arguments):b}),k.elem=a,c=c.split(" ");var l,m=0,n;while(l=c[m++]){h=g?f.extend({},g):{handler:d,data:e},l.indexOf(".")>-1?(n=l.split("."),l=n.shift(),h.namespace=n.slice(0).sort().join(".")):(n=[],h.namespace=""),h.type=l,h.guid||(h.guid=d.guid);var o=j[l],p=f.event.special[l]||{};if(!o){o=j[l]=[];if(!p.setup||p.setup.call(a,e,n,k)===!1)a.addEventListener?a.addEventListener(l,k,!1):a.attachEvent&&a.attachEvent("on"+l,k)}p.add&&(p.add.call(a,h),h.handler.guid||(h.handler.guid=d.guid)),o.push(h),f.event.global[l]=!0}a=null}},global:{},remove:function(a,c,d,e){if(a.nodeType!==3&&a.nodeType!==8){d===!1&&(d=C);var g,h,i,j,k=0,l,m,n,o,p,q,r,s=f.hasData(a)&&f._data(a),t=s&&s.events;if(!s||!t)return;c&&c.type&&(d=c.handler,c=c.type);if(!c||typeof c=="string"&&c.charAt(0)==="."){c=c||"";for(h in t)f.event.remove(a,h+c);return}c=c.split(" ");while(h=c[k++]){r=h,q=null,l=h.indexOf(".")<0,m=[],l||(m=h.split("."),h=m.shift(),n=new RegExp("(^|\\.)"+f.map(m.slice(0).sort(),B).join("\\.(?:.*\\.)?")+"(\\.|$)")),p=t[h];if(!p)continue;if(!d){for(j=0;j<p.length;j++){q=p[j];if(l||n.test(q.namespace))f.event.remove(a,r,q.handler,j),p.splice(j--,1)}continue}o=f.event.special[h]||{};for(j=e||0;j<p.length;j++){q=p[j];if(d.guid===q.guid){if(l||n.test(q.namespace))e==null&&p.splice(j--,1),o.remove&&o.remove.call(a,q);if(e!=null)break}}if(p.length===0||e!=null&&p.length===1)(!o.teardown||o.teardown.call(a,m)===!1)&&f.removeEvent(a,h,s.handle),g=null,delete 
+t[h]}if(f.isEmptyObject(t)){var u=s.handle;u&&(u.elem=null),delete s.events,delete s.handle,f.isEmptyObject(s)&&f.removeData(a,b,!0)}}},customEvent:{getData:!0,setData:!0,changeData:!0},trigger:function(c,d,e,g){var h=c.type||c,i=[],j;h.indexOf("!")>=0&&(h=h.slice(0,-1),j=!0),h.indexOf(".")>=0&&(i=h.split("."),h=i.shift(),i.sort());if(!!e&&!f.event.customEvent[h]||!!f.event.global[h]){c=typeof c=="object"?c[f.expando]?c:new f.Event(h,c):new f.Event(h),c.type=h,c.exclusive=j,c.namespace=i.join("."),c.namespace_re=new RegExp("(^|\\.)"+i.join("\\.(?:.*\\.)?")+"(\\.|$)");if(g||!e)c.preventDefault(),c.stopPropagation();if(!e){f.each(f.cache,function(){var a=f.expando,b=this[a];b&&b.events&&b.events[h]&&f.event.trigger(c,d,b.handle.elem)});return}if(e.nodeType===3||e.nodeType===8)return;c.result=b,c.target=e,d=d!=null?f.makeArray(d):[],d.unshift(c);var k=e,l=h.indexOf(":")<0?"on"+h:"";do{var m=f._data(k,"handle");c.currentTarget=k,m&&m.apply(k,d),l&&f.acceptData(k)&&k[l]&&k[l].apply(k,d)===!1&&(c.result=!1,c.preventDefault()),k=k.parentNode||k.ownerDocument||k===c.target.ownerDocument&&a}while(k&&!c.isPropagationStopped());if(!c.isDefaultPrevented()){var n,o=f.event.special[h]||{};if((!o._default||o._default.call(e.ownerDocument,c)===!1)&&(h!=="click"||!f.nodeName(e,"a"))&&f.acceptData(e)){try{l&&e[h]&&(n=e[l],n&&(e[l]=null),f.event.triggered=h,e[h]())}catch(p){}n&&(e[l]=n),f.event.triggered=b}}return c.result}},handle:function(c){c=f.event.fix(c||a.event);var d=((f._data(this,"events")||{})[c.type]||[]).slice(0),e=!c.exclusive&&!c.namespace,g=Array.prototype.slice.call(arguments,0);g[0]=c,c.currentTarget=this;for(var h=0,i=d.length;h<i;h++){var j=d[h];if(e||c.namespace_re.test(j.namespace)){c.handler=j.handler,c.data=j.data,c.handleObj=j;var k=j.handler.apply(this,g);k!==b&&(c.result=k,k===!1&&(c.preventDefault(),c.stopPropagation()));if(c.isImmediatePropagationStopped())break}}return c.result},props:"altKey attrChange attrName bubbles button cancelable charCode clientX clientY ctrlKey currentTarget data detail eventPhase fromElement handler keyCode layerX layerY metaKey newValue offsetX offsetY pageX pageY prevValue relatedNode relatedTarget screenX screenY shiftKey srcElement target toElement view wheelDelta which".split(" "),fix:function(a){if(a[f.expando])return a;var d=a;a=f.Event(d);for(var e=this.props.length,g;e;)g=this.props[--e],a[g]=d[g];a.target||(a.target=a.srcElement||c),a.target.nodeType===3&&(a.target=a.target.parentNode),!a.relatedTarget&&a.fromElement&&(a.relatedTarget=a.fromElement===a.target?a.toElement:a.fromElement);if(a.pageX==null&&a.clientX!=null){var h=a.target.ownerDocument||c,i=h.documentElement,j=h.body;a.pageX=a.clientX+(i&&i.scrollLeft||j&&j.scrollLeft||0)-(i&&i.clientLeft||j&&j.clientLeft||0),a.pageY=a.clientY+(i&&i.scrollTop||j&&j.scrollTop||0)-(i&&i.clientTop||j&&j.clientTop||0)}a.which==null&&(a.charCode!=null||a.keyCode!=null)&&(a.which=a.charCode!=null?a.charCode:a.keyCode),!a.metaKey&&a.ctrlKey&&(a.metaKey=a.ctrlKey),!a.which&&a.button!==b&&(a.which=a.button&1?1:a.button&2?3:a.button&4?2:0);return a},guid:1e8,proxy:f.proxy,special:{ready:{setup:f.bindReady,teardown:f.noop},live:{add:function(a){f.event.add(this,M(a.origType,a.selector),f.extend({},a,{handler:L,guid:a.handler.guid}))},remove:function(a){f.event.remove(this,M(a.origType,a.selector),a)}},beforeunload:{setup:function(a,b,c){f.isWindow(this)&&(this.onbeforeunload=c)},teardown:function(a,b){this.onbeforeunload===b&&(this.onbeforeunload=null)}}}},f.removeEvent=c.removeEventListener?function(a,b,c){a.removeEventListener&&a.removeEventListener(b,c,!1)}:function(a,b,c){a.detachEvent&&a.detachEvent("on"+b,c)},f.Event=function(a,b){if(!this.preventDefault)return new f.Event(a,b);a&&a.type?(this.originalEvent=a,this.type=a.type,this.isDefaultPrevented=a.defaultPrevented||a.returnValue===!1||a.getPreventDefault&&a.getPreventDefault()?D:C):this.type=a,b&&f.extend(this,b),this.timeStamp=f.now(),this[f.expando]=!0},f.Event.prototype={preventDefault:function(){this.isDefaultPrevented=D;var a=this.originalEvent;!a||(a.preventDefault?a.preventDefault():a.returnValue=!1)},stopPropagation:function(){this.isPropagationStopped=D;var a=this.originalEvent;!a||(a.stopPropagation&&a.stopPropagation(),a.cancelBubble=!0)},stopImmediatePropagation:function(){this.isImmediatePropagationStopped=D,this.stopPropagation()},isDefaultPrevented:C,isPropagationStopped:C,isImmediatePropagationStopped:C};var E=function(a){var b=a.relatedTarget,c=!1,d=a.type;a.type=a.data,b!==this&&(b&&(c=f.contains(this,b)),c||(f.event.handle.apply(this,arguments),a.type=d))},F=function(a){a.type=a.data,f.event.handle.apply(this,arguments)};f.each({mouseenter:"mouseover",mouseleave:"mouseout"},function(a,b){f.event.special[a]={setup:function(c){f.event.add(this,b,c&&c.selector?F:E,a)},teardown:function(a){f.event.remove(this,b,a&&a.selector?F:E)}}}),f.support.submitBubbles||(f.event.special.submit={setup:function(a,b){if(!f.nodeName(this,"form"))f.event.add(this,"click.specialSubmit",function(a){var b=a.target,c=f.nodeName(b,"input")||f.nodeName(b,"button")?b.type:"";(c==="submit"||c==="image")&&f(b).closest("form").length&&J("submit",this,arguments)}),f.event.add(this,"keypress.specialSubmit",function(a){var b=a.target,c=f.nodeName(b,"input")||f.nodeName(b,"button")?b.type:"";(c==="text"||c==="password")&&f(b).closest("form").length&&a.keyCode===13&&J("submit",this,arguments)});else return!1},teardown:function(a){f.event.remove(this,".specialSubmit")}});if(!f.support.changeBubbles){var G,H=function(a){var b=f.nodeName(a,"input")?a.type:"",c=a.value;b==="radio"||b==="checkbox"?c=a.checked:b==="select-multiple"?c=a.selectedIndex>-1?f.map(a.options,function(a){return a.selected}).join("-"):"":f.nodeName(a,"select")&&(c=a.selectedIndex);return c},I=function(c){var d=c.target,e,g;if(!!x.test(d.nodeName)&&!d.readOnly){e=f._data(d,"_change_data"),g=H(d),(c.type!=="focusout"||d.type!=="radio")&&f._data(d,"_change_data",g);if(e===b||g===e)return;if(e!=null||g)c.type="change",c.liveFired=b,f.event.trigger(c,arguments[1],d)}};f.event.special.change={filters:{focusout:I,beforedeactivate:I,click:function(a){var b=a.target,c=f.nodeName(b,"input")?b.type:"";(c==="radio"||c==="checkbox"||f.nodeName(b,"select"))&&I.call(this,a)},keydown:function(a){var b=a.target,c=f.nodeName(b,"input")?b.type:"";(a.keyCode===13&&!f.nodeName(b,"textarea")||a.keyCode===32&&(c==="checkbox"||c==="radio")||c==="select-multiple")&&I.call(this,a)},beforeactivate:function(a){var b=a.target;f._data(b,"_change_data",H(b))}},setup:function(a,b){if(this.type==="file")return!1;for(var c in G)f.event.add(this,c+".specialChange",G[c]);return x.test(this.nodeName)},teardown:function(a){f.event.remove(this,".specialChange");return x.test(this.nodeName)}},G=f.event.special.change.filters,G.focus=G.beforeactivate}f.support.focusinBubbles||f.each({focus:"focusin",blur:"focusout"},function(a,b){function e(a){var c=f.event.fix(a);c.type=b,c.originalEvent={},f.event.trigger(c,null,c.target),c.isDefaultPrevented()&&a.preventDefault()}var d=0;f.event.special[b]={setup:function(){d++===0&&c.addEventListener(a,e,!0)},teardown:function(){--d===0&&c.removeEventListener(a,e,!0)}}}),f.each(["bind","one"],function(a,c){f.fn[c]=function(a,d,e){var g;if(typeof a=="object"){for(var h in a)this[c](h,d,a[h],e);return this}if(arguments.length===2||d===!1)e=d,d=b;c==="one"?(g=function(a){f(this).unbind(a,g);return e.apply(this,arguments)},g.guid=e.guid||f.guid++):g=e;if(a==="unload"&&c!=="one")this.one(a,d,e);else for(var i=0,j=this.length;i<j;i++)f.event.add(this[i],a,g,d);return this}}),f.fn.extend({unbind:function(a,b){if(typeof a=="object"&&!a.preventDefault)for(var c in a)this.unbind(c,a[c]);else for(var d=0,e=this.length;d<e;d++)f.event.remove(this[d],a,b);return this},delegate:function(a,b,c,d){return this.live(b,c,d,a)},undelegate:function(a,b,c){return arguments.length===0?this.unbind("live"):this.die(b,null,c,a)},trigger:function(a,b){return this.each(function(){f.event.trigger(a,b,this)})},triggerHandler:function(a,b){if(this[0])return f.event.trigger(a,b,this[0],!0)},toggle:function(a){var b=arguments,c=a.guid||f.guid++,d=0,e=function(c){var e=(f.data(this,"lastToggle"+a.guid)||0)%d;f.data(this,"lastToggle"+a.guid,e+1),c.preventDefault();return b[e].apply(this,arguments)||!1};e.guid=c;while(d<b.length)b[d++].guid=c;return this.click(e)},hover:function(a,b){return this.mouseenter(a).mouseleave(b||a)}});var K={focus:"focusin",blur:"focusout",mouseenter:"mouseover",mouseleave:"mouseout"};f.each(["live","die"],function(a,c){f.fn[c]=function(a,d,e,g){var h,i=0,j,k,l,m=g||this.selector,n=g?this:f(this.context);if(typeof a=="object"&&!a.preventDefault){for(var o in a)n[c](o,d,a[o],m);return this}if(c==="die"&&!a&&g&&g.charAt(0)==="."){n.unbind(g);return this}if(d===!1||f.isFunction(d))e=d||C,d=b;a=(a||"").split(" ");while((h=a[i++])!=null){j=w.exec(h),k="",j&&(k=j[0],h=h.replace(w,""));if(h==="hover"){a.push("mouseenter"+k,"mouseleave"+k);continue}l=h,K[h]?(a.push(K[h]+k),h=h+k):h=(K[h]||h)+k;if(c==="live")for(var p=0,q=n.length;p<q;p++)f.event.add(n[p],"live."+M(h,m),{data:d,selector:m,handler:e,origType:h,origHandler:e,preType:l});else n.unbind("live."+M(h,m),e)}return this}}),f.each("blur focus focusin focusout load resize scroll unload click dblclick mousedown mouseup mousemove mouseover mouseout mouseenter mouseleave change select submit keydown keypress keyup error".split(" "),function(a,b){f.fn[b]=function(a,c){c==null&&(c=a,a=null);return arguments.length>0?this.bind(b,a,c):this.trigger(b)},f.attrFn&&(f.attrFn[b]=!0)}),function(){function u(a,b,c,d,e,f){for(var g=0,h=d.length;g<h;g++){var i=d[g];if(i){var j=!1;i=i[a];while(i){if(i.sizcache===c){j=d[i.sizset];break}if(i.nodeType===1){f||(i.sizcache=c,i.sizset=g);if(typeof b!="string"){if(i===b){j=!0;break}}else if(k.filter(b,[i]).length>0){j=i;break}}i=i[a]}d[g]=j}}}function t(a,b,c,d,e,f){for(var g=0,h=d.length;g<h;g++){var i=d[g];if(i){var j=!1;i=i[a];while(i){if(i.sizcache===c){j=d[i.sizset];break}i.nodeType===1&&!f&&(i.sizcache=c,i.sizset=g);if(i.nodeName.toLowerCase()===b){j=i;break}i=i[a]}d[g]=j}}}var a=/((?:\((?:\([^()]+\)|[^()]+)+\)|\[(?:\[[^\[\]]*\]|['"][^'"]*['"]|[^\[\]'"]+)+\]|\\.|[^ >+~,(\[\\]+)+|[>+~])(\s*,\s*)?((?:.|\r|\n)*)/g,d=0,e=Object.prototype.toString,g=!1,h=!0,i=/\\/g,j=/\W/;[0,0].sort(function(){h=!1;return 0});var k=function(b,d,f,g){f=f||[],d=d||c;var h=d;if(d.nodeType!==1&&d.nodeType!==9)return[];if(!b||typeof b!="string")return f;var i,j,n,o,q,r,s,t,u=!0,w=k.isXML(d),x=[],y=b;do{a.exec(""),i=a.exec(y);if(i){y=i[3],x.push(i[1]);if(i[2]){o=i[3];break}}}while(i);if(x.length>1&&m.exec(b))if(x.length===2&&l.relative[x[0]])j=v(x[0]+x[1],d);else{j=l.relative[x[0]]?[d]:k(x.shift(),d);while(x.length)b=x.shift(),l.relative[b]&&(b+=x.shift()),j=v(b,j)}else{!g&&x.length>1&&d.nodeType===9&&!w&&l.match.ID.test(x[0])&&!l.match.ID.test(x[x.length-1])&&(q=k.find(x.shift(),d,w),d=q.expr?k.filter(q.expr,q.set)[0]:q.set[0]);if(d){q=g?{expr:x.pop(),set:p(g)}:k.find(x.pop(),x.length===1&&(x[0]==="~"||x[0]==="+")&&d.parentNode?d.parentNode:d,w),j=q.expr?k.filter(q.expr,q.set):q.set,x.length>0?n=p(j):u=!1;while(x.length)r=x.pop(),s=r,l.relative[r]?s=x.pop():r="",s==null&&(s=d),l.relative[r](n,s,w)}else n=x=[]}n||(n=j),n||k.error(r||b);if(e.call(n)==="[object Array]")if(!u)f.push.apply(f,n);else if(d&&d.nodeType===1)for(t=0;n[t]!=null;t++)n[t]&&(n[t]===!0||n[t].nodeType===1&&k.contains(d,n[t]))&&f.push(j[t]);else for(t=0;n[t]!=null;t++)n[t]&&n[t].nodeType===1&&f.push(j[t]);else p(n,f);o&&(k(o,h,f,g),k.uniqueSort(f));return f};k.uniqueSort=function(a){if(r){g=h,a.sort(r);if(g)for(var b=1;b<a.length;b++)a[b]===a[b-1]&&a.splice(b--,1)}return a},k.matches=function(a,b){return k(a,null,null,b)},k.matchesSelector=function(a,b){return k(b,null,null,[a]).length>0},k.find=function(a,b,c){var d;if(!a)return[];for(var e=0,f=l.order.length;e<f;e++){var g,h=l.order[e];if(g=l.leftMatch[h].exec(a)){var j=g[1];g.splice(1,1);if(j.substr(j.length-1)!=="\\"){g[1]=(g[1]||"").replace(i,""),d=l.find[h](g,b,c);if(d!=null){a=a.replace(l.match[h],"");break}}}}d||(d=typeof b.getElementsByTagName!="undefined"?b.getElementsByTagName("*"):[]);return{set:d,expr:a}},k.filter=function(a,c,d,e){var f,g,h=a,i=[],j=c,m=c&&c[0]&&k.isXML(c[0]);while(a&&c.length){for(var n in l.filter)if((f=l.leftMatch[n].exec(a))!=null&&f[2]){var o,p,q=l.filter[n],r=f[1];g=!1,f.splice(1,1);if(r.substr(r.length-1)==="\\")continue;j===i&&(i=[]);if(l.preFilter[n]){f=l.preFilter[n](f,j,d,i,e,m);if(!f)g=o=!0;else if(f===!0)continue}if(f)for(var s=0;(p=j[s])!=null;s++)if(p){o=q(p,f,s,j);var t=e^!!o;d&&o!=null?t?g=!0:j[s]=!1:t&&(i.push(p),g=!0)}if(o!==b){d||(j=i),a=a.replace(l.match[n],"");if(!g)return[];break}}if(a===h)if(g==null)k.error(a);else break;h=a}return j},k.error=function(a){throw"Syntax error, unrecognized expression: "+a};var l=k.selectors={order:["ID","NAME","TAG"],match:{ID:/#((?:[\w\u00c0-\uFFFF\-]|\\.)+)/,CLASS:/\.((?:[\w\u00c0-\uFFFF\-]|\\.)+)/,NAME:/\[name=['"]*((?:[\w\u00c0-\uFFFF\-]|\\.)+)['"]*\]/,ATTR:/\[\s*((?:[\w\u00c0-\uFFFF\-]|\\.)+)\s*(?:(\S?=)\s*(?:(['"])(.*?)\3|(#?(?:[\w\u00c0-\uFFFF\-]|\\.)*)|)|)\s*\]/,TAG:/^((?:[\w\u00c0-\uFFFF\*\-]|\\.)+)/,CHILD:/:(only|nth|last|first)-child(?:\(\s*(even|odd|(?:[+\-]?\d+|(?:[+\-]?\d*)?n\s*(?:[+\-]\s*\d+)?))\s*\))?/,POS:/:(nth|eq|gt|lt|first|last|even|odd)(?:\((\d*)\))?(?=[^\-]|$)/,PSEUDO:/:((?:[\w\u00c0-\uFFFF\-]|\\.)+)(?:\((['"]?)((?:\([^\)]+\)|[^\(\)]*)+)\2\))?/},leftMatch:{},attrMap:{"class":"className","for":"htmlFor"},attrHandle:{href:function(a){return a.getAttribute("href")},type:function(a){return a.getAttribute("type")}},relative:{"+":function(a,b){var c=typeof b=="string",d=c&&!j.test(b),e=c&&!d;d&&(b=b.toLowerCase());for(var f=0,g=a.length,h;f<g;f++)if(h=a[f]){while((h=h.previousSibling)&&h.nodeType!==1);a[f]=e||h&&h.nodeName.toLowerCase()===b?h||!1:h===b}e&&k.filter(b,a,!0)},">":function(a,b){var c,d=typeof b=="string",e=0,f=a.length;if(d&&!j.test(b)){b=b.toLowerCase();for(;e<f;e++){c=a[e];if(c){var g=c.parentNode;a[e]=g.nodeName.toLowerCase()===b?g:!1}}}else{for(;e<f;e++)c=a[e],c&&(a[e]=d?c.parentNode:c.parentNode===b);d&&k.filter(b,a,!0)}},"":function(a,b,c){var e,f=d++,g=u;typeof b=="string"&&!j.test(b)&&(b=b.toLowerCase(),e=b,g=t),g("parentNode",b,f,a,e,c)},"~":function(a,b,c){var e,f=d++,g=u;typeof b=="string"&&!j.test(b)&&(b=b.toLowerCase(),e=b,g=t),g("previousSibling",b,f,a,e,c)}},find:{ID:function(a,b,c){if(typeof b.getElementById!="undefined"&&!c){var d=b.getElementById(a[1]);return d&&d.parentNode?[d]:[]}},NAME:function(a,b){if(typeof b.getElementsByName!="undefined"){var c=[],d=b.getElementsByName(a[1]);for(var e=0,f=d.length;e<f;e++)d[e].getAttribute("name")===a[1]&&c.push(d[e]);return c.length===0?null:c}},TAG:function(a,b){if(typeof b.getElementsByTagName!="undefined")return b.getElementsByTagName(a[1])}},preFilter:{CLASS:function(a,b,c,d,e,f){a=" "+a[1].replace(i,"")+" ";if(f)return a;for(var g=0,h;(h=b[g])!=null;g++)h&&(e^(h.className&&(" "+h.className+" ").replace(/[\t\n\r]/g," ").indexOf(a)>=0)?c||d.push(h):c&&(b[g]=!1));return!1},ID:function(a){return a[1].replace(i,"")},TAG:function(a,b){return a[1].replace(i,"").toLowerCase()},CHILD:function(a){if(a[1]==="nth"){a[2]||k.error(a[0]),a[2]=a[2].replace(/^\+|\s*/g,"");var b=/(-?)(\d*)(?:n([+\-]?\d*))?/.exec(a[2]==="even"&&"2n"||a[2]==="odd"&&"2n+1"||!/\D/.test(a[2])&&"0n+"+a[2]||a[2]);a[2]=b[1]+(b[2]||1)-0,a[3]=b[3]-0}else a[2]&&k.error(a[0]);a[0]=d++;return a},ATTR:function(a,b,c,d,e,f){var g=a[1]=a[1].replace(i,"");!f&&l.attrMap[g]&&(a[1]=l.attrMap[g]),a[4]=(a[4]||a[5]||"").replace(i,""),a[2]==="~="&&(a[4]=" "+a[4]+" ");return a},PSEUDO:function(b,c,d,e,f){if(b[1]==="not")if((a.exec(b[3])||"").length>1||/^\w/.test(b[3]))b[3]=k(b[3],null,null,c);else{var g=k.filter(b[3],c,d,!0^f);d||e.push.apply(e,g);return!1}else if(l.match.POS.test(b[0])||l.match.CHILD.test(b[0]))return!0;return b},POS:function(a){a.unshift(!0);return a}},filters:{enabled:function(a){return a.disabled===!1&&a.type!=="hidden"},disabled:function(a){return a.disabled===!0},checked:function(a){return a.checked===!0},selected:function(a){a.parentNode&&a.parentNode.selectedIndex;return a.selected===!0},parent:function(a){return!!a.firstChild},empty:function(a){return!a.firstChild},has:function(a,b,c){return!!k(c[3],a).length},header:function(a){return/h\d/i.test(a.nodeName)},text:function(a){var b=a.getAttribute("type"),c=a.type;return a.nodeName.toLowerCase()==="input"&&"text"===c&&(b===c||b===null)},radio:function(a){return a.nodeName.toLowerCase()==="input"&&"radio"===a.type},checkbox:function(a){return a.nodeName.toLowerCase()==="input"&&"checkbox"===a.type},file:function(a){return a.nodeName.toLowerCase()==="input"&&"file"===a.type},password:function(a){return a.nodeName.toLowerCase()==="input"&&"password"===a.type},submit:function(a){var b=a.nodeName.toLowerCase();return(b==="input"||b==="button")&&"submit"===a.type},image:function(a){return a.nodeName.toLowerCase()==="input"&&"image"===a.type},reset:function(a){var b=a.nodeName.toLowerCase();return(b==="input"||b==="button")&&"reset"===a.type},button:function(a){var b=a.nodeName.toLowerCase();return b==="input"&&"button"===a.type||b==="button"},input:function(a){return/input|select|textarea|button/i.test(a.nodeName)},focus:function(a){return a===a.ownerDocument.activeElement}},setFilters:{first:function(a,b){return b===0},last:function(a,b,c,d){return b===d.length-1},even:function(a,b){return b%2===0},odd:function(a,b){return b%2===1},lt:function(a,b,c){return b<c[3]-0},gt:function(a,b,c){return b>c[3]-0},nth:function(a,b,c){return c[3]-0===b},eq:function(a,b,c){return c[3]-0===b}},filter:{PSEUDO:function(a,b,c,d){var e=b[1],f=l.filters[e];if(f)return f(a,c,b,d);if(e==="contains")return(a.textContent||a.innerText||k.getText([a])||"").indexOf(b[3])>=0;if(e==="not"){var g=b[3];for(var h=0,i=g.length;h<i;h++)if(g[h]===a)return!1;return!0}k.error(e)},CHILD:function(a,b){var c=b[1],d=a;switch(c){case"only":case"first":while(d=d.previousSibling)if(d.nodeType===1)return!1;if(c==="first")return!0;d=a;case"last":while(d=d.nextSibling)if(d.nodeType===1)return!1;return!0;case"nth":var e=b[2],f=b[3];if(e===1&&f===0)return!0;var g=b[0],h=a.parentNode;if(h&&(h.sizcache!==g||!a.nodeIndex)){var i=0;for(d=h.firstChild;d;d=d.nextSibling)d.nodeType===1&&(d.nodeIndex=++i);h.sizcache=g}var j=a.nodeIndex-f;return e===0?j===0:j%e===0&&j/e>=0}},ID:function(a,b){return a.nodeType===1&&a.getAttribute("id")===b},TAG:function(a,b){return b==="*"&&a.nodeType===1||a.nodeName.toLowerCase()===b},CLASS:function(a,b){return(" "+(a.className||a.getAttribute("class"))+" ").indexOf(b)>-1},ATTR:function(a,b){var c=b[1],d=l.attrHandle[c]?l.attrHandle[c](a):a[c]!=null?a[c]:a.getAttribute(c),e=d+"",f=b[2],g=b[4];return d==null?f==="!=":f==="="?e===g:f==="*="?e.indexOf(g)>=0:f==="~="?(" "+e+" ").indexOf(g)>=0:g?f==="!="?e!==g:f==="^="?e.indexOf(g)===0:f==="$="?e.substr(e.length-g.length)===g:f==="|="?e===g||e.substr(0,g.length+1)===g+"-":!1:e&&d!==!1},POS:function(a,b,c,d){var e=b[2],f=l.setFilters[e];if(f)return f(a,c,b,d)}}},m=l.match.POS,n=function(a,b){return"\\"+(b-0+1)};for(var o in l.match)l.match[o]=new RegExp(l.match[o].source+/(?![^\[]*\])(?![^\(]*\))/.source),l.leftMatch[o]=new RegExp(/(^(?:.|\r|\n)*?)/.source+l.match[o].source.replace(/\\(\d+)/g,n));var p=function(a,b){a=Array.prototype.slice.call(a,0);if(b){b.push.apply(b,a);return b}return a};try{Array.prototype.slice.call(c.documentElement.childNodes,0)[0].nodeType}catch(q){p=function(a,b){var c=0,d=b||[];if(e.call(a)==="[object Array]")Array.prototype.push.apply(d,a);else if(typeof a.length=="number")for(var f=a.length;c<f;c++)d.push(a[c]);else for(;a[c];c++)d.push(a[c]);return d}}var r,s;c.documentElement.compareDocumentPosition?r=function(a,b){if(a===b){g=!0;return 0}if(!a.compareDocumentPosition||!b.compareDocumentPosition)return a.compareDocumentPosition?-1:1;return a.compareDocumentPosition(b)&4?-1:1}:(r=function(a,b){if(a===b){g=!0;return 0}if(a.sourceIndex&&b.sourceIndex)return a.sourceIndex-b.sourceIndex;var c,d,e=[],f=[],h=a.parentNode,i=b.parentNode,j=h;if(h===i)return s(a,b);if(!h)return-1;if(!i)return 1;while(j)e.unshift(j),j=j.parentNode;j=i;while(j)f.unshift(j),j=j.parentNode;c=e.length,d=f.length;for(var k=0;k<c&&k<d;k++)if(e[k]!==f[k])return s(e[k],f[k]);return k===c?s(a,f[k],-1):s(e[k],b,1)},s=function(a,b,c){if(a===b)return c;var d=a.nextSibling;while(d){if(d===b)return-1;d=d.nextSibling}return 1}),k.getText=function(a){var b="",c;for(var d=0;a[d];d++)c=a[d],c.nodeType===3||c.nodeType===4?b+=c.nodeValue:c.nodeType!==8&&(b+=k.getText(c.childNodes));return b},function(){var a=c.createElement("div"),d="script"+(new Date).getTime(),e=c.documentElement;a.innerHTML="<a name='"+d+"'/>",e.insertBefore(a,e.firstChild),c.getElementById(d)&&(l.find.ID=function(a,c,d){if(typeof c.getElementById!="undefined"&&!d){var e=c.getElementById(a[1]);return e?e.id===a[1]||typeof e.getAttributeNode!="undefined"&&e.getAttributeNode("id").nodeValue===a[1]?[e]:b:[]}},l.filter.ID=function(a,b){var c=typeof a.getAttributeNode!="undefined"&&a.getAttributeNode("id");return a.nodeType===1&&c&&c.nodeValue===b}),e.removeChild(a),e=a=null}(),function(){var a=c.createElement("div");a.appendChild(c.createComment("")),a.getElementsByTagName("*").length>0&&(l.find.TAG=function(a,b){var c=b.getElementsByTagName(a[1]);if(a[1]==="*"){var d=[];for(var e=0;c[e];e++)c[e].nodeType===1&&d.push(c[e]);c=d}return c}),a.innerHTML="<a href='#'></a>",a.firstChild&&typeof a.firstChild.getAttribute!="undefined"&&a.firstChild.getAttribute("href")!=="#"&&(l.attrHandle.href=function(a){return a.getAttribute("href",2)}),a=null}(),c.querySelectorAll&&function(){var a=k,b=c.createElement("div"),d="__sizzle__";b.innerHTML="<p class='TEST'></p>";if(!b.querySelectorAll||b.querySelectorAll(".TEST").length!==0){k=function(b,e,f,g){e=e||c;if(!g&&!k.isXML(e)){var h=/^(\w+$)|^\.([\w\-]+$)|^#([\w\-]+$)/.exec(b);if(h&&(e.nodeType===1||e.nodeType===9)){if(h[1])return p(e.getElementsByTagName(b),f);if(h[2]&&l.find.CLASS&&e.getElementsByClassName)return p(e.getElementsByClassName(h[2]),f)}if(e.nodeType===9){if(b==="body"&&e.body)return p([e.body],f);if(h&&h[3]){var i=e.getElementById(h[3]);if(!i||!i.parentNode)return p([],f);if(i.id===h[3])return p([i],f)}try{return p(e.querySelectorAll(b),f)}catch(j){}}else if(e.nodeType===1&&e.nodeName.toLowerCase()!=="object"){var m=e,n=e.getAttribute("id"),o=n||d,q=e.parentNode,r=/^\s*[+~]/.test(b);n?o=o.replace(/'/g,"\\$&"):e.setAttribute("id",o),r&&q&&(e=e.parentNode);try{if(!r||q)return p(e.querySelectorAll("[id='"+o+"'] "+b),f)}catch(s){}finally{n||m.removeAttribute("id")}}}return a(b,e,f,g)};for(var e in a)k[e]=a[e];b=null}}(),function(){var a=c.documentElement,b=a.matchesSelector||a.mozMatchesSelector||a.webkitMatchesSelector||a.msMatchesSelector;if(b){var d=!b.call(c.createElement("div"),"div"),e=!1;try{b.call(c.documentElement,"[test!='']:sizzle")}catch(f){e=!0}k.matchesSelector=function(a,c){c=c.replace(/\=\s*([^'"\]]*)\s*\]/g,"='$1']");if(!k.isXML(a))try{if(e||!l.match.PSEUDO.test(c)&&!/!=/.test(c)){var f=b.call(a,c);if(f||!d||a.document&&a.document.nodeType!==11)return f}}catch(g){}return k(c,null,null,[a]).length>0}}}(),function(){var a=c.createElement("div");a.innerHTML="<div class='test e'></div><div class='test'></div>";if(!!a.getElementsByClassName&&a.getElementsByClassName("e").length!==0){a.lastChild.className="e";if(a.getElementsByClassName("e").length===1)return;l.order.splice(1,0,"CLASS"),l.find.CLASS=function(a,b,c){if(typeof b.getElementsByClassName!="undefined"&&!c)return b.getElementsByClassName(a[1])},a=null}}(),c.documentElement.contains?k.contains=function(a,b){return a!==b&&(a.contains?a.contains(b):!0)}:c.documentElement.compareDocumentPosition?k.contains=function(a,b){return!!(a.compareDocumentPosition(b)&16)}:k.contains=function(){return!1},k.isXML=function(a){var b=(a?a.ownerDocument||a:0).documentElement;return b?b.nodeName!=="HTML":!1};var v=function(a,b){var c,d=[],e="",f=b.nodeType?[b]:b;while(c=l.match.PSEUDO.exec(a))e+=c[0],a=a.replace(l.match.PSEUDO,"");a=l.relative[a]?a+"*":a;for(var g=0,h=f.length;g<h;g++)k(a,f[g],d);return k.filter(e,d)};f.find=k,f.expr=k.selectors,f.expr[":"]=f.expr.filters,f.unique=k.uniqueSort,f.text=k.getText,f.isXMLDoc=k.isXML,f.contains=k.contains}();var N=/Until$/,O=/^(?:parents|prevUntil|prevAll)/,P=/,/,Q=/^.[^:#\[\.,]*$/,R=Array.prototype.slice,S=f.expr.match.POS,T={children:!0,contents:!0,next:!0,prev:!0};f.fn.extend({find:function(a){var b=this,c,d;if(typeof a!="string")return f(a).filter(function(){for(c=0,d=b.length;c<d;c++)if(f.contains(b[c],this))return!0});var e=this.pushStack("","find",a),g,h,i;for(c=0,d=this.length;c<d;c++){g=e.length,f.find(a,this[c],e);if(c>0)for(h=g;h<e.length;h++)for(i=0;i<g;i++)if(e[i]===e[h]){e.splice(h--,1);break}}return e},has:function(a){var b=f(a);return this.filter(function(){for(var a=0,c=b.length;a<c;a++)if(f.contains(this,b[a]))return!0})},not:function(a){return this.pushStack(V(this,a,!1),"not",a)},filter:function(a){return this.pushStack(V(this,a,!0),"filter",a)},is:function(a){return!!a&&(typeof a=="string"?f.filter(a,this).length>0:this.filter(a).length>0)},closest:function(a,b){var c=[],d,e,g=this[0];if(f.isArray(a)){var h,i,j={},k=1;if(g&&a.length){for(d=0,e=a.length;d<e;d++)i=a[d],j[i]||(j[i]=S.test(i)?f(i,b||this.context):i);while(g&&g.ownerDocument&&g!==b){for(i in j)h=j[i],(h.jquery?h.index(g)>-1:f(g).is(h))&&c.push({selector:i,elem:g,level:k});g=g.parentNode,k++}}return c}var l=S.test(a)||typeof a!="string"?f(a,b||this.context):0;for(d=0,e=this.length;d<e;d++){g=this[d];while(g){if(l?l.index(g)>-1:f.find.matchesSelector(g,a)){c.push(g);break}g=g.parentNode;if(!g||!g.ownerDocument||g===b||g.nodeType===11)break}}c=c.length>1?f.unique(c):c;return this.pushStack(c,"closest",a)},index:function(a){if(!a)return this[0]&&this[0].parentNode?this.prevAll().length:-1;if(typeof a=="string")return f.inArray(this[0],f(a));return f.inArray(a.jquery?a[0]:a,this)},add:function(a,b){var c=typeof a=="string"?f(a,b):f.makeArray(a&&a.nodeType?[a]:a),d=f.merge(this.get(),c);return this.pushStack(U(c[0])||U(d[0])?d:f.unique(d))},andSelf:function(){return this.add(this.prevObject)}}),f.each({parent:function(a){var b=a.parentNode;return b&&b.nodeType!==11?b:null},parents:function(a){return f.dir(a,"parentNode")},parentsUntil:function(a,b,c){return f.dir(a,"parentNode",c)},next:function(a){return f.nth(a,2,"nextSibling")},prev:function(a){return f.nth(a,2,"previousSibling")},nextAll:function(a){return f.dir(a,"nextSibling")},prevAll:function(a){return f.dir(a,"previousSibling")},nextUntil:function(a,b,c){return f.dir(a,"nextSibling",c)},prevUntil:function(a,b,c){return f.dir(a,"previousSibling",c)},siblings:function(a){return f.sibling(a.parentNode.firstChild,a)},children:function(a){return f.sibling(a.firstChild)},contents:function(a){return f.nodeName(a,"iframe")?a.contentDocument||a.contentWindow.document:f.makeArray(a.childNodes)}},function(a,b){f.fn[a]=function(c,d){var e=f.map(this,b,c),g=R.call(arguments);N.test(a)||(d=c),d&&typeof d=="string"&&(e=f.filter(d,e)),e=this.length>1&&!T[a]?f.unique(e):e,(this.length>1||P.test(d))&&O.test(a)&&(e=e.reverse());return this.pushStack(e,a,g.join(","))}}),f.extend({filter:function(a,b,c){c&&(a=":not("+a+")");return b.length===1?f.find.matchesSelector(b[0],a)?[b[0]]:[]:f.find.matches(a,b)},dir:function(a,c,d){var e=[],g=a[c];while(g&&g.nodeType!==9&&(d===b||g.nodeType!==1||!f(g).is(d)))g.nodeType===1&&e.push(g),g=g[c];return e},nth:function(a,b,c,d){b=b||1;var e=0;for(;a;a=a[c])if(a.nodeType===1&&++e===b)break;return a},sibling:function(a,b){var c=[];for(;a;a=a.nextSibling)a.nodeType===1&&a!==b&&c.push(a);return c}});var W=/ jQuery\d+="(?:\d+|null)"/g,X=/^\s+/,Y=/<(?!area|br|col|embed|hr|img|input|link|meta|param)(([\w:]+)[^>]*)\/>/ig,Z=/<([\w:]+)/,$=/<tbody/i,_=/<|&#?\w+;/,ba=/<(?:script|object|embed|option|style)/i,bb=/checked\s*(?:[^=]|=\s*.checked.)/i,bc=/\/(java|ecma)script/i,bd=/^\s*<!(?:\[CDATA\[|\-\-)/,be={option:[1,"<select multiple='multiple'>","</select>"],legend:[1,"<fieldset>","</fieldset>"],thead:[1,"<table>","</table>"],tr:[2,"<table><tbody>","</tbody></table>"],td:[3,"<table><tbody><tr>","</tr></tbody></table>"],col:[2,"<table><tbody></tbody><colgroup>","</colgroup></table>"],area:[1,"<map>","</map>"],_default:[0,"",""]};be.optgroup=be.option,be.tbody=be.tfoot=be.colgroup=be.caption=be.thead,be.th=be.td,f.support.htmlSerialize||(be._default=[1,"div<div>","</div>"]),f.fn.extend({text:function(a){if(f.isFunction(a))return this.each(function(b){var c=f(this);c.text(a.call(this,b,c.text()))});if(typeof a!="object"&&a!==b)return this.empty().append((this[0]&&this[0].ownerDocument||c).createTextNode(a));return f.text(this)},wrapAll:function(a){if(f.isFunction(a))return this.each(function(b){f(this).wrapAll(a.call(this,b))});if(this[0]){var b=f(a,this[0].ownerDocument).eq(0).clone(!0);this[0].parentNode&&b.insertBefore(this[0]),b.map(function(){var a=this;while(a.firstChild&&a.firstChild.nodeType===1)a=a.firstChild;return a}).append(this)}return this},wrapInner:function(a){if(f.isFunction(a))return this.each(function(b){f(this).wrapInner(a.call(this,b))});return this.each(function(){var b=f(this),c=b.contents();c.length?c.wrapAll(a):b.append(a)})},wrap:function(a){return this.each(function(){f(this).wrapAll(a)})},unwrap:function(){return this.parent().each(function(){f.nodeName(this,"body")||f(this).replaceWith(this.childNodes)}).end()},append:function(){return this.domManip(arguments,!0,function(a){this.nodeType===1&&this.appendChild(a)})},prepend:function(){return this.domManip(arguments,!0,function(a){this.nodeType===1&&this.insertBefore(a,this.firstChild)})},before:function(){if(this[0]&&this[0].parentNode)return this.domManip(arguments,!1,function(a){this.parentNode.insertBefore(a,this)});if(arguments.length){var a=f(arguments[0]);a.push.apply(a,this.toArray());return this.pushStack(a,"before",arguments)}},after:function(){if(this[0]&&this[0].parentNode)return this.domManip(arguments,!1,function(a){this.parentNode.insertBefore(a,this.nextSibling)});if(arguments.length){var a=this.pushStack(this,"after",arguments);a.push.apply(a,f(arguments[0]).toArray());return a}},remove:function(a,b){for(var c=0,d;(d=this[c])!=null;c++)if(!a||f.filter(a,[d]).length)!b&&d.nodeType===1&&(f.cleanData(d.getElementsByTagName("*")),f.cleanData([d])),d.parentNode&&d.parentNode.removeChild(d);return this},empty:function(){for(var a=0,b;(b=this[a])!=null;a++){b.nodeType===1&&f.cleanData(b.getElementsByTagName("*"));while(b.firstChild)b.removeChild(b.firstChild)}return this},clone:function(a,b){a=a==null?!1:a,b=b==null?a:b;return this.map(function(){return f.clone(this,a,b)})},html:function(a){if(a===b)return this[0]&&this[0].nodeType===1?this[0].innerHTML.replace(W,""):null;if(typeof a=="string"&&!ba.test(a)&&(f.support.leadingWhitespace||!X.test(a))&&!be[(Z.exec(a)||["",""])[1].toLowerCase()]){a=a.replace(Y,"<$1></$2>");try{for(var c=0,d=this.length;c<d;c++)this[c].nodeType===1&&(f.cleanData(this[c].getElementsByTagName("*")),this[c].innerHTML=a)}catch(e){this.empty().append(a)}}else f.isFunction(a)?this.each(function(b){var c=f(this);c.html(a.call(this,b,c.html()))}):this.empty().append(a);return this},replaceWith:function(a){if(this[0]&&this[0].parentNode){if(f.isFunction(a))return this.each(function(b){var c=f(this),d=c.html();c.replaceWith(a.call(this,b,d))});typeof a!="string"&&(a=f(a).detach());return this.each(function(){var b=this.nextSibling,c=this.parentNode;f(this).remove(),b?f(b).before(a):f(c).append(a)})}return this.length?this.pushStack(f(f.isFunction(a)?a():a),"replaceWith",a):this},detach:function(a){return this.remove(a,!0)},domManip:function(a,c,d){var e,g,h,i,j=a[0],k=[];if(!f.support.checkClone&&arguments.length===3&&typeof j=="string"&&bb.test(j))return this.each(function(){f(this).domManip(a,c,d,!0)});if(f.isFunction(j))return this.each(function(e){var g=f(this);a[0]=j.call(this,e,c?g.html():b),g.domManip(a,c,d)});if(this[0]){i=j&&j.parentNode,f.support.parentNode&&i&&i.nodeType===11&&i.childNodes.length===this.length?e={fragment:i}:e=f.buildFragment(a,this,k),h=e.fragment,h.childNodes.length===1?g=h=h.firstChild:g=h.firstChild;if(g){c=c&&f.nodeName(g,"tr");for(var l=0,m=this.length,n=m-1;l<m;l++)d.call(c?bf(this[l],g):this[l],e.cacheable||m>1&&l<n?f.clone(h,!0,!0):h)}k.length&&f.each(k,bl)}return this}}),f.buildFragment=function(a,b,d){var e,g,h,i;b&&b[0]&&(i=b[0].ownerDocument||b[0]),i.createDocumentFragment||(i=c),a.length===1&&typeof a[0]=="string"&&a[0].length<512&&i===c&&a[0].charAt(0)==="<"&&!ba.test(a[0])&&(f.support.checkClone||!bb.test(a[0]))&&(g=!0,h=f.fragments[a[0]],h&&h!==1&&(e=h)),e||(e=i.createDocumentFragment(),f.clean
+(a,i,e,d)),g&&(f.fragments[a[0]]=h?e:1);return{fragment:e,cacheable:g}},f.fragments={},f.each({appendTo:"append",prependTo:"prepend",insertBefore:"before",insertAfter:"after",replaceAll:"replaceWith"},function(a,b){f.fn[a]=function(c){var d=[],e=f(c),g=this.length===1&&this[0].parentNode;if(g&&g.nodeType===11&&g.childNodes.length===1&&e.length===1){e[b](this[0]);return this}for(var h=0,i=e.length;h<i;h++){var j=(h>0?this.clone(!0):this).get();f(e[h])[b](j),d=d.concat(j)}return this.pushStack(d,a,e.selector)}}),f.extend({clone:function(a,b,c){var d=a.cloneNode(!0),e,g,h;if((!f.support.noCloneEvent||!f.support.noCloneChecked)&&(a.nodeType===1||a.nodeType===11)&&!f.isXMLDoc(a)){bh(a,d),e=bi(a),g=bi(d);for(h=0;e[h];++h)g[h]&&bh(e[h],g[h])}if(b){bg(a,d);if(c){e=bi(a),g=bi(d);for(h=0;e[h];++h)bg(e[h],g[h])}}e=g=null;return d},clean:function(a,b,d,e){var g;b=b||c,typeof b.createElement=="undefined"&&(b=b.ownerDocument||b[0]&&b[0].ownerDocument||c);var h=[],i;for(var j=0,k;(k=a[j])!=null;j++){typeof k=="number"&&(k+="");if(!k)continue;if(typeof k=="string")if(!_.test(k))k=b.createTextNode(k);else{k=k.replace(Y,"<$1></$2>");var l=(Z.exec(k)||["",""])[1].toLowerCase(),m=be[l]||be._default,n=m[0],o=b.createElement("div");o.innerHTML=m[1]+k+m[2];while(n--)o=o.lastChild;if(!f.support.tbody){var p=$.test(k),q=l==="table"&&!p?o.firstChild&&o.firstChild.childNodes:m[1]==="<table>"&&!p?o.childNodes:[];for(i=q.length-1;i>=0;--i)f.nodeName(q[i],"tbody")&&!q[i].childNodes.length&&q[i].parentNode.removeChild(q[i])}!f.support.leadingWhitespace&&X.test(k)&&o.insertBefore(b.createTextNode(X.exec(k)[0]),o.firstChild),k=o.childNodes}var r;if(!f.support.appendChecked)if(k[0]&&typeof (r=k.length)=="number")for(i=0;i<r;i++)bk(k[i]);else bk(k);k.nodeType?h.push(k):h=f.merge(h,k)}if(d){g=function(a){return!a.type||bc.test(a.type)};for(j=0;h[j];j++)if(e&&f.nodeName(h[j],"script")&&(!h[j].type||h[j].type.toLowerCase()==="text/javascript"))e.push(h[j].parentNode?h[j].parentNode.removeChild(h[j]):h[j]);else{if(h[j].nodeType===1){var s=f.grep(h[j].getElementsByTagName("script"),g);h.splice.apply(h,[j+1,0].concat(s))}d.appendChild(h[j])}}return h},cleanData:function(a){var b,c,d=f.cache,e=f.expando,g=f.event.special,h=f.support.deleteExpando;for(var i=0,j;(j=a[i])!=null;i++){if(j.nodeName&&f.noData[j.nodeName.toLowerCase()])continue;c=j[f.expando];if(c){b=d[c]&&d[c][e];if(b&&b.events){for(var k in b.events)g[k]?f.event.remove(j,k):f.removeEvent(j,k,b.handle);b.handle&&(b.handle.elem=null)}h?delete j[f.expando]:j.removeAttribute&&j.removeAttribute(f.expando),delete d[c]}}}});var bm=/alpha\([^)]*\)/i,bn=/opacity=([^)]*)/,bo=/([A-Z]|^ms)/g,bp=/^-?\d+(?:px)?$/i,bq=/^-?\d/,br=/^([\-+])=([\-+.\de]+)/,bs={position:"absolute",visibility:"hidden",display:"block"},bt=["Left","Right"],bu=["Top","Bottom"],bv,bw,bx;f.fn.css=function(a,c){if(arguments.length===2&&c===b)return this;return f.access(this,a,c,!0,function(a,c,d){return d!==b?f.style(a,c,d):f.css(a,c)})},f.extend({cssHooks:{opacity:{get:function(a,b){if(b){var c=bv(a,"opacity","opacity");return c===""?"1":c}return a.style.opacity}}},cssNumber:{fillOpacity:!0,fontWeight:!0,lineHeight:!0,opacity:!0,orphans:!0,widows:!0,zIndex:!0,zoom:!0},cssProps:{"float":f.support.cssFloat?"cssFloat":"styleFloat"},style:function(a,c,d,e){if(!!a&&a.nodeType!==3&&a.nodeType!==8&&!!a.style){var g,h,i=f.camelCase(c),j=a.style,k=f.cssHooks[i];c=f.cssProps[i]||i;if(d===b){if(k&&"get"in k&&(g=k.get(a,!1,e))!==b)return g;return j[c]}h=typeof d,h==="string"&&(g=br.exec(d))&&(d=+(g[1]+1)*+g[2]+parseFloat(f.css(a,c)),h="number");if(d==null||h==="number"&&isNaN(d))return;h==="number"&&!f.cssNumber[i]&&(d+="px");if(!k||!("set"in k)||(d=k.set(a,d))!==b)try{j[c]=d}catch(l){}}},css:function(a,c,d){var e,g;c=f.camelCase(c),g=f.cssHooks[c],c=f.cssProps[c]||c,c==="cssFloat"&&(c="float");if(g&&"get"in g&&(e=g.get(a,!0,d))!==b)return e;if(bv)return bv(a,c)},swap:function(a,b,c){var d={};for(var e in b)d[e]=a.style[e],a.style[e]=b[e];c.call(a);for(e in b)a.style[e]=d[e]}}),f.curCSS=f.css,f.each(["height","width"],function(a,b){f.cssHooks[b]={get:function(a,c,d){var e;if(c){if(a.offsetWidth!==0)return by(a,b,d);f.swap(a,bs,function(){e=by(a,b,d)});return e}},set:function(a,b){if(!bp.test(b))return b;b=parseFloat(b);if(b>=0)return b+"px"}}}),f.support.opacity||(f.cssHooks.opacity={get:function(a,b){return bn.test((b&&a.currentStyle?a.currentStyle.filter:a.style.filter)||"")?parseFloat(RegExp.$1)/100+"":b?"1":""},set:function(a,b){var c=a.style,d=a.currentStyle,e=f.isNaN(b)?"":"alpha(opacity="+b*100+")",g=d&&d.filter||c.filter||"";c.zoom=1;if(b>=1&&f.trim(g.replace(bm,""))===""){c.removeAttribute("filter");if(d&&!d.filter)return}c.filter=bm.test(g)?g.replace(bm,e):g+" "+e}}),f(function(){f.support.reliableMarginRight||(f.cssHooks.marginRight={get:function(a,b){var c;f.swap(a,{display:"inline-block"},function(){b?c=bv(a,"margin-right","marginRight"):c=a.style.marginRight});return c}})}),c.defaultView&&c.defaultView.getComputedStyle&&(bw=function(a,c){var d,e,g;c=c.replace(bo,"-$1").toLowerCase();if(!(e=a.ownerDocument.defaultView))return b;if(g=e.getComputedStyle(a,null))d=g.getPropertyValue(c),d===""&&!f.contains(a.ownerDocument.documentElement,a)&&(d=f.style(a,c));return d}),c.documentElement.currentStyle&&(bx=function(a,b){var c,d=a.currentStyle&&a.currentStyle[b],e=a.runtimeStyle&&a.runtimeStyle[b],f=a.style;!bp.test(d)&&bq.test(d)&&(c=f.left,e&&(a.runtimeStyle.left=a.currentStyle.left),f.left=b==="fontSize"?"1em":d||0,d=f.pixelLeft+"px",f.left=c,e&&(a.runtimeStyle.left=e));return d===""?"auto":d}),bv=bw||bx,f.expr&&f.expr.filters&&(f.expr.filters.hidden=function(a){var b=a.offsetWidth,c=a.offsetHeight;return b===0&&c===0||!f.support.reliableHiddenOffsets&&(a.style.display||f.css(a,"display"))==="none"},f.expr.filters.visible=function(a){return!f.expr.filters.hidden(a)});var bz=/%20/g,bA=/\[\]$/,bB=/\r?\n/g,bC=/#.*$/,bD=/^(.*?):[ \t]*([^\r\n]*)\r?$/mg,bE=/^(?:color|date|datetime|datetime-local|email|hidden|month|number|password|range|search|tel|text|time|url|week)$/i,bF=/^(?:about|app|app\-storage|.+\-extension|file|res|widget):$/,bG=/^(?:GET|HEAD)$/,bH=/^\/\//,bI=/\?/,bJ=/<script\b[^<]*(?:(?!<\/script>)<[^<]*)*<\/script>/gi,bK=/^(?:select|textarea)/i,bL=/\s+/,bM=/([?&])_=[^&]*/,bN=/^([\w\+\.\-]+:)(?:\/\/([^\/?#:]*)(?::(\d+))?)?/,bO=f.fn.load,bP={},bQ={},bR,bS,bT=["*/"]+["*"];try{bR=e.href}catch(bU){bR=c.createElement("a"),bR.href="",bR=bR.href}bS=bN.exec(bR.toLowerCase())||[],f.fn.extend({load:function(a,c,d){if(typeof a!="string"&&bO)return bO.apply(this,arguments);if(!this.length)return this;var e=a.indexOf(" ");if(e>=0){var g=a.slice(e,a.length);a=a.slice(0,e)}var h="GET";c&&(f.isFunction(c)?(d=c,c=b):typeof c=="object"&&(c=f.param(c,f.ajaxSettings.traditional),h="POST"));var i=this;f.ajax({url:a,type:h,dataType:"html",data:c,complete:function(a,b,c){c=a.responseText,a.isResolved()&&(a.done(function(a){c=a}),i.html(g?f("<div>").append(c.replace(bJ,"")).find(g):c)),d&&i.each(d,[c,b,a])}});return this},serialize:function(){return f.param(this.serializeArray())},serializeArray:function(){return this.map(function(){return this.elements?f.makeArray(this.elements):this}).filter(function(){return this.name&&!this.disabled&&(this.checked||bK.test(this.nodeName)||bE.test(this.type))}).map(function(a,b){var c=f(this).val();return c==null?null:f.isArray(c)?f.map(c,function(a,c){return{name:b.name,value:a.replace(bB,"\r\n")}}):{name:b.name,value:c.replace(bB,"\r\n")}}).get()}}),f.each("ajaxStart ajaxStop ajaxComplete ajaxError ajaxSuccess ajaxSend".split(" "),function(a,b){f.fn[b]=function(a){return this.bind(b,a)}}),f.each(["get","post"],function(a,c){f[c]=function(a,d,e,g){f.isFunction(d)&&(g=g||e,e=d,d=b);return f.ajax({type:c,url:a,data:d,success:e,dataType:g})}}),f.extend({getScript:function(a,c){return f.get(a,b,c,"script")},getJSON:function(a,b,c){return f.get(a,b,c,"json")},ajaxSetup:function(a,b){b?bX(a,f.ajaxSettings):(b=a,a=f.ajaxSettings),bX(a,b);return a},ajaxSettings:{url:bR,isLocal:bF.test(bS[1]),global:!0,type:"GET",contentType:"application/x-www-form-urlencoded",processData:!0,async:!0,accepts:{xml:"application/xml, text/xml",html:"text/html",text:"text/plain",json:"application/json, text/javascript","*":bT},contents:{xml:/xml/,html:/html/,json:/json/},responseFields:{xml:"responseXML",text:"responseText"},converters:{"* text":a.String,"text html":!0,"text json":f.parseJSON,"text xml":f.parseXML},flatOptions:{context:!0,url:!0}},ajaxPrefilter:bV(bP),ajaxTransport:bV(bQ),ajax:function(a,c){function w(a,c,l,m){if(s!==2){s=2,q&&clearTimeout(q),p=b,n=m||"",v.readyState=a>0?4:0;var o,r,u,w=c,x=l?bZ(d,v,l):b,y,z;if(a>=200&&a<300||a===304){if(d.ifModified){if(y=v.getResponseHeader("Last-Modified"))f.lastModified[k]=y;if(z=v.getResponseHeader("Etag"))f.etag[k]=z}if(a===304)w="notmodified",o=!0;else try{r=b$(d,x),w="success",o=!0}catch(A){w="parsererror",u=A}}else{u=w;if(!w||a)w="error",a<0&&(a=0)}v.status=a,v.statusText=""+(c||w),o?h.resolveWith(e,[r,w,v]):h.rejectWith(e,[v,w,u]),v.statusCode(j),j=b,t&&g.trigger("ajax"+(o?"Success":"Error"),[v,d,o?r:u]),i.resolveWith(e,[v,w]),t&&(g.trigger("ajaxComplete",[v,d]),--f.active||f.event.trigger("ajaxStop"))}}typeof a=="object"&&(c=a,a=b),c=c||{};var d=f.ajaxSetup({},c),e=d.context||d,g=e!==d&&(e.nodeType||e instanceof f)?f(e):f.event,h=f.Deferred(),i=f._Deferred(),j=d.statusCode||{},k,l={},m={},n,o,p,q,r,s=0,t,u,v={readyState:0,setRequestHeader:function(a,b){if(!s){var c=a.toLowerCase();a=m[c]=m[c]||a,l[a]=b}return this},getAllResponseHeaders:function(){return s===2?n:null},getResponseHeader:function(a){var c;if(s===2){if(!o){o={};while(c=bD.exec(n))o[c[1].toLowerCase()]=c[2]}c=o[a.toLowerCase()]}return c===b?null:c},overrideMimeType:function(a){s||(d.mimeType=a);return this},abort:function(a){a=a||"abort",p&&p.abort(a),w(0,a);return this}};h.promise(v),v.success=v.done,v.error=v.fail,v.complete=i.done,v.statusCode=function(a){if(a){var b;if(s<2)for(b in a)j[b]=[j[b],a[b]];else b=a[v.status],v.then(b,b)}return this},d.url=((a||d.url)+"").replace(bC,"").replace(bH,bS[1]+"//"),d.dataTypes=f.trim(d.dataType||"*").toLowerCase().split(bL),d.crossDomain==null&&(r=bN.exec(d.url.toLowerCase()),d.crossDomain=!(!r||r[1]==bS[1]&&r[2]==bS[2]&&(r[3]||(r[1]==="http:"?80:443))==(bS[3]||(bS[1]==="http:"?80:443)))),d.data&&d.processData&&typeof d.data!="string"&&(d.data=f.param(d.data,d.traditional)),bW(bP,d,c,v);if(s===2)return!1;t=d.global,d.type=d.type.toUpperCase(),d.hasContent=!bG.test(d.type),t&&f.active++===0&&f.event.trigger("ajaxStart");if(!d.hasContent){d.data&&(d.url+=(bI.test(d.url)?"&":"?")+d.data,delete d.data),k=d.url;if(d.cache===!1){var x=f.now(),y=d.url.replace(bM,"$1_="+x);d.url=y+(y===d.url?(bI.test(d.url)?"&":"?")+"_="+x:"")}}(d.data&&d.hasContent&&d.contentType!==!1||c.contentType)&&v.setRequestHeader("Content-Type",d.contentType),d.ifModified&&(k=k||d.url,f.lastModified[k]&&v.setRequestHeader("If-Modified-Since",f.lastModified[k]),f.etag[k]&&v.setRequestHeader("If-None-Match",f.etag[k])),v.setRequestHeader("Accept",d.dataTypes[0]&&d.accepts[d.dataTypes[0]]?d.accepts[d.dataTypes[0]]+(d.dataTypes[0]!=="*"?", "+bT+"; q=0.01":""):d.accepts["*"]);for(u in d.headers)v.setRequestHeader(u,d.headers[u]);if(d.beforeSend&&(d.beforeSend.call(e,v,d)===!1||s===2)){v.abort();return!1}for(u in{success:1,error:1,complete:1})v[u](d[u]);p=bW(bQ,d,c,v);if(!p)w(-1,"No Transport");else{v.readyState=1,t&&g.trigger("ajaxSend",[v,d]),d.async&&d.timeout>0&&(q=setTimeout(function(){v.abort("timeout")},d.timeout));try{s=1,p.send(l,w)}catch(z){s<2?w(-1,z):f.error(z)}}return v},param:function(a,c){var d=[],e=function(a,b){b=f.isFunction(b)?b():b,d[d.length]=encodeURIComponent(a)+"="+encodeURIComponent(b)};c===b&&(c=f.ajaxSettings.traditional);if(f.isArray(a)||a.jquery&&!f.isPlainObject(a))f.each(a,function(){e(this.name,this.value)});else for(var g in a)bY(g,a[g],c,e);return d.join("&").replace(bz,"+")}}),f.extend({active:0,lastModified:{},etag:{}});var b_=f.now(),ca=/(\=)\?(&|$)|\?\?/i;f.ajaxSetup({jsonp:"callback",jsonpCallback:function(){return f.expando+"_"+b_++}}),f.ajaxPrefilter("json jsonp",function(b,c,d){var e=b.contentType==="application/x-www-form-urlencoded"&&typeof b.data=="string";if(b.dataTypes[0]==="jsonp"||b.jsonp!==!1&&(ca.test(b.url)||e&&ca.test(b.data))){var g,h=b.jsonpCallback=f.isFunction(b.jsonpCallback)?b.jsonpCallback():b.jsonpCallback,i=a[h],j=b.url,k=b.data,l="$1"+h+"$2";b.jsonp!==!1&&(j=j.replace(ca,l),b.url===j&&(e&&(k=k.replace(ca,l)),b.data===k&&(j+=(/\?/.test(j)?"&":"?")+b.jsonp+"="+h))),b.url=j,b.data=k,a[h]=function(a){g=[a]},d.always(function(){a[h]=i,g&&f.isFunction(i)&&a[h](g[0])}),b.converters["script json"]=function(){g||f.error(h+" was not called");return g[0]},b.dataTypes[0]="json";return"script"}}),f.ajaxSetup({accepts:{script:"text/javascript, application/javascript, application/ecmascript, application/x-ecmascript"},contents:{script:/javascript|ecmascript/},converters:{"text script":function(a){f.globalEval(a);return a}}}),f.ajaxPrefilter("script",function(a){a.cache===b&&(a.cache=!1),a.crossDomain&&(a.type="GET",a.global=!1)}),f.ajaxTransport("script",function(a){if(a.crossDomain){var d,e=c.head||c.getElementsByTagName("head")[0]||c.documentElement;return{send:function(f,g){d=c.createElement("script"),d.async="async",a.scriptCharset&&(d.charset=a.scriptCharset),d.src=a.url,d.onload=d.onreadystatechange=function(a,c){if(c||!d.readyState||/loaded|complete/.test(d.readyState))d.onload=d.onreadystatechange=null,e&&d.parentNode&&e.removeChild(d),d=b,c||g(200,"success")},e.insertBefore(d,e.firstChild)},abort:function(){d&&d.onload(0,1)}}}});var cb=a.ActiveXObject?function(){for(var a in cd)cd[a](0,1)}:!1,cc=0,cd;f.ajaxSettings.xhr=a.ActiveXObject?function(){return!this.isLocal&&ce()||cf()}:ce,function(a){f.extend(f.support,{ajax:!!a,cors:!!a&&"withCredentials"in a})}(f.ajaxSettings.xhr()),f.support.ajax&&f.ajaxTransport(function(c){if(!c.crossDomain||f.support.cors){var d;return{send:function(e,g){var h=c.xhr(),i,j;c.username?h.open(c.type,c.url,c.async,c.username,c.password):h.open(c.type,c.url,c.async);if(c.xhrFields)for(j in c.xhrFields)h[j]=c.xhrFields[j];c.mimeType&&h.overrideMimeType&&h.overrideMimeType(c.mimeType),!c.crossDomain&&!e["X-Requested-With"]&&(e["X-Requested-With"]="XMLHttpRequest");try{for(j in e)h.setRequestHeader(j,e[j])}catch(k){}h.send(c.hasContent&&c.data||null),d=function(a,e){var j,k,l,m,n;try{if(d&&(e||h.readyState===4)){d=b,i&&(h.onreadystatechange=f.noop,cb&&delete cd[i]);if(e)h.readyState!==4&&h.abort();else{j=h.status,l=h.getAllResponseHeaders(),m={},n=h.responseXML,n&&n.documentElement&&(m.xml=n),m.text=h.responseText;try{k=h.statusText}catch(o){k=""}!j&&c.isLocal&&!c.crossDomain?j=m.text?200:404:j===1223&&(j=204)}}}catch(p){e||g(-1,p)}m&&g(j,k,m,l)},!c.async||h.readyState===4?d():(i=++cc,cb&&(cd||(cd={},f(a).unload(cb)),cd[i]=d),h.onreadystatechange=d)},abort:function(){d&&d(0,1)}}}});var cg={},ch,ci,cj=/^(?:toggle|show|hide)$/,ck=/^([+\-]=)?([\d+.\-]+)([a-z%]*)$/i,cl,cm=[["height","marginTop","marginBottom","paddingTop","paddingBottom"],["width","marginLeft","marginRight","paddingLeft","paddingRight"],["opacity"]],cn;f.fn.extend({show:function(a,b,c){var d,e;if(a||a===0)return this.animate(cq("show",3),a,b,c);for(var g=0,h=this.length;g<h;g++)d=this[g],d.style&&(e=d.style.display,!f._data(d,"olddisplay")&&e==="none"&&(e=d.style.display=""),e===""&&f.css(d,"display")==="none"&&f._data(d,"olddisplay",cr(d.nodeName)));for(g=0;g<h;g++){d=this[g];if(d.style){e=d.style.display;if(e===""||e==="none")d.style.display=f._data(d,"olddisplay")||""}}return this},hide:function(a,b,c){if(a||a===0)return this.animate(cq("hide",3),a,b,c);for(var d=0,e=this.length;d<e;d++)if(this[d].style){var g=f.css(this[d],"display");g!=="none"&&!f._data(this[d],"olddisplay")&&f._data(this[d],"olddisplay",g)}for(d=0;d<e;d++)this[d].style&&(this[d].style.display="none");return this},_toggle:f.fn.toggle,toggle:function(a,b,c){var d=typeof a=="boolean";f.isFunction(a)&&f.isFunction(b)?this._toggle.apply(this,arguments):a==null||d?this.each(function(){var b=d?a:f(this).is(":hidden");f(this)[b?"show":"hide"]()}):this.animate(cq("toggle",3),a,b,c);return this},fadeTo:function(a,b,c,d){return this.filter(":hidden").css("opacity",0).show().end().animate({opacity:b},a,c,d)},animate:function(a,b,c,d){var e=f.speed(b,c,d);if(f.isEmptyObject(a))return this.each(e.complete,[!1]);a=f.extend({},a);return this[e.queue===!1?"each":"queue"](function(){e.queue===!1&&f._mark(this);var b=f.extend({},e),c=this.nodeType===1,d=c&&f(this).is(":hidden"),g,h,i,j,k,l,m,n,o;b.animatedProperties={};for(i in a){g=f.camelCase(i),i!==g&&(a[g]=a[i],delete a[i]),h=a[g],f.isArray(h)?(b.animatedProperties[g]=h[1],h=a[g]=h[0]):b.animatedProperties[g]=b.specialEasing&&b.specialEasing[g]||b.easing||"swing";if(h==="hide"&&d||h==="show"&&!d)return b.complete.call(this);c&&(g==="height"||g==="width")&&(b.overflow=[this.style.overflow,this.style.overflowX,this.style.overflowY],f.css(this,"display")==="inline"&&f.css(this,"float")==="none"&&(f.support.inlineBlockNeedsLayout?(j=cr(this.nodeName),j==="inline"?this.style.display="inline-block":(this.style.display="inline",this.style.zoom=1)):this.style.display="inline-block"))}b.overflow!=null&&(this.style.overflow="hidden");for(i in a)k=new f.fx(this,b,i),h=a[i],cj.test(h)?k[h==="toggle"?d?"show":"hide":h]():(l=ck.exec(h),m=k.cur(),l?(n=parseFloat(l[2]),o=l[3]||(f.cssNumber[i]?"":"px"),o!=="px"&&(f.style(this,i,(n||1)+o),m=(n||1)/k.cur()*m,f.style(this,i,m+o)),l[1]&&(n=(l[1]==="-="?-1:1)*n+m),k.custom(m,n,o)):k.custom(m,h,""));return!0})},stop:function(a,b){a&&this.queue([]),this.each(function(){var a=f.timers,c=a.length;b||f._unmark(!0,this);while(c--)a[c].elem===this&&(b&&a[c](!0),a.splice(c,1))}),b||this.dequeue();return this}}),f.each({slideDown:cq("show",1),slideUp:cq("hide",1),slideToggle:cq("toggle",1),fadeIn:{opacity:"show"},fadeOut:{opacity:"hide"},fadeToggle:{opacity:"toggle"}},function(a,b){f.fn[a]=function(a,c,d){return this.animate(b,a,c,d)}}),f.extend({speed:function(a,b,c){var d=a&&typeof a=="object"?f.extend({},a):{complete:c||!c&&b||f.isFunction(a)&&a,duration:a,easing:c&&b||b&&!f.isFunction(b)&&b};d.duration=f.fx.off?0:typeof d.duration=="number"?d.duration:d.duration in f.fx.speeds?f.fx.speeds[d.duration]:f.fx.speeds._default,d.old=d.complete,d.complete=function(a){f.isFunction(d.old)&&d.old.call(this),d.queue!==!1?f.dequeue(this):a!==!1&&f._unmark(this)};return d},easing:{linear:function(a,b,c,d){return c+d*a},swing:function(a,b,c,d){return(-Math.cos(a*Math.PI)/2+.5)*d+c}},timers:[],fx:function(a,b,c){this.options=b,this.elem=a,this.prop=c,b.orig=b.orig||{}}}),f.fx.prototype={update:function(){this.options.step&&this.options.step.call(this.elem,this.now,this),(f.fx.step[this.prop]||f.fx.step._default)(this)},cur:function(){if(this.elem[this.prop]!=null&&(!this.elem.style||this.elem.style[this.prop]==null))return this.elem[this.prop];var a,b=f.css(this.elem,this.prop);return isNaN(a=parseFloat(b))?!b||b==="auto"?0:b:a},custom:function(a,b,c){function g(a){return d.step(a)}var d=this,e=f.fx;this.startTime=cn||co(),this.start=a,this.end=b,this.unit=c||this.unit||(f.cssNumber[this.prop]?"":"px"),this.now=this.start,this.pos=this.state=0,g.elem=this.elem,g()&&f.timers.push(g)&&!cl&&(cl=setInterval(e.tick,e.interval))},show:function(){this.options.orig[this.prop]=f.style(this.elem,this.prop),this.options.show=!0,this.custom(this.prop==="width"||this.prop==="height"?1:0,this.cur()),f(this.elem).show()},hide:function(){this.options.orig[this.prop]=f.style(this.elem,this.prop),this.options.hide=!0,this.custom(this.cur(),0)},step:function(a){var b=cn||co(),c=!0,d=this.elem,e=this.options,g,h;if(a||b>=e.duration+this.startTime){this.now=this.end,this.pos=this.state=1,this.update(),e.animatedProperties[this.prop]=!0;for(g in e.animatedProperties)e.animatedProperties[g]!==!0&&(c=!1);if(c){e.overflow!=null&&!f.support.shrinkWrapBlocks&&f.each(["","X","Y"],function(a,b){d.style["overflow"+b]=e.overflow[a]}),e.hide&&f(d).hide();if(e.hide||e.show)for(var i in e.animatedProperties)f.style(d,i,e.orig[i]);e.complete.call(d)}return!1}e.duration==Infinity?this.now=b:(h=b-this.startTime,this.state=h/e.duration,this.pos=f.easing[e.animatedProperties[this.prop]](this.state,h,0,1,e.duration),this.now=this.start+(this.end-this.start)*this.pos),this.update();return!0}},f.extend(f.fx,{tick:function(){for(var a=f.timers,b=0;b<a.length;++b)a[b]()||a.splice(b--,1);a.length||f.fx.stop()},interval:13,stop:function(){clearInterval(cl),cl=null},speeds:{slow:600,fast:200,_default:400},step:{opacity:function(a){f.style(a.elem,"opacity",a.now)},_default:function(a){a.elem.style&&a.elem.style[a.prop]!=null?a.elem.style[a.prop]=(a.prop==="width"||a.prop==="height"?Math.max(0,a.now):a.now)+a.unit:a.elem[a.prop]=a.now}}}),f.expr&&f.expr.filters&&(f.expr.filters.animated=function(a){return f.grep(f.timers,function(b){return a===b.elem}).length});var cs=/^t(?:able|d|h)$/i,ct=/^(?:body|html)$/i;"getBoundingClientRect"in c.documentElement?f.fn.offset=function(a){var b=this[0],c;if(a)return this.each(function(b){f.offset.setOffset(this,a,b)});if(!b||!b.ownerDocument)return null;if(b===b.ownerDocument.body)return f.offset.bodyOffset(b);try{c=b.getBoundingClientRect()}catch(d){}var e=b.ownerDocument,g=e.documentElement;if(!c||!f.contains(g,b))return c?{top:c.top,left:c.left}:{top:0,left:0};var h=e.body,i=cu(e),j=g.clientTop||h.clientTop||0,k=g.clientLeft||h.clientLeft||0,l=i.pageYOffset||f.support.boxModel&&g.scrollTop||h.scrollTop,m=i.pageXOffset||f.support.boxModel&&g.scrollLeft||h.scrollLeft,n=c.top+l-j,o=c.left+m-k;return{top:n,left:o}}:f.fn.offset=function(a){var b=this[0];if(a)return this.each(function(b){f.offset.setOffset(this,a,b)});if(!b||!b.ownerDocument)return null;if(b===b.ownerDocument.body)return f.offset.bodyOffset(b);f.offset.initialize();var c,d=b.offsetParent,e=b,g=b.ownerDocument,h=g.documentElement,i=g.body,j=g.defaultView,k=j?j.getComputedStyle(b,null):b.currentStyle,l=b.offsetTop,m=b.offsetLeft;while((b=b.parentNode)&&b!==i&&b!==h){if(f.offset.supportsFixedPosition&&k.position==="fixed")break;c=j?j.getComputedStyle(b,null):b.currentStyle,l-=b.scrollTop,m-=b.scrollLeft,b===d&&(l+=b.offsetTop,m+=b.offsetLeft,f.offset.doesNotAddBorder&&(!f.offset.doesAddBorderForTableAndCells||!cs.test(b.nodeName))&&(l+=parseFloat(c.borderTopWidth)||0,m+=parseFloat(c.borderLeftWidth)||0),e=d,d=b.offsetParent),f.offset.subtractsBorderForOverflowNotVisible&&c.overflow!=="visible"&&(l+=parseFloat(c.borderTopWidth)||0,m+=parseFloat(c.borderLeftWidth)||0),k=c}if(k.position==="relative"||k.position==="static")l+=i.offsetTop,m+=i.offsetLeft;f.offset.supportsFixedPosition&&k.position==="fixed"&&(l+=Math.max(h.scrollTop,i.scrollTop),m+=Math.max(h.scrollLeft,i.scrollLeft));return{top:l,left:m}},f.offset={initialize:function(){var a=c.body,b=c.createElement("div"),d,e,g,h,i=parseFloat(f.css(a,"marginTop"))||0,j="<div style='position:absolute;top:0;left:0;margin:0;border:5px solid #000;padding:0;width:1px;height:1px;'><div></div></div><table style='position:absolute;top:0;left:0;margin:0;border:5px solid #000;padding:0;width:1px;height:1px;' cellpadding='0' cellspacing='0'><tr><td></td></tr></table>";f.extend(b.style,{position:"absolute",top:0,left:0,margin:0,border:0,width:"1px",height:"1px",visibility:"hidden"}),b.innerHTML=j,a.insertBefore(b,a.firstChild),d=b.firstChild,e=d.firstChild,h=d.nextSibling.firstChild.firstChild,this.doesNotAddBorder=e.offsetTop!==5,this.doesAddBorderForTableAndCells=h.offsetTop===5,e.style.position="fixed",e.style.top="20px",this.supportsFixedPosition=e.offsetTop===20||e.offsetTop===15,e.style.position=e.style.top="",d.style.overflow="hidden",d.style.position="relative",this.subtractsBorderForOverflowNotVisible=e.offsetTop===-5,this.doesNotIncludeMarginInBodyOffset=a.offsetTop!==i,a.removeChild(b),f.offset.initialize=f.noop},bodyOffset:function(a){var b=a.offsetTop,c=a.offsetLeft;f.offset.initialize(),f.offset.doesNotIncludeMarginInBodyOffset&&(b+=parseFloat(f.css(a,"marginTop"))||0,c+=parseFloat(f.css(a,"marginLeft"))||0);return{top:b,left:c}},setOffset:function(a,b,c){var d=f.css(a,"position");d==="static"&&(a.style.position="relative");var e=f(a),g=e.offset(),h=f.css(a,"top"),i=f.css(a,"left"),j=(d==="absolute"||d==="fixed")&&f.inArray("auto",[h,i])>-1,k={},l={},m,n;j?(l=e.position(),m=l.top,n=l.left):(m=parseFloat(h)||0,n=parseFloat(i)||0),f.isFunction(b)&&(b=b.call(a,c,g)),b.top!=null&&(k.top=b.top-g.top+m),b.left!=null&&(k.left=b.left-g.left+n),"using"in b?b.using.call(a,k):e.css(k)}},f.fn.extend({position:function(){if(!this[0])return null;var a=this[0],b=this.offsetParent(),c=this.offset(),d=ct.test(b[0].nodeName)?{top:0,left:0}:b.offset();c.top-=parseFloat(f.css(a,"marginTop"))||0,c.left-=parseFloat(f.css(a,"marginLeft"))||0,d.top+=parseFloat(f.css(b[0],"borderTopWidth"))||0,d.left+=parseFloat(f.css(b[0],"borderLeftWidth"))||0;return{top:c.top-d.top,left:c.left-d.left}},offsetParent:function(){return this.map(function(){var a=this.offsetParent||c.body;while(a&&!ct.test(a.nodeName)&&f.css(a,"position")==="static")a=a.offsetParent;return a})}}),f.each(["Left","Top"],function(a,c){var d="scroll"+c;f.fn[d]=function(c){var e,g;if(c===b){e=this[0];if(!e)return null;g=cu(e);return g?"pageXOffset"in g?g[a?"pageYOffset":"pageXOffset"]:f.support.boxModel&&g.document.documentElement[d]||g.document.body[d]:e[d]}return this.each(function(){g=cu(this),g?g.scrollTo(a?f(g).scrollLeft():c,a?c:f(g).scrollTop()):this[d]=c})}}),f.each(["Height","Width"],function(a,c){var d=c.toLowerCase();f.fn["inner"+c]=function(){var a=this[0];return a&&a.style?parseFloat(f.css(a,d,"padding")):null},f.fn["outer"+c]=function(a){var b=this[0];return b&&b.style?parseFloat(f.css(b,d,a?"margin":"border")):null},f.fn[d]=function(a){var e=this[0];if(!e)return a==null?null:this;if(f.isFunction(a))return this.each(function(b){var c=f(this);c[d](a.call(this,b,c[d]()))});if(f.isWindow(e)){var g=e.document.documentElement["client"+c],h=e.document.body;return e.document.compatMode==="CSS1Compat"&&g||h&&h["client"+c]||g}if(e.nodeType===9)return Math.max(e.documentElement["client"+c],e.body["scroll"+c],e.documentElement["scroll"+c],e.body["offset"+c],e.documentElement["offset"+c]);if(a===b){var i=f.css(e,d),j=parseFloat(i);return f.isNaN(j)?i:j}return this.css(d,typeof a=="string"?a:a+"px")}}),a.jQuery=a.$=f})(window);
+''',
+
     'jquery.lightbox-0.5.min.js': '''
 /**
  * jQuery lightBox plugin
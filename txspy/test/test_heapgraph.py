@@ -0,0 +1,168 @@
+# txSpy, a set of tools to spy inside Twisted applications
+#
+# Copyright (C) 2009 Nicolas Trangez  <eikke eikke com>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, version 2.1
+# of the License.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA  02110-1301  USA
+
+'''Tests for `txspy.heapgraph`'''
+
+import array
+import random
+
+from twisted.trial import unittest
+
+from txspy.heapgraph import HeapGraph, DominatorTree
+
+
+def makeGraph(typeNumbers, sizes, edges, typeNames):
+    '''Build a `HeapGraph` from lists of node attributes and edges'''
+    offsets = array.array('l')
+    targets = array.array('l')
+
+    for node in xrange(len(sizes)):
+        offsets.append(len(targets))
+        targets.extend(target for source, target in edges if source == node)
+    offsets.append(len(targets))
+
+    return HeapGraph(typeNames, array.array('l', typeNumbers),
+                     array.array('l', sizes),
+                     array.array('L', xrange(len(sizes))), offsets, targets)
+
+
+def reachable(graph, roots, removed=()):
+    '''Find the nodes reachable from some roots, avoiding removed nodes'''
+    seen = set()
+    stack = [root for root in roots if root not in removed]
+
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        stack.extend(target for target in graph.referents(node)
+                     if target not in removed)
+
+    return seen
+
+
+def findRoots(graph):
+    '''Pick roots the way `DominatorTree` does: nodes nobody refers to,
+    then the lowest numbered node of every part left unreachable'''
+    referred = set(graph.targets)
+    roots = [node for node in xrange(len(graph)) if node not in referred]
+    visited = reachable(graph, roots)
+
+    for node in xrange(len(graph)):
+        if node not in visited:
+            roots.append(node)
+            visited |= reachable(graph, [node])
+
+    return roots
+
+
+class DominatorTreeTest(unittest.TestCase):
+    '''Tests for `DominatorTree`, against brute force on small graphs
+
+    A node dominates another one if the latter is unreachable from the roots
+    once the former is removed.
+    '''
+
+    def test_bruteForce(self):
+        '''Dominators and retained sizes match brute force'''
+        rng = random.Random(3)
+
+        for _ in xrange(300):
+            n = rng.randint(1, 12)
+            edges = [(rng.randrange(n), rng.randrange(n))
+                     for _ in xrange(rng.randint(0, 2 * n))]
+            graph = makeGraph([rng.randrange(3) for _ in xrange(n)],
+                              [rng.randint(1, 100) for _ in xrange(n)],
+                              edges, ['a', 'b', 'c'])
+
+            self.assertTree(graph, DominatorTree(graph))
+
+    def assertTree(self, graph, tree):
+        '''Check a dominator tree using brute force'''
+        n = len(graph)
+        roots = findRoots(graph)
+
+        # Nodes dominated by every node, including itself
+        dominated = dict((node, set(xrange(n)) - reachable(graph, roots,
+                                                           set([node])))
+                         for node in xrange(n))
+
+        self.assertEqual(tree.totalSize, sum(graph.sizes))
+
+        for node in xrange(n):
+            self.assertEqual(tree.retainedSize(node),
+                             sum(graph.sizes[i] for i in dominated[node]))
+
+            # The immediate dominator is the strict dominator dominated by
+            # all others
+            dominators = [other for other in xrange(n)
+                          if other != node and node in dominated[other]]
+            expected = None
+            if dominators:
+                expected = min(dominators,
+                               key=lambda other: len(dominated[other]))
+            self.assertEqual(tree.dominator(node), expected)
+
+        for number, (name, count, shallow, retained) in \
+                enumerate(tree.byType()):
+            nodes = set(node for node in xrange(n)
+                        if graph.types[node] == number)
+
+            self.assertEqual(name, graph.typeNames[number])
+            self.assertEqual(count, len(nodes))
+            self.assertEqual(shallow, sum(graph.sizes[i] for i in nodes))
+
+            # Nodes dominated by any node of the type, counted once
+            freed = set()
+            for node in nodes:
+                freed |= dominated[node]
+            self.assertEqual(retained, sum(graph.sizes[i] for i in freed))
+
+    def test_chain(self):
+        '''Every node of a chain retains the rest of it'''
+        graph = makeGraph([0] * 4, [1, 2, 4, 8],
+                          [(0, 1), (1, 2), (2, 3)], ['a'])
+        tree = DominatorTree(graph)
+
+        self.assertEqual([tree.dominator(i) for i in xrange(4)],
+                         [None, 0, 1, 2])
+        self.assertEqual([tree.retainedSize(i) for i in xrange(4)],
+                         [15, 14, 12, 8])
+        self.assertEqual(tree.largest(2), [0, 1])
+
+
+class HeapGraphTest(unittest.TestCase):
+    '''Tests for `HeapGraph`'''
+
+    def test_build(self):
+        '''Referred objects are added to the graph'''
+        inner = ['x']
+        outer = [inner, inner]
+        graph = HeapGraph.build([outer])
+
+        self.assertEqual(graph.ids[0], id(outer))
+        self.assertEqual(graph.typeName(0), '__builtin__.list')
+
+        referents = list(graph.referents(0))
+        self.assertEqual(len(referents), 2)
+        self.assertEqual(referents[0], referents[1])
+        self.assertEqual(graph.ids[referents[0]], id(inner))
+        self.assertEqual(graph.typeName(graph.referents(referents[0])[0]),
+                         '__builtin__.str')
@@ -0,0 +1,143 @@
+# txSpy, a set of tools to spy inside Twisted applications
+#
+# Copyright (C) 2009 Nicolas Trangez  <eikke eikke com>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, version 2.1
+# of the License.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA  02110-1301  USA
+
+'''Tests for `txspy.heapsnapshot`'''
+
+import gc
+import sys
+import StringIO
+
+from twisted.trial import unittest
+
+from txspy import heapsnapshot
+from txspy.heapgraph import typeName
+
+
+class Leak(object):
+    '''Objects appearing between two snapshots'''
+
+
+class SnapshotTest(unittest.TestCase):
+    '''Tests for `writeSnapshot`, `Snapshot` and `diffSnapshots`'''
+
+    def write(self, objects, nameType=typeName):
+        '''Write a snapshot of some objects and open it'''
+        path = self.mktemp()
+
+        file_ = open(path, 'wb')
+        try:
+            result = heapsnapshot.writeSnapshot(file_, objects, nameType)
+        finally:
+            file_.close()
+
+        snapshot = heapsnapshot.Snapshot(path)
+        self.addCleanup(snapshot.close)
+
+        self.assertEqual(result, (len(snapshot), snapshot.numEdges))
+
+        return snapshot
+
+    def test_roundTrip(self):
+        '''Objects are read back in identity order'''
+        objects = [[1, 2], {'a': 3}, Leak(), (4, 'x')]
+        snapshot = self.write(objects)
+
+        self.assertEqual(len(snapshot), len(objects))
+
+        for index, object_ in enumerate(sorted(objects, key=id)):
+            id_, size, _, type_, count = snapshot.node(index)
+
+            self.assertEqual(id_, id(object_))
+            self.assertEqual(size, sys.getsizeof(object_, 0))
+            self.assertEqual(snapshot.typeNames[type_], typeName(object_))
+
+            referents = map(id, gc.get_referents(object_))
+            self.assertEqual(count, len(referents))
+            self.assertEqual(list(snapshot.referents(index)), referents)
+
+        self.assertEqual(list(snapshot.iterNodes()),
+                         map(snapshot.node, xrange(len(snapshot))))
+        self.assertEqual(snapshot.typeTotals()[typeName(objects[2])],
+                         (1, sys.getsizeof(objects[2], 0)))
+
+    def test_typeNames(self):
+        '''Type names are stored as UTF-8, whatever their encoding'''
+        names = {1: u'caf\xe9', 2: 'th\xc3\xa9', 3: 'na\xefve'}
+        snapshot = self.write([1, 2, 3], lambda object_: names[object_])
+
+        self.assertEqual(sorted(snapshot.typeNames),
+                         sorted([u'caf\xe9', u'th\xe9', u'na\ufffdve']))
+
+    def test_invalid(self):
+        '''Files which aren't snapshots are refused'''
+        path = self.mktemp()
+        open(path, 'wb').write('not a snapshot' * 10)
+
+        self.assertRaises(heapsnapshot.SnapshotError,
+                          heapsnapshot.Snapshot, path)
+
+    def test_truncated(self):
+        '''Truncated snapshots are refused, also by the command line tool'''
+        path = self.mktemp()
+        file_ = open(path, 'wb')
+        try:
+            heapsnapshot.writeSnapshot(file_, [[1], Leak(), 'x'])
+        finally:
+            file_.close()
+        data = open(path, 'rb').read()
+
+        truncated = self.mktemp()
+        for length in xrange(heapsnapshot.HEADER.size, len(data)):
+            open(truncated, 'wb').write(data[:length])
+
+            self.assertRaises(heapsnapshot.SnapshotError,
+                              heapsnapshot.Snapshot, truncated)
+
+        self.patch(sys, 'stderr', StringIO.StringIO())
+        self.assertEqual(heapsnapshot.main(['heapdiff', path, truncated]),
+                         1)
+        self.assertIn('truncated', sys.stderr.getvalue())
+
+    def test_diff(self):
+        '''New objects are found, and totals compared per type'''
+        kept = [Leak(), [], {}]
+        new = [Leak(), Leak(), []]
+        before = self.write(kept + [()])
+        after = self.write(kept + new)
+
+        rows = dict((row[0], row[1:])
+                    for row in heapsnapshot.diffSnapshots(before, after))
+        leakName = typeName(new[0])
+
+        leakSize = sys.getsizeof(new[0], 0)
+        self.assertEqual(rows[leakName][:4],
+                         (2, 2 * leakSize, 2, 2 * leakSize))
+        self.assertEqual(sorted(rows[leakName][4]),
+                         sorted([id(new[0]), id(new[1])]))
+
+        listSize = sys.getsizeof(new[2], 0)
+        self.assertEqual(rows['__builtin__.list'],
+                         (1, listSize, 1, listSize, [id(new[2])]))
+        self.assertEqual(rows['__builtin__.dict'], (0, 0, 0, 0, []))
+        self.assertEqual(rows['__builtin__.tuple'],
+                         (-1, -sys.getsizeof((), 0), 0, 0, []))
+
+        limited = dict((row[0], row[5]) for row in
+                       heapsnapshot.diffSnapshots(before, after, limit=1))
+        self.assertEqual(len(limited[leakName]), 1)
@@ -0,0 +1,455 @@
+# txSpy, a set of tools to spy inside Twisted applications
+#
+# Copyright (C) 2009 Nicolas Trangez  <eikke eikke com>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, version 2.1
+# of the License.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA  02110-1301  USA
+
+'''Tests for `txspy.objectbrowser`
+
+Sample stores are compared with a dense reference, recomputing everything
+from a plain list of samples, after every operation.
+'''
+
+import gc
+import types
+import random
+
+from twisted.trial import unittest
+
+from txspy import objectbrowser
+from txspy.objectbrowser import RollupHistory, SampleHistory, SparseSeries, \
+                                TypeNameCache
+
+
+def iterSeries(seed):
+    '''Fill series with random samples, expiring some now and then
+
+    :return: Iterator over series and the (sample number, count) pairs they
+             should store, after every operation
+    :rtype: iterator
+    '''
+    rng = random.Random(seed)
+
+    for _ in xrange(50):
+        series = SparseSeries()
+        samples = []
+        number = 0
+
+        for _ in xrange(200):
+            number += rng.choice((1, 1, 1, 2, 5))
+            count = rng.randint(1, 20)
+            series.append(number, count)
+            samples.append((number, count))
+
+            if rng.random() < 0.2:
+                first = number - rng.randint(0, 30)
+                series.expire(first)
+                samples = [(n, c) for n, c in samples if n >= first]
+
+            yield series, samples
+
+
+def iterHistories(seed):
+    '''Fill histories of several sizes with random samples
+
+    :return: Iterator over histories and the samples they should retain,
+             as dicts, after every sample
+    :rtype: iterator
+    '''
+    rng = random.Random(seed)
+    typeNames = ['a', 'b', 'c', 'd']
+
+    for size in 1, 2, 5, 17:
+        history = SampleHistory(size)
+        samples = []
+
+        for i in xrange(120):
+            counts = dict((typeName, rng.choice((0, 0, 1, 2, 3, 5, 8)))
+                          for typeName in typeNames
+                          if rng.random() < 0.7)
+            history.append(float(i), counts, rng.choice((None, 0, 2)))
+            samples.append(counts)
+
+            yield history, samples[-size:]
+
+
+def denseSeries(history, samples):
+    '''Get a dense copy of the series of all types found in some samples
+
+    :return: Mapping of type names to lists of counts
+    :rtype: dict
+    '''
+    found = set(typeName for counts in samples
+                for typeName, count in counts.iteritems() if count)
+
+    return dict((typeName, [counts.get(typeName, 0) for counts in samples])
+                for typeName in found)
+
+
+def denseTrend(counts):
+    '''Fit a line through a list of counts, the slow way
+
+    :return: Slope and coefficient of determination, see
+             `SampleHistory.trend`
+    :rtype: tuple
+    '''
+    n = len(counts)
+
+    if n < 2:
+        return 0.0, 0.0
+
+    meanX = (n - 1) / 2.0
+    meanY = float(sum(counts)) / n
+    covariance = sum((x - meanX) * (y - meanY)
+                     for x, y in enumerate(counts))
+    varianceX = sum((x - meanX) ** 2 for x in xrange(n))
+    varianceY = sum((y - meanY) ** 2 for y in counts)
+
+    if varianceY == 0:
+        return 0.0, 0.0
+
+    return covariance / varianceX, \
+           covariance * covariance / (varianceX * varianceY)
+
+
+def denseStreak(counts):
+    '''Count the consecutive samples, up to the latest one, in which a
+    count grew'''
+    streak = 0
+
+    for i in xrange(len(counts) - 1, 0, -1):
+        if counts[i] <= counts[i - 1]:
+            break
+        streak += 1
+
+    return streak
+
+
+class SparseSeriesTest(unittest.TestCase):
+    '''Tests for `SparseSeries`'''
+
+    def test_matchesDense(self):
+        '''Aggregates and dense copies match the stored samples'''
+        for series, samples in iterSeries(7):
+            numbers = [n for n, _ in samples]
+            counts = [c for _, c in samples]
+
+            self.assertEqual(len(series), len(samples))
+            self.assertEqual(list(series.numbers), numbers)
+            self.assertEqual(list(series.counts), counts)
+
+            if not samples:
+                self.assertIdentical(series.first, None)
+                continue
+
+            self.assertEqual(series.first, numbers[0])
+            self.assertEqual(series.earliest, counts[0])
+            self.assertEqual(series.min, min(counts))
+            self.assertEqual(series.max, max(counts))
+
+            first = numbers[0] - 3
+            length = numbers[-1] - first + 5
+            dense = [0] * length
+            for n, c in samples:
+                dense[n - first] = c
+            self.assertEqual(list(series.dense(first, length)), dense)
+
+    def test_sums(self):
+        '''Sums for fitting trends match the stored samples'''
+        for series, samples in iterSeries(5):
+            self.assertEqual(series.sum, sum(c for _, c in samples))
+            self.assertEqual(series.squaredSum,
+                             sum(c * c for _, c in samples))
+            self.assertEqual(series.weightedSum,
+                             sum(n * c for n, c in samples))
+
+
+class SampleHistoryTest(unittest.TestCase):
+    '''Tests for `SampleHistory`'''
+
+    def test_matchesDense(self):
+        '''Per-type statistics match a dense copy of the retained samples'''
+        for history, samples in iterHistories(11):
+            self.assertEqual(history.numSamples, len(samples))
+
+            dense = denseSeries(history, samples)
+            self.assertEqual(set(history), set(dense))
+
+            for typeName, counts in dense.iteritems():
+                self.assertEqual(list(history[typeName]), counts)
+                self.assertEqual(list(history.samples(typeName, 1, 3)),
+                                 counts[1:3])
+                self.assertEqual(history.min(typeName), min(counts))
+                self.assertEqual(history.max(typeName), max(counts))
+                self.assertEqual(history.current(typeName), counts[-1])
+                self.assertEqual(history.first(typeName), counts[0])
+
+    def test_trend(self):
+        '''Trends and growth streaks match a dense copy of the retained
+        samples'''
+        for history, samples in iterHistories(13):
+            for typeName, counts in denseSeries(history, samples).iteritems():
+                self.assertEqual(history.streak(typeName),
+                                 denseStreak(counts))
+
+                slope, fit = history.trend(typeName)
+                expectedSlope, expectedFit = denseTrend(counts)
+                self.assertAlmostEqual(slope, expectedSlope)
+                self.assertAlmostEqual(fit, expectedFit)
+
+
+class RollupHistoryTest(unittest.TestCase):
+    '''Tests for `RollupHistory`'''
+
+    def series(self, rollup, typeName):
+        '''Get the minima, averages and maxima of a type as lists'''
+        return [list(samples) for samples in rollup.series(typeName)]
+
+    def test_aggregates(self):
+        '''Buckets keep the minimum, average and maximum count'''
+        rollup = RollupHistory(10, 3)
+        rollup.append(0, {'a': 1})
+        rollup.append(5, {'a': 4, 'b': 2})
+
+        # The open bucket is served as well
+        self.assertEqual(list(rollup.timestamps), [0])
+        self.assertEqual(self.series(rollup, 'a'), [[1], [3], [4]])
+        # Samples not finding a type count as zero
+        self.assertEqual(self.series(rollup, 'b'), [[0], [1], [2]])
+
+        rollup.append(12, {'b': 6})
+
+        self.assertEqual(list(rollup.timestamps), [0, 10])
+        self.assertEqual(self.series(rollup, 'a'), [[1, 0], [3, 0], [4, 0]])
+        self.assertEqual(self.series(rollup, 'b'), [[0, 6], [1, 6], [2, 6]])
+        self.assertEqual(rollup.min('b'), 0)
+        self.assertEqual(rollup.max('b'), 6)
+        self.assertEqual(rollup.numSamples, 2)
+        self.assertEqual(rollup.generation, 3)
+
+    def test_eviction(self):
+        '''Only the latest buckets are kept, empty ones included'''
+        rollup = RollupHistory(10, 3)
+
+        for timestamp in 0, 10, 20, 30:
+            rollup.append(timestamp, {'a': timestamp})
+
+        self.assertEqual(list(rollup.timestamps), [10, 20, 30])
+        self.assertEqual(self.series(rollup, 'a')[1], [10, 20, 30])
+        self.assertEqual(rollup.min('a'), 10)
+
+        # Buckets without samples are stored empty
+        rollup.append(60, {'a': 1})
+
+        self.assertEqual(list(rollup.timestamps), [40, 50, 60])
+        self.assertEqual(self.series(rollup, 'a')[1], [0, 0, 1])
+
+    def test_clockBackwards(self):
+        '''Samples from before the current bucket are added to it'''
+        rollup = RollupHistory(10, 5)
+
+        for timestamp, count in (100, 1), (110, 2), (90, 7), (115, 3):
+            rollup.append(timestamp, {'a': count})
+
+        self.assertEqual(list(rollup.timestamps), [100, 110])
+        self.assertEqual(self.series(rollup, 'a'),
+                         [[1, 2], [1, 4], [1, 7]])
+
+        rollup.append(120, {'a': 1})
+
+        self.assertEqual(list(rollup.timestamps), [100, 110, 120])
+
+
+class TypeNameCacheTest(unittest.TestCase):
+    '''Tests for `TypeNameCache` and the type name lookups using it'''
+
+    def test_cached(self):
+        '''Names are calculated once per type'''
+        formatted = []
+        def format(type_):
+            formatted.append(type_)
+            return objectbrowser.formatTypeName(type_)
+        cache = TypeNameCache(format)
+
+        self.assertEqual(cache[dict], '__builtin__.dict')
+        self.assertEqual(cache[dict], '__builtin__.dict')
+        self.assertEqual(formatted, [dict])
+        self.assertEqual(len(cache), 1)
+
+    def test_evicted(self):
+        '''Entries go away along with their type'''
+        cache = TypeNameCache()
+        class Transient(object):
+            pass
+
+        self.assertEqual(cache[Transient], '%s.Transient' % __name__)
+        self.assertEqual(len(cache), 1)
+
+        del Transient
+        gc.collect()
+
+        self.assertEqual(len(cache), 0)
+
+    def test_oldStyle(self):
+        '''Instances of old-style classes are named after their class'''
+        OldStyle = types.ClassType('OldStyle', (), {'__module__': 'm'})
+
+        self.assertEqual(objectbrowser.getTypeName(OldStyle()), 'm.OldStyle')
+        self.assertEqual(objectbrowser.countTypes([OldStyle(), OldStyle(), 1]),
+                         {'m.OldStyle': 2, '__builtin__.int': 1})
+
+    def test_sameName(self):
+        '''Types sharing a name are counted together'''
+        first = type('Twin', (object, ), {'__module__': 'm'})
+        second = type('Twin', (object, ), {'__module__': 'm'})
+
+        self.assertEqual(objectbrowser.countTypes([first(), second()]),
+                         {'m.Twin': 2})
+
+
+class CollectionPolicyTest(unittest.TestCase):
+    '''Tests for the garbage collection policies'''
+
+    def test_policies(self):
+        '''Policies select the generation to collect per sample'''
+        select = lambda policy: [policy.select(i) for i in xrange(5)]
+
+        self.assertEqual(select(objectbrowser.NeverCollect()), [None] * 5)
+        self.assertEqual(select(objectbrowser.CollectGeneration(1)), [1] * 5)
+        self.assertEqual(select(objectbrowser.CollectEvery(2, 0)),
+                         [0, None, 0, None, 0])
+
+    def test_overThreshold(self):
+        '''The oldest generation over its threshold is collected'''
+        self.patch(gc, 'get_count', lambda: (700, 8, 3))
+
+        select = lambda *thresholds: \
+            objectbrowser.CollectOverThreshold(*thresholds).select(0)
+
+        self.assertEqual(select(500, 10, 10), 0)
+        self.assertEqual(select(500, 5, 10), 1)
+        self.assertEqual(select(500, 5, 2), 2)
+        self.assertEqual(select(500, 5, None), 1)
+        self.assertEqual(select(1000), None)
+
+    def test_sampling(self):
+        '''Samples record the generation collected before them'''
+        browser = objectbrowser.ObjectBrowser(
+            3600, 10, collectionPolicy=objectbrowser.CollectEvery(2, 0))
+        # Takes the first sample right away
+        browser.startService()
+        self.addCleanup(browser.stopService)
+
+        browser.updateStats()
+        browser.updateStats()
+
+        self.assertEqual(browser.history.collectedGenerations,
+                         [0, None, 0])
+
+
+class Thing(object):
+    '''Instances to look for'''
+
+
+class InstanceReservoirTest(unittest.TestCase):
+    '''Tests for `InstanceReservoir`'''
+
+    def setUp(self):
+        self.typeName = objectbrowser.typeNames[Thing]
+        self.reservoir = objectbrowser.InstanceReservoir([self.typeName], 3)
+
+    def test_pick(self):
+        '''Only instances of the selected types are picked'''
+        things = [Thing() for _ in xrange(10)]
+        self.reservoir.add(things[:4] + [object(), 1, [], Thing])
+        self.reservoir.add(things[4:])
+
+        seen, picked = self.reservoir.pick(self.typeName, 2)
+        self.assertEqual(seen, 10)
+        self.assertEqual(len(picked), 2)
+
+        seen, picked = self.reservoir.pick(self.typeName, 5)
+        self.assertEqual(len(picked), 3)
+        self.assertEqual(len(set(map(id, picked))), 3)
+        for thing in picked:
+            self.assertTrue(any(thing is other for other in things))
+
+    def test_uniform(self):
+        '''Every instance added is equally likely to be selected'''
+        self.patch(random, 'randrange', random.Random(5).randrange)
+        things = [Thing() for _ in xrange(6)]
+        picks = dict.fromkeys(map(id, things), 0)
+
+        trials = 3000
+        for _ in xrange(trials):
+            self.reservoir.clear()
+            self.reservoir.add(things)
+            _, picked = self.reservoir.pick(self.typeName, 3)
+            for thing in picked:
+                picks[id(thing)] += 1
+
+        # Each is expected to be picked in half of the trials
+        for count in picks.itervalues():
+            self.assertTrue(0.45 * trials < count < 0.55 * trials, count)
+
+    def test_clear(self):
+        '''Clearing drops the selected instances'''
+        self.reservoir.add([Thing() for _ in xrange(5)])
+        self.reservoir.clear()
+        self.assertEqual(self.reservoir.pick(self.typeName, 3), (0, []))
+
+        thing = Thing()
+        self.reservoir.add([thing])
+        self.assertEqual(self.reservoir.pick(self.typeName, 3), (1, [thing]))
+
+
+class WalkReferrersTest(unittest.TestCase):
+    '''Tests for `walkReferrers`'''
+
+    def setUp(self):
+        self.owner = Thing()
+        self.owner.items = [Thing()]
+
+    def walk(self, maxDepth=5, maxNodes=1000):
+        return objectbrowser.walkReferrers(self.owner.items[:], maxDepth,
+                                           maxNodes, 60)
+
+    def test_chain(self):
+        '''Referrers are listed under the object they refer to'''
+        nodes, _ = self.walk()
+
+        self.assertEqual(nodes[0][:1] + nodes[0][2:], (None, None, False))
+        typeName = objectbrowser.typeNames[Thing]
+        self.assertTrue(nodes[0][1].startswith('%s at ' % typeName))
+
+        items = [i for i, (parent, _, reference, _) in enumerate(nodes)
+                 if parent == 0 and reference == '[0]']
+        self.assertEqual(len(items), 1)
+        self.assertTrue(nodes[items[0]][1].startswith('__builtin__.list at '))
+
+        attributes = [reference for parent, _, reference, _ in nodes
+                      if parent == items[0]]
+        self.assertEqual(attributes, ["['items']"])
+
+    def test_limits(self):
+        '''The walk is cut short by the depth and node limits'''
+        nodes, cut = self.walk(maxDepth=1)
+        self.assertTrue(cut)
+        self.assertEqual(set(node[0] for node in nodes[1:]), set([0]))
+
+        nodes, cut = self.walk(maxNodes=2)
+        self.assertTrue(cut)
+        self.assertEqual(len(nodes), 2)
@@ -0,0 +1,401 @@
+# txSpy, a set of tools to spy inside Twisted applications
+#
+# Copyright (C) 2009 Nicolas Trangez  <eikke eikke com>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, version 2.1
+# of the License.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA  02110-1301  USA
+
+'''Tests for the web resources of `txspy.objectbrowser`
+
+Requests go through a `twisted.web.server.Site` over a fake transport, the
+way a client would send them.
+'''
+
+try:
+    import json
+except ImportError:
+    # Python < 2.6
+    import simplejson as json
+
+from twisted.trial import unittest
+from twisted.internet import defer, task
+from twisted.web import server
+from twisted.test import proto_helpers
+
+from txspy import objectbrowser
+
+
+class Response(object):
+    '''Response to a request sent using `sendRequest`'''
+
+    def __init__(self, request, transport):
+        '''
+        :Parameters:
+            request : `twisted.web.server.Request`
+              Request the response belongs to
+            transport : `twisted.test.proto_helpers.StringTransport`
+              Transport the response was written to
+        '''
+        self.request = request
+        self.transport = transport
+
+    def parse(self):
+        '''Parse the data written so far
+
+        :return: Response code, headers (with lower case names) and body,
+                 with any chunked transfer encoding undone
+        :rtype: tuple
+        '''
+        head, _, body = self.transport.value().partition('\r\n\r\n')
+        lines = head.split('\r\n')
+        headers = dict((name.lower(), value) for name, _, value in
+                       (line.partition(': ') for line in lines[1:]))
+
+        if headers.get('transfer-encoding') == 'chunked':
+            chunks = []
+            while body:
+                size, _, body = body.partition('\r\n')
+                size = int(size, 16)
+                if size == 0:
+                    break
+                chunks.append(body[:size])
+                body = body[size + 2:]
+            body = ''.join(chunks)
+
+        return int(lines[0].split()[1]), headers, body
+
+
+def sendRequest(resource_, path, headers=()):
+    '''Send a GET request to a resource
+
+    :Parameters:
+        `resource\_` : `twisted.web.resource.IResource`
+          Root resource
+        path : str
+          Path and query of the request
+        headers : iterable
+          (name, value) tuples of request headers
+
+    :return: Response, and a `Deferred` firing once the response is finished
+    :rtype: tuple
+    '''
+    requests = []
+
+    class Request(server.Request):
+        def __init__(self, *args, **kwargs):
+            server.Request.__init__(self, *args, **kwargs)
+            requests.append(self)
+
+    site = server.Site(resource_, timeout=None)
+    site.requestFactory = Request
+    channel = site.buildProtocol(None)
+    transport = proto_helpers.StringTransport()
+    channel.makeConnection(transport)
+
+    channel.dataReceived('GET %s HTTP/1.1\r\nHost: localhost\r\n%s\r\n' % (
+        path, ''.join('%s: %s\r\n' % header for header in headers)))
+
+    request, = requests
+    if request.finished:
+        d = defer.succeed(None)
+    else:
+        d = request.notifyFinish()
+
+    return Response(request, transport), d
+
+
+def get(resource_, path, headers=()):
+    '''Send a GET request and wait for the complete response
+
+    :return: `Deferred` firing with the response code, headers and body,
+             see `Response.parse`
+    :rtype: `twisted.internet.defer.Deferred`
+    '''
+    response, d = sendRequest(resource_, path, headers)
+
+    return d.addCallback(lambda _: response.parse())
+
+
+class BrowserTestCase(unittest.TestCase):
+    '''Base class of tests of a running `ObjectBrowser`'''
+
+    def setUp(self):
+        # Takes a sample right away, the next one never comes
+        self.browser = objectbrowser.ObjectBrowser(3600, 10)
+        self.browser.startService()
+
+    def tearDown(self):
+        self.browser.stopService()
+
+
+class CachedPageTest(BrowserTestCase):
+    '''Tests for pages cached until the next sample, see `renderCached`'''
+
+    @defer.inlineCallbacks
+    def test_notModified(self):
+        '''Pages are revalidated using their entity tag'''
+        # Only the types of this test, the heap may have more than a page
+        page = '/?filter=x.'
+        code, headers, body = yield get(self.browser, page)
+        etag = headers['etag']
+
+        self.assertEqual(code, 200)
+        self.assertEqual(headers['cache-control'], 'no-cache')
+        self.assertIn('Heap Usage Statistics', body)
+
+        code, _, body = yield get(self.browser, page,
+                                  [('If-None-Match', etag)])
+        self.assertEqual((code, body), (304, ''))
+
+        code, _, _ = yield get(self.browser, page, [
+            ('If-Modified-Since', headers['last-modified'])])
+        self.assertEqual(code, 304)
+
+        # A new sample changes the page
+        self.browser.recordSample({'x.New': 1}, 0)
+
+        code, headers, body = yield get(self.browser, page,
+                                        [('If-None-Match', etag)])
+        self.assertEqual(code, 200)
+        self.assertNotEqual(headers['etag'], etag)
+        self.assertIn('x.New', body)
+
+
+class IndexQueryTest(BrowserTestCase):
+    '''Tests for filtering, sorting and paginating the index'''
+
+    def setUp(self):
+        BrowserTestCase.setUp(self)
+
+        for i in xrange(3):
+            self.browser.recordSample({'x.Flat': 5, 'x.Grow': 10 * i,
+                                       'x.Shrink': 30 - 10 * i,
+                                       'y.Other': 1}, i)
+
+    def test_parse(self):
+        '''Query arguments are normalized, invalid ones refused'''
+        parse = objectbrowser.parseIndexQuery
+
+        self.assertEqual(parse({}), (None, None, 'name',
+                                     objectbrowser.INDEX_PAGE_SIZE, 0))
+        self.assertEqual(parse({'filter': ['x.'], 'regex': [''],
+                                'sort': ['max'], 'limit': ['2'],
+                                'page': ['1']}),
+                         ('x.', None, 'max', 2, 1))
+
+        for args in {'sort': ['nope']}, {'limit': ['0']}, \
+                    {'page': ['-1']}, {'limit': ['many']}, {'regex': ['(']}:
+            self.assertRaises(ValueError, parse, args)
+
+    def test_select(self):
+        '''Types are filtered and sorted before picking a page'''
+        select = lambda *query: self.browser.selectTypes(query)
+
+        self.assertEqual(select('x.', None, 'name', 2, 0),
+                         (['x.Flat', 'x.Grow'], 3))
+        self.assertEqual(select('x.', None, 'name', 2, 1), (['x.Shrink'], 3))
+        self.assertEqual(select('x.', None, 'current', 2, 0),
+                         (['x.Grow', 'x.Shrink'], 3))
+        self.assertEqual(select('x.', 'S', 'max', 5, 0), (['x.Shrink'], 1))
+        self.assertEqual(select('x.', None, 'trend', 1, 0), (['x.Grow'], 3))
+        self.assertEqual(select('x.', None, 'name', 2, 5), ([], 3))
+
+    @defer.inlineCallbacks
+    def test_pages(self):
+        '''Pages tell which types they show'''
+        code, _, body = yield get(self.browser, '/?filter=x.&limit=2&page=1')
+        self.assertEqual(code, 200)
+        self.assertIn('Showing 3-3 of 3 types.', body)
+        self.assertIn('types/x.Shrink', body)
+        self.assertNotIn('types/x.Flat', body)
+
+        code, _, body = yield get(self.browser, '/?filter=x.&limit=2&page=9')
+        self.assertEqual(code, 200)
+        self.assertIn('No types on this page, 3 types in total.', body)
+        # Back to the last page
+        self.assertIn('page=1', body)
+
+        code, _, _ = yield get(self.browser, '/?sort=nope')
+        self.assertEqual(code, 400)
+
+
+class FakeRequest(object):
+    '''Request recording what's written to it'''
+
+    def __init__(self):
+        self.written = []
+        self.producer = None
+        self.finished = False
+        self.channel = self
+        self.transport = proto_helpers.StringTransport()
+
+    def registerProducer(self, producer, streaming):
+        self.producer = producer
+
+    def unregisterProducer(self):
+        self.producer = None
+
+    def write(self, data):
+        self.written.append(data)
+
+    def finish(self):
+        self.finished = True
+
+
+class ResponseProducerTest(unittest.TestCase):
+    '''Tests for `ResponseProducer`'''
+
+    def test_batches(self):
+        '''Parts are written in batches, unless paused'''
+        request = FakeRequest()
+        clock = task.Clock()
+        part = 'x' * 1000
+        numParts = 3 * objectbrowser.PRODUCER_CHUNK_SIZE // len(part)
+        producer = objectbrowser.ResponseProducer(request, [part] * numParts,
+                                                  clock)
+
+        batches = []
+        def callLater(delay, function):
+            batches.append(len(request.written))
+            return task.Clock.callLater(clock, delay, function)
+        clock.callLater = callLater
+
+        producer.start()
+        self.assertIdentical(request.producer, producer)
+
+        producer.pauseProducing()
+        clock.advance(0)
+        self.assertEqual(request.written, [])
+
+        producer.resumeProducing()
+        clock.advance(0)
+
+        self.assertTrue(request.finished)
+        self.assertIdentical(request.producer, None)
+        self.assertEqual(request.written, [part] * numParts)
+        # Scheduled on start, again on resume, and after every full batch
+        perBatch = -(-objectbrowser.PRODUCER_CHUNK_SIZE // len(part))
+        self.assertEqual(batches, [0, 0, perBatch, 2 * perBatch])
+
+    def test_error(self):
+        '''Failing to produce a part drops the connection'''
+        def parts():
+            yield 'first'
+            raise ValueError('broken')
+
+        request = FakeRequest()
+        clock = task.Clock()
+        objectbrowser.ResponseProducer(request, parts(), clock).start()
+        clock.advance(0)
+
+        self.assertEqual(request.written, ['first'])
+        self.assertFalse(request.finished)
+        self.assertTrue(request.transport.disconnecting)
+        self.assertEqual(len(self.flushLoggedErrors(ValueError)), 1)
+
+
+class StreamResourceTest(unittest.TestCase):
+    '''Tests for the Server-Sent Events stream, see `StreamResource`'''
+
+    def setUp(self):
+        self.stream = objectbrowser.StreamResource()
+
+    def connect(self, query=''):
+        '''Connect a client
+
+        :return: Response, and a `Deferred` firing once it's finished
+        :rtype: tuple
+        '''
+        response, d = sendRequest(self.stream, '/' + query)
+        self.addCleanup(self.stream.closeAll)
+
+        return response, d
+
+    def events(self, response):
+        '''Get the events sent to a client so far
+
+        :return: (event type, data) tuples, data decoded if JSON
+        :rtype: list
+        '''
+        _, headers, body = response.parse()
+        self.assertEqual(headers['content-type'], 'text/event-stream')
+
+        events = []
+        for block in body.split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in block.splitlines()
+                          if not line.startswith(':'))
+            if fields:
+                data = fields['data']
+                if fields['event'] == 'sample':
+                    data = json.loads(data)
+                events.append((fields['event'], data))
+
+        return events
+
+    def test_delta(self):
+        '''Clients get the counts which changed'''
+        response, _ = self.connect()
+
+        self.stream.publish(1.0, {'a': 1, 'b': 2})
+        self.stream.publish(2.0, {'a': 3, 'b': 2})
+        self.stream.publish(3.0, {'a': 3})
+
+        self.assertEqual(self.events(response), [
+            ('sample', {'timestamp': 1.0, 'counts': {'a': 1, 'b': 2}}),
+            ('sample', {'timestamp': 2.0, 'counts': {'a': 3}}),
+            ('sample', {'timestamp': 3.0, 'counts': {'b': 0}})])
+
+    def test_movers(self):
+        '''Clients can ask for the types changing most'''
+        response, _ = self.connect('?mode=movers&limit=1')
+
+        self.stream.publish(1.0, {'a': 1, 'b': 2})
+        self.stream.publish(2.0, {'a': 5, 'b': 1})
+
+        self.assertEqual(self.events(response), [
+            ('sample', {'timestamp': 1.0, 'movers': [['b', 2, 2]]}),
+            ('sample', {'timestamp': 2.0, 'movers': [['a', 5, 4]]})])
+
+    def test_slowClient(self):
+        '''Events for paused clients are queued, dropping the oldest'''
+        response, _ = self.connect()
+        client = response.transport.producer
+
+        client.pauseProducing()
+        total = objectbrowser.STREAM_BUFFER_SIZE + 2
+        for i in xrange(total):
+            self.stream.publish(float(i), {'a': i + 1})
+        self.assertEqual(self.events(response), [])
+
+        client.resumeProducing()
+
+        events = self.events(response)
+        self.assertEqual(events[0], ('dropped', '2'))
+        self.assertEqual([data['timestamp'] for _, data in events[1:]],
+                         map(float, xrange(2, total)))
+
+    def test_close(self):
+        '''Closing the stream finishes all responses'''
+        _, d = self.connect()
+        self.stream.closeAll()
+
+        return d
+
+    @defer.inlineCallbacks
+    def test_invalid(self):
+        '''Unknown modes and invalid limits are refused'''
+        for query in '?mode=nope', '?mode=movers&limit=0', '?limit=x':
+            code, _, _ = yield get(self.stream, '/' + query)
+            self.assertEqual(code, 400)
@@ -0,0 +1,115 @@
+# txSpy, a set of tools to spy inside Twisted applications
+#
+# Copyright (C) 2009 Nicolas Trangez  <eikke eikke com>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, version 2.1
+# of the License.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA  02110-1301  USA
+
+'''Tests for `txspy.worker`'''
+
+import os
+import time
+import errno
+import signal
+
+from twisted.trial import unittest
+from twisted.internet import defer
+
+from txspy import worker
+
+
+class ForkedWorkerTest(unittest.TestCase):
+    '''Tests for `ForkedWorker`, forking real children'''
+
+    if not worker.canFork():
+        skip = 'Forking is not supported on this platform'
+
+    def assertReaped(self, pid):
+        '''Check a child exited and was waited for'''
+        exc = self.assertRaises(OSError, os.waitpid, pid, os.WNOHANG)
+        self.assertEqual(exc.errno, errno.ECHILD)
+
+    def test_records(self):
+        '''Records produced by the child are collected'''
+        marker = [1, 2, 3]
+        worker_ = worker.ForkedWorker(
+            lambda: ({'count': i, 'marker': marker} for i in xrange(3)))
+        d = worker_.start()
+
+        self.assertNotIdentical(worker_.pid, None)
+        self.assertTrue(worker_.forkDuration >= 0)
+
+        def check(records):
+            self.assertEqual(records, [{'count': i, 'marker': marker}
+                                       for i in xrange(3)])
+            self.assertReaped(worker_.pid)
+
+        return d.addCallback(check)
+
+    def test_recordReceived(self):
+        '''Records are passed on as they arrive if asked to'''
+        received = []
+        worker_ = worker.ForkedWorker(lambda: iter(['a', 'b']),
+                                      recordReceived=received.append)
+
+        def check(result):
+            self.assertIdentical(result, None)
+            self.assertEqual(received, ['a', 'b'])
+
+        return worker_.start().addCallback(check)
+
+    def test_error(self):
+        '''Exceptions raised in the child fail the worker'''
+        def fail():
+            yield 'partial'
+            raise ValueError('broken')
+
+        worker_ = worker.ForkedWorker(fail)
+        d = self.assertFailure(worker_.start(), worker.WorkerError)
+
+        def check(exc):
+            self.assertIn('broken', str(exc))
+            self.assertReaped(worker_.pid)
+
+        return d.addCallback(check)
+
+    def test_timeout(self):
+        '''Children taking too long are killed and reaped'''
+        def hang():
+            time.sleep(60)
+            return []
+
+        worker_ = worker.ForkedWorker(hang, timeout=0.2)
+        start = time.time()
+        d = self.assertFailure(worker_.start(), defer.TimeoutError)
+
+        def check(_):
+            self.assertTrue(time.time() - start < 30)
+            self.assertReaped(worker_.pid)
+
+            status = worker_._exitStatus
+            self.assertTrue(os.WIFSIGNALED(status))
+            self.assertEqual(os.WTERMSIG(status), signal.SIGKILL)
+
+        return d.addCallback(check)
+
+    def test_startOnce(self):
+        '''A worker can't be started twice'''
+        worker_ = worker.ForkedWorker(lambda: [])
+        d = worker_.start()
+
+        self.assertRaises(AssertionError, worker_.start)
+
+        return d
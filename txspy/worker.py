@@ -0,0 +1,315 @@
+# txSpy, a set of tools to spy inside Twisted applications
+#
+# Copyright (C) 2009 Nicolas Trangez  <eikke eikke com>
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, version 2.1
+# of the License.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+# MA  02110-1301  USA
+
+'''Heap analysis in forked worker processes
+
+Forking copies the process lazily: the child sees a frozen copy of the heap,
+pages only get copied once either process writes to them. A child can take
+as long as it needs to analyze the heap, while the parent only pauses for
+the duration of the fork itself.
+
+The child sends its results back as JSON records, one per line, over a pipe
+which the reactor reads asynchronously.
+
+:author: Nicolas Trangez
+:license: GNU Lesser General Public License version 2.1
+:copyright: |copy| 2009 Nicolas Trangez
+
+.. |copy| unicode:: 0xA9 .. copyright sign
+'''
+
+import os
+import gc
+import time
+import errno
+import signal
+import operator
+
+from zope.interface import implements
+
+from twisted.internet import defer, main
+from twisted.internet.interfaces import IReadDescriptor
+
+try:
+    import json
+except ImportError:
+    # Python < 2.6
+    import simplejson as json
+
+import txspy
+
+__author__ = txspy.__author__
+__license__ = txspy.__license__
+__version__ = txspy.__version__
+
+__docformat__ = 'restructuredtext en'
+
+# Default time (in seconds) a worker may take before it's killed
+WORKER_TIMEOUT = 300
+# Interval (in seconds) at which exited workers are polled for
+REAP_INTERVAL = 0.1
+# Maximal number of bytes read from a worker pipe at once
+READ_SIZE = 64 * 1024
+
+
+class WorkerError(Exception):
+    '''Raised when a worker fails'''
+
+
+class ForkedWorker(object):
+    '''Run a function in a forked copy of the process
+
+    The function is called in the child, and should return an iterable of
+    records which can be serialized as JSON. Records are sent to the parent
+    as soon as they're produced. The child is killed if it doesn't finish
+    within the timeout, and reaped once it exited.
+
+    A worker can only be started once.
+    '''
+
+    implements(IReadDescriptor)
+
+    __slots__ = '_function', '_timeout', '_reactor', '_pid', '_fd', \
+                '_buffer', '_records', '_error', '_recordReceived', \
+                '_deferred', '_timeoutCall', '_forkDuration', '_exitStatus', \
+                '_expired',
+
+    def __init__(self, function, timeout=WORKER_TIMEOUT, recordReceived=None,
+                 reactor=None):
+        '''
+        :Parameters:
+            function : callable
+              Function to call in the child, returning an iterable of
+              records
+            timeout : number
+              Time (in seconds) the child may take
+            recordReceived : callable
+              If given, called with every record as it arrives, instead of
+              collecting them
+            reactor : `twisted.internet.interfaces.IReactorFDSet`
+              Reactor to read the results with, defaults to the global one
+        '''
+        if reactor is None:
+            from twisted.internet import reactor
+
+        self._function = function
+        self._timeout = timeout
+        self._reactor = reactor
+        self._recordReceived = recordReceived
+
+        self._pid = None
+        self._fd = None
+        self._buffer = ''
+        self._records = []
+        self._error = None
+        self._deferred = None
+        self._timeoutCall = None
+        self._forkDuration = None
+        self._exitStatus = None
+        self._expired = False
+
+    def start(self):
+        '''Fork the worker
+
+        :return: `Deferred` firing with the list of records (or `None` if
+                 passed to `recordReceived`) once the child is done, or
+                 failing with `WorkerError` or
+                 `twisted.internet.defer.TimeoutError`
+        :rtype: `twisted.internet.defer.Deferred`
+        '''
+        assert self._deferred is None, 'Worker already started'
+
+        readFd, writeFd = os.pipe()
+
+        start = time.time()
+        pid = os.fork()
+
+        if pid == 0:
+            os.close(readFd)
+            self._runChild(writeFd)
+            # Never reached
+
+        self._forkDuration = time.time() - start
+        os.close(writeFd)
+
+        self._pid = pid
+        self._fd = readFd
+        self._deferred = defer.Deferred()
+
+        setNonBlocking(readFd)
+        self._reactor.addReader(self)
+        self._timeoutCall = self._reactor.callLater(self._timeout,
+                                                    self._timedOut)
+
+        return self._deferred
+
+    def _runChild(self, fd):
+        '''Run the function and send its records, then exit
+
+        The child never returns into the reactor.
+        '''
+        status = 0
+
+        try:
+            try:
+                # Collections write to every object they visit, which only
+                # copies pages for no good reason
+                gc.disable()
+
+                for record in self._function():
+                    writeAll(fd, json.dumps(['record', record]) + '\n')
+
+                writeAll(fd, json.dumps(['done', None]) + '\n')
+            except Exception, exc:
+                status = 1
+                try:
+                    writeAll(fd, json.dumps(['error', repr(exc)]) + '\n')
+                except Exception:
+                    pass
+        finally:
+            # Skip cleanup handlers, they belong to the parent
+            os._exit(status)
+
+    # IReadDescriptor
+    def fileno(self):
+        return self._fd if self._fd is not None else -1
+
+    def doRead(self):
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except OSError, exc:
+            if exc.errno in (errno.EAGAIN, errno.EINTR):
+                return None
+            return main.CONNECTION_LOST
+
+        if not data:
+            return main.CONNECTION_DONE
+
+        lines = (self._buffer + data).split('\n')
+        self._buffer = lines.pop()
+
+        for line in lines:
+            kind, payload = json.loads(line)
+
+            if kind == 'record':
+                if self._recordReceived is not None:
+                    self._recordReceived(payload)
+                else:
+                    self._records.append(payload)
+            elif kind == 'error':
+                self._error = payload
+
+        return None
+
+    def connectionLost(self, reason):
+        self._close()
+        self._reap()
+
+    def logPrefix(self):
+        return 'ForkedWorker(%r)' % self._pid
+
+    def _close(self):
+        '''Stop reading from the child'''
+        if self._fd is None:
+            return
+
+        self._reactor.removeReader(self)
+        os.close(self._fd)
+        self._fd = None
+
+        if self._timeoutCall is not None and self._timeoutCall.active():
+            self._timeoutCall.cancel()
+        self._timeoutCall = None
+
+    def _timedOut(self):
+        '''Kill a child taking too long'''
+        self._timeoutCall = None
+
+        try:
+            os.kill(self._pid, signal.SIGKILL)
+        except OSError:
+            # Exited in the mean time
+            pass
+
+        self._expired = True
+        self._close()
+        self._reap()
+
+    def _reap(self):
+        '''Wait for the child to exit, without blocking, and report'''
+        try:
+            pid, status = os.waitpid(self._pid, os.WNOHANG)
+        except OSError, exc:
+            if exc.errno == errno.EINTR:
+                pid = 0
+            else:
+                # Already reaped by someone else
+                pid, status = self._pid, None
+
+        if pid == 0:
+            self._reactor.callLater(REAP_INTERVAL, self._reap)
+            return
+
+        self._exitStatus = status
+        self._report()
+
+    def _report(self):
+        '''Fire the `Deferred`'''
+        d, self._deferred = self._deferred, None
+
+        if self._expired:
+            d.errback(defer.TimeoutError('Worker timed out after %ss' % \
+                                             self._timeout))
+        elif self._error is not None:
+            d.errback(WorkerError(self._error))
+        elif self._exitStatus:
+            d.errback(WorkerError('Worker exited abnormally (status %d)' % \
+                                      self._exitStatus))
+        elif self._recordReceived is not None:
+            d.callback(None)
+        else:
+            d.callback(self._records)
+
+    pid = property(operator.attrgetter('_pid'),
+                   doc='Process ID of the child, once started')
+    forkDuration = property(operator.attrgetter('_forkDuration'),
+                            doc='Time (in seconds) the parent was paused '
+                                'forking the child')
+    timeout = property(operator.attrgetter('_timeout'),
+                       doc='Time (in seconds) the child may take')
+
+
+def setNonBlocking(fd):
+    '''Make a file descriptor non-blocking'''
+    # Not available on all platforms, neither is forking
+    import fcntl
+
+    flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+    fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+
+
+def writeAll(fd, data):
+    '''Write all of a string to a blocking file descriptor'''
+    while data:
+        data = data[os.write(fd, data):]
+
+
+def canFork():
+    '''Check whether workers can be forked on this platform'''
+    return hasattr(os, 'fork')